@@ -45,6 +45,26 @@ class SomeSerializable(Serializable):
         return True
 
 
+class SelfReferencing(Serializable):
+    def __init__(self):
+        self.me = self
+        self.in_list = [self, 1]
+
+
+class VersionedDummy(Dummy):
+    VERSION = '1.0'
+
+    @classmethod
+    def get_conversion_manager(cls):
+        cm = super().get_conversion_manager()
+        cm.add_converter('0.1', VersionedDummy, VersionedDummy.convert_0_1, '1.0')
+        return cm
+
+    @staticmethod
+    def convert_0_1(state_obj: dict):
+        state_obj['b'] = 'converted'
+
+
 class PyObjectTest:
     def __init__(self):
         self.time = datetime.now()
@@ -324,6 +344,36 @@ class TestSerialization(Scenarios):
         self.assertIn(date(year=2022, month=1, day=1), dummy.b)
         self.assertIs(type(dummy.b[date(year=2022, month=1, day=1)]), Dummy)
 
+    def test_hoisted_version_info(self):
+        formatter = self.get_formatter(serialization=True)
+        formatter.add_semantics(HoistVersionInfo(True))
+        obj = Dummy(a=[VersionedDummy(a=1), VersionedDummy(a=2)], b=VersionedDummy(a=3))
+        ser_obj = formatter.serialize(obj)
+        self.assertDictEqual(ser_obj, {
+            formatter.spec.class_id: format_class_str(Dummy),
+            'a': [{
+                formatter.spec.class_id: format_class_str(VersionedDummy),
+                'a': 1,
+                'b': None
+            }, {
+                formatter.spec.class_id: format_class_str(VersionedDummy),
+                'a': 2,
+                'b': None
+            }],
+            'b': {
+                formatter.spec.class_id: format_class_str(VersionedDummy),
+                'a': 3,
+                'b': None
+            },
+            formatter.spec.version_header_id: {format_class_str(VersionedDummy): '1.0'}
+        })
+
+    def test_hoisted_version_info_falls_back_when_root_is_not_mapping(self):
+        formatter = self.get_formatter(serialization=True)
+        formatter.add_semantics(HoistVersionInfo(True))
+        ser_obj = formatter.serialize([VersionedDummy(a=1)])
+        self.assertEqual(ser_obj[0][formatter.spec.version_id], {format_class_str(VersionedDummy): '1.0'})
+
     def test_temporary(self):
         formatter = self.get_formatter(serialization=True)
         dummy_ref = [Dummy(a=1, b=1), Dummy(a=2, b=2)]
@@ -412,10 +462,28 @@ class TestRoundTrip(Scenarios):
         remade = self.assert_obj_roundtrip(dummy3)
         self.assertIs(remade.a.a.b, remade)
 
+    def test_circular_reference_without_finalize(self):
+        formatter = self.get_formatter(serialization=True)
+        ser_obj = self.get_ser_obj(formatter, SelfReferencing())
+        remade = self.deser_ser_obj(ser_obj)
+        self.assertIs(remade.me, remade)
+        self.assertIs(remade.in_list[0], remade)
+        self.assertEqual(remade.in_list[1], 1)
+
     def test_all_default_handlers(self):
         obj = DefaultHandlerObj()
         self.assert_obj_roundtrip(obj)
 
+    def test_hoisted_version_info(self):
+        formatter = self.get_formatter(serialization=True)
+        formatter.add_semantics(HoistVersionInfo(True))
+        ser_obj = self.get_ser_obj(formatter, Dummy(a=[VersionedDummy(a=1, b='b')], b=VersionedDummy(a=2)))
+        remade = self.deser_ser_obj(ser_obj)
+        self.assertIs(type(remade.a[0]), VersionedDummy)
+        self.assertEqual(remade.a[0].a, 1)
+        self.assertEqual(remade.a[0].b, 'b')
+        self.assertEqual(remade.b.a, 2)
+
     def test_noref(self):
         class Foo:
             def __init__(self):
@@ -549,6 +617,70 @@ class TestDeSerialization(Scenarios):
                 'b': 'hi'
             })
 
+    def test_look_ahead_preserved_reference_nested(self):
+        formatter = self.get_formatter(serialization=False)
+        deser_obj = {
+            formatter.spec.class_id: format_class_str(Dummy),
+            'a': {
+                formatter.spec.class_id: format_class_str(PreservedReference),
+                'ref': '"b"."a"'
+            },
+            'b': {
+                formatter.spec.class_id: format_class_str(Dummy),
+                'a': {
+                    formatter.spec.class_id: format_class_str(Dummy),
+                    'a': 90,
+                    'b': None
+                },
+                'b': {
+                    formatter.spec.class_id: format_class_str(PreservedReference),
+                    'ref': '"b"."a"'
+                }
+            }
+        }
+        obj = self.deser_ser_obj(deser_obj)
+        self.assertIs(obj.a, obj.b.a)
+        self.assertIs(obj.b.b, obj.b.a)
+        self.assertEqual(obj.a.a, 90)
+
+    def test_look_ahead_preserved_reference_gets_path_semantics(self):
+        class MarkerSemantic(Semantic[bool]):
+            pass
+
+        class Marked(Serializable):
+            def from_dict(self, state_obj: dict, context: FormatterContext, **kwargs):
+                self.marked = bool(context.semantic_context[MarkerSemantic])
+
+        class Marker(Dummy):
+            @classmethod
+            def check_in_deserialization_context(cls, context: FormatterContext):
+                super().check_in_deserialization_context(context)
+                context.add_semantics(MarkerSemantic(True))
+        globals()['Marked'] = Marked
+        globals()['Marker'] = Marker
+        try:
+            formatter = self.get_formatter(serialization=False)
+            deser_obj = {
+                formatter.spec.class_id: format_class_str(Dummy),
+                'a': {
+                    formatter.spec.class_id: format_class_str(PreservedReference),
+                    'ref': '"b"."a"'
+                },
+                'b': {
+                    formatter.spec.class_id: format_class_str(Marker),
+                    'a': {
+                        formatter.spec.class_id: format_class_str(Marked)
+                    },
+                    'b': None
+                }
+            }
+            obj = self.deser_ser_obj(deser_obj)
+            self.assertIs(obj.a, obj.b.a)
+            self.assertTrue(obj.a.marked)
+        finally:
+            del globals()['Marked']
+            del globals()['Marker']
+
     def test_circular_reference(self):
         formatter = self.get_formatter(serialization=False)
         deser_obj = {
@@ -601,6 +733,27 @@ class TestDeSerialization(Scenarios):
         self.assertIs(obj.b, obj.a.a)
         self.assertEqual(obj.a.a.a, 90)
 
+    def test_version_header_conversion(self):
+        formatter = self.get_formatter(serialization=False)
+        deser_obj = {
+            formatter.spec.class_id: format_class_str(Dummy),
+            'a': {
+                formatter.spec.class_id: format_class_str(VersionedDummy),
+                'a': 1,
+                'b': None
+            },
+            'b': {
+                formatter.spec.class_id: format_class_str(VersionedDummy),
+                formatter.spec.version_id: {format_class_str(VersionedDummy): '1.0'},
+                'a': 2,
+                'b': None
+            },
+            formatter.spec.version_header_id: {format_class_str(VersionedDummy): '0.1'}
+        }
+        obj = self.deser_ser_obj(deser_obj)
+        self.assertEqual(obj.a.b, 'converted')
+        self.assertIsNone(obj.b.b)
+
     def test_can_remake_pyobject_with_new(self):
         class RGB:
             def __init__(self, r, g, b):
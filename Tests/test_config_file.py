@@ -6,6 +6,9 @@
 """
 import json
 import os
+import shutil
+import tempfile
+import time
 from pathlib import Path
 from typing import Any, Type
 from unittest import main
@@ -14,12 +17,15 @@ from observer_hooks import EventHandler
 from ram_util.modules import format_class_str
 
 from integration_tests_base import IntegrationTestCaseBase, Dummy, EmptyFormatter
+from integrated_tests import VersionedDummy
 from grave_settings.abstract import IASettings
-from grave_settings.config_file import ConfigFile
+from grave_settings.config_file import ConfigFile, ConversionWriteBack, LoadCache, AutoSaver
 from grave_settings.conversion_manager import ConversionManager
 from grave_settings.formatter import Formatter, ProcessingException
 from grave_settings.formatters.json import JsonFormatter
+from grave_settings.lazy import LazyProxy, is_materialized
 from grave_settings.semantics import SecurityException
+from grave_settings.utilities import file_signature, hash_buffer
 
 TEST_FILE_PATH = Path('test_config_file.test')
 
@@ -160,6 +166,179 @@ class TestConfigFile(IntegrationTestCaseBase):
             c.load()
         globals().pop('CustomDummy')
 
+    def write_old_version_file(self):
+        formatter = self.get_formatter()
+        ser_obj = self.get_ser_obj(formatter, VersionedDummy(a=1, b=1))
+        ser_obj[formatter.spec.version_id][format_class_str(VersionedDummy)] = '0.1'
+        with open(TEST_FILE_PATH, 'w') as f:
+            f.write(json.dumps(ser_obj))
+        return formatter.spec.version_id
+
+    def load_with_write_back(self, write_back: ConversionWriteBack) -> ConfigFile:
+        c = ConfigFile(TEST_FILE_PATH, data=VersionedDummy, formatter=JsonFormatter(), write_back_converted=write_back)
+        c.backup_settings_file = lambda: None
+        c.load()
+        return c
+
+    def test_conversion_not_written_back_by_default(self):
+        version_id = self.write_old_version_file()
+        c = self.load_with_write_back(ConversionWriteBack.NEVER)
+        self.assertEqual(c.data.b, 'converted')
+        on_disk = json.loads(self.read_file_contents())
+        self.assertEqual(on_disk[version_id][format_class_str(VersionedDummy)], '0.1')
+
+    def test_conversion_written_back(self):
+        for write_back in (ConversionWriteBack.SYNC, ConversionWriteBack.BACKGROUND):
+            with self.subTest(write_back=write_back):
+                version_id = self.write_old_version_file()
+                c = self.load_with_write_back(write_back)
+                self.assertTrue(c.wait_for_write_back())
+                self.assertIsNone(c.write_back_error)
+                self.assertFalse(c.changes_made)
+                self.assertEqual(c.content_signature, file_signature(str(TEST_FILE_PATH)))  # Not an outside change
+                self.assertEqual(c.content_hash, hash_buffer(self.read_file_contents()))
+                on_disk = json.loads(self.read_file_contents())
+                self.assertEqual(on_disk[version_id][format_class_str(VersionedDummy)], '1.0')
+                self.assertEqual(on_disk['b'], 'converted')
+                self.assertEqual([x for x in os.listdir('.') if x.endswith('.tmp')], [])
+
+                def fail(*args, **kwargs):
+                    raise AssertionError('File was converted again')
+                c = self.load_with_write_back(write_back)
+                c.write_back = fail
+                c.load()
+                self.assertEqual(c.data.b, 'converted')
+
+    def test_background_write_back_error(self):
+        self.write_old_version_file()
+        c = ConfigFile(TEST_FILE_PATH, data=VersionedDummy, formatter=JsonFormatter(),
+                       write_back_converted=ConversionWriteBack.BACKGROUND)
+        c.backup_settings_file = lambda: None
+
+        def fail(*args, **kwargs):
+            raise OSError('disk full')
+        c.write_buffer = fail
+        c.load()
+        with self.assertRaises(OSError):
+            c.wait_for_write_back()
+        self.assertTrue(c.changes_made)
+        self.assertTrue(c.wait_for_write_back())  # Raised once
+
+    def get_auto_save_config(self, debounce: float, max_delay: float) -> tuple[ConfigFile, list]:
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy(a=0), formatter=self.get_formatter(), auto_save=True,
+                         auto_save_debounce=debounce, auto_save_max_delay=max_delay)
+        writes = []
+        write = cfg.auto_saver.write
+
+        def counted_write(buffer):
+            writes.append(buffer)
+            write(buffer)
+        cfg.auto_saver.write = counted_write
+        self.addCleanup(cfg.auto_saver.close)
+        return cfg, writes
+
+    def test_debounced_auto_save(self):
+        cfg, writes = self.get_auto_save_config(debounce=0.2, max_delay=10)
+        for i in range(100):
+            cfg.data['a'] = i
+        self.assertTrue(cfg.changes_made)
+        self.assertTrue(cfg.flush(timeout=10))
+        self.assertEqual(len(writes), 1)
+        self.assertFalse(cfg.changes_made)
+        self.assertEqual(json.loads(self.read_file_contents())['a'], 99)
+        self.assertTrue(cfg.flush())
+        self.assertEqual(len(writes), 1)
+
+    def test_auto_saver_errors(self):
+        writes = []
+        attempts = []
+
+        def serialize():
+            attempts.append(None)
+            if len(attempts) == 1:
+                saver.notify()  # Changed by another thread while serializing
+                raise RuntimeError('changed during iteration')
+            if len(attempts) == 3:
+                raise ValueError('broken')
+            return len(attempts)
+        saver = AutoSaver(serialize, writes.append, debounce=0.01, max_delay=10)
+        saver.notify()
+        self.assertTrue(saver.flush(timeout=10))  # The retry succeeded, the first error is not reported
+        self.assertEqual(writes, [2])
+        saver.notify()
+        with self.assertRaises(ValueError):
+            saver.flush(timeout=10)
+        saver.notify()
+        self.assertTrue(saver.flush(timeout=10))
+        self.assertEqual(writes, [2, 4])
+        self.assertTrue(saver.close(timeout=10))
+
+    def test_auto_saver_discards_torn_snapshots(self):
+        writes = []
+        attempts = []
+
+        def serialize():
+            attempts.append(None)
+            if len(attempts) < 3:
+                saver.notify()  # Changed by another thread while serializing
+            return len(attempts)
+        saver = AutoSaver(serialize, writes.append, debounce=10, max_delay=0)
+        saver.notify()
+        self.assertTrue(saver.flush(timeout=10))  # Past the deadline, but the changed snapshots are not written
+        self.assertEqual(writes, [3])
+        with saver.lock:  # Held by a thread changing the state
+            saver.notify()
+            self.assertFalse(saver.flush(timeout=0.1))
+            self.assertEqual(writes, [3])
+        self.assertTrue(saver.flush(timeout=10))
+        self.assertEqual(writes, [3, 4])
+        self.assertTrue(saver.close(timeout=10))
+
+    def test_auto_save_max_delay(self):
+        cfg, writes = self.get_auto_save_config(debounce=10, max_delay=0.05)
+        cfg.data['a'] = 1
+        deadline = time.monotonic() + 10
+        while not writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(cfg.flush(timeout=10))
+        self.assertEqual(json.loads(self.read_file_contents())['a'], 1)
+
+    def test_load_path(self):
+        shared = [1, 2]
+        self.write_object_to_file(Dummy(a=shared, b=Dummy(a=Dummy(a=1), b=shared)))
+        c = self.get_config_file(TEST_FILE_PATH, Dummy)
+        section = c.load_path('b')
+        self.assertIsInstance(section, Dummy)
+        self.assertEqual(section.b, [1, 2])
+        self.assertEqual(c.load_path('"b"."a"').a, 1)
+        self.assertEqual(c.load_path(['b', 'a', 'a']), 1)
+        self.assertIs(c.data, Dummy)
+
+    def test_load_path_through_preserved_reference(self):
+        shared = Dummy(a=1)
+        self.write_object_to_file(Dummy(a=shared, b=Dummy(a=shared)))
+        c = self.get_config_file(TEST_FILE_PATH, Dummy)
+        self.assertEqual(c.load_path('b.a.a'), 1)
+
+    def test_load_path_skips_siblings(self):
+        formatter = self.get_formatter()
+        ser_obj = self.get_ser_obj(formatter, Dummy(a=None, b=Dummy(a=1)))
+        ser_obj['a'] = {formatter.spec.class_id: 'not_a_module.Missing'}
+        with open(TEST_FILE_PATH, 'w') as f:
+            f.write(json.dumps(ser_obj))
+        c = self.get_config_file(TEST_FILE_PATH, Dummy)
+        self.assertEqual(c.load_path('b').a, 1)
+        with self.assertRaises(ProcessingException):
+            c.load()
+
+    def test_load_path_with_outdated_ancestor(self):
+        self.write_old_version_file()
+        c = self.get_config_file(TEST_FILE_PATH, VersionedDummy)
+        c.backup_settings_file = lambda: None
+        self.assertEqual(c.load_path('b'), 'converted')
+        self.assertIsInstance(c.data, VersionedDummy)
+
     def test_serialize_logfile_with_link(self):
         cfg = self.get_config_file(TEST_FILE_PATH, data=Dummy())
         cfg2 = self.get_config_file(Path('test_config_2.test'), data=Dummy())
@@ -170,6 +349,217 @@ class TestConfigFile(IntegrationTestCaseBase):
         remade_cfg = self.get_config_file(TEST_FILE_PATH, data=Dummy)
         remade_cfg.load()
 
+    def write_linked_configs(self) -> Path:
+        link_path = Path('test_config_2.test')
+        self.addCleanup(lambda: link_path.exists() and os.remove(link_path))
+        cfg = self.get_config_file(TEST_FILE_PATH, data=Dummy(b=1))
+        cfg2 = self.get_config_file(link_path, data=Dummy(a=5))
+        cfg.data.a = cfg2.data
+        cfg.add_config_dependency(cfg2, relative_path=False)
+        cfg.save()
+        return link_path
+
+    def test_lazy_linked_config(self):
+        link_path = self.write_linked_configs()
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), lazy_links=True)
+        cfg.load()
+        self.assertIs(type(cfg.data.a), LazyProxy)
+        os.remove(link_path)
+        cfg.save()  # The linked config is written as a link without loading it
+        self.assertFalse(is_materialized(cfg.data.a))
+        cfg.save()
+        with self.assertRaises(ValueError):
+            cfg.data.a.a
+        self.write_linked_configs()
+        cfg.load()
+        self.assertEqual(cfg.data.a.a, 5)
+        self.assertIs(type(cfg.data.a), Dummy)
+        self.assertIn(cfg.data.a, cfg.sub_configs)
+        self.assertFalse(cfg.changes_made)
+
+    def write_many_linked_configs(self, n: int) -> list[Path]:
+        link_paths = [Path(f'test_config_link_{i}.test') for i in range(n)]
+        for link_path in link_paths:
+            self.addCleanup(lambda p=link_path: p.exists() and os.remove(p))
+        cfg = self.get_config_file(TEST_FILE_PATH, data=Dummy(a=[]))
+        for i, link_path in enumerate(link_paths):
+            linked = self.get_config_file(link_path, data=Dummy(a=i))
+            cfg.data.a.append(linked.data)
+            cfg.add_config_dependency(linked, relative_path=False)
+        cfg.save()
+        return link_paths
+
+    def test_save_only_changed_linked_configs(self):
+        link_paths = self.write_many_linked_configs(3)
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), link_workers=3)
+        cfg.load()
+        self.assertEqual([x.a for x in cfg.data.a], [0, 1, 2])
+        self.assertTrue(all(type(x) is Dummy for x in cfg.data.a))
+        self.assertEqual(len(cfg.get_linked_configs()), 3)
+        self.assertEqual(cfg.save_linked_configs(), [])
+        changed = cfg.sub_configs[cfg.data.a[1]].config
+        changed.data.a = 10  # Not seen by changes_made, but every linked config is serialized by default
+        os.remove(link_paths[2])
+        self.assertCountEqual(cfg.save_linked_configs(), [changed, cfg.sub_configs[cfg.data.a[2]].config])
+        self.assertFalse(changed.changes_made)
+        self.assertEqual(cfg.save_linked_configs(), [])
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter())
+        cfg.load()
+        self.assertEqual([x.a for x in cfg.data.a], [0, 10, 2])
+
+    def test_skip_unchanged_links(self):
+        self.write_many_linked_configs(3)
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), skip_unchanged_links=True)
+        cfg.load()
+        first, second = (cfg.sub_configs[x].config for x in cfg.data.a[:2])
+        first.data.a = 10  # Not tracked, skipped
+        second.data['a'] = 11
+        self.assertTrue(second.changes_made)
+        self.assertEqual(cfg.save_linked_configs(), [second])
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter())
+        cfg.load()
+        self.assertEqual([x.a for x in cfg.data.a], [0, 11, 2])
+
+    def test_prefetch_linked_config(self):
+        self.write_linked_configs()
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), lazy_links=True,
+                         prefetch_links=2)
+        cfg.load()
+        self.assertTrue(cfg.wait_for_prefetch(timeout=10))
+        self.assertIs(type(cfg.data.a), Dummy)
+        self.assertEqual(cfg.data.a.a, 5)
+        self.assertEqual(cfg.pending_links, {})
+
+    def test_prefetch_links_held_by_one_object(self):
+        link_paths = [Path(f'test_config_link_{i}.test') for i in range(2)]
+        for link_path in link_paths:
+            self.addCleanup(lambda p=link_path: p.exists() and os.remove(p))
+        cfg = self.get_config_file(TEST_FILE_PATH, data=Dummy())
+        for key, link_path in zip('ab', link_paths):
+            linked = self.get_config_file(link_path, data=Dummy(a=key))
+            cfg.data[key] = linked.data
+            cfg.add_config_dependency(linked, relative_path=False)
+        cfg.save()
+
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), lazy_links=True,
+                         prefetch_links=2)
+        cfg.load()
+        self.assertTrue(cfg.wait_for_prefetch(timeout=10))
+        self.assertEqual((cfg.data.a.a, cfg.data.b.a), ('a', 'b'))
+        self.assertEqual(len(cfg.sub_configs), 2)
+        self.assertFalse(cfg.data.is_dirty())
+        self.assertFalse(cfg.changes_made)
+        cfg.data['b'] = 1  # The invalidate event of the data object was left alone
+        self.assertTrue(cfg.changes_made)
+
+    def test_unchanged_save_is_skipped(self):
+        cfg = self.get_config_file(TEST_FILE_PATH, Dummy(a=1, b=[1, 2]))
+        self.assertTrue(cfg.save())
+        mtime = os.stat(TEST_FILE_PATH).st_mtime_ns
+        self.assertFalse(cfg.save())
+        self.assertEqual(os.stat(TEST_FILE_PATH).st_mtime_ns, mtime)
+        cfg.data['a'] = 2
+        self.assertTrue(cfg.save())
+
+        loaded = self.get_config_file(TEST_FILE_PATH, Dummy)
+        loaded.load()
+        self.assertFalse(loaded.save())
+        self.write_object_to_file(Dummy(a=3))  # The file no longer holds what was read
+        self.assertTrue(loaded.save())
+        self.assertEqual(json.loads(self.read_file_contents())['a'], 2)
+
+    def test_load_cache(self):
+        self.write_object_to_file(Dummy(a=1))
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), load_cache=LoadCache.STAT)
+        self.assertTrue(cfg.load())
+        data = cfg.data
+        self.assertFalse(cfg.load())
+        self.assertIs(cfg.data, data)
+        cfg.data['a'] = 5
+        self.assertTrue(cfg.load())
+        self.assertEqual(cfg.data.a, 1)
+        cfg.save()
+        self.assertFalse(cfg.load())
+        self.write_object_to_file(Dummy(a=2))
+        self.assertTrue(cfg.load())
+        self.assertEqual(cfg.data.a, 2)
+
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), load_cache=LoadCache.HASH)
+        cfg.load()
+        os.utime(TEST_FILE_PATH, ns=(1, 1))
+        self.assertFalse(cfg.load())
+        self.write_object_to_file(Dummy(a=3))
+        self.assertTrue(cfg.load())
+        self.assertEqual(cfg.data.a, 3)
+
+    def test_snapshot_cache(self):
+        directory = Path(tempfile.mkdtemp())
+        try:
+            self.write_object_to_file(Dummy(a=1, b=Dummy(a=[1, 2])))
+            cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), snapshot_dir=directory)
+            cfg.load()
+            self.assertEqual(len(list(directory.glob('*.pickle'))), 1)
+
+            cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), snapshot_dir=directory)
+            def fail(*args, **kwargs):
+                raise AssertionError('deserialized')
+            cfg.formatter.deserialize = fail
+            cfg.load()
+            self.assertEqual(cfg.data, Dummy(a=1, b=Dummy(a=[1, 2])))
+            cfg.data['a'] = 3
+            self.assertTrue(cfg.changes_made)
+
+            self.write_object_to_file(Dummy(a=2))
+            cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), snapshot_dir=directory)
+            cfg.load()
+            self.assertEqual(cfg.data.a, 2)
+            self.assertEqual(len(list(directory.glob('*.pickle'))), 2)
+
+            cfg = ConfigFile(TEST_FILE_PATH, data=VersionedDummy, formatter=self.get_formatter(),
+                             snapshot_dir=directory)
+            with self.assertRaises(ProcessingException):  # The snapshot of a Dummy is not handed out
+                cfg.load()
+        finally:
+            shutil.rmtree(directory)
+
+    def test_load_cache_untracked_changes(self):
+        self.write_object_to_file(Dummy(a=1))
+        cfg = ConfigFile(TEST_FILE_PATH, data=Dummy, formatter=self.get_formatter(), load_cache=LoadCache.STAT)
+        cfg.load()
+        cfg.data.a = 5  # Does not invalidate, so load can not tell
+        self.assertFalse(cfg.load())
+        self.assertEqual(cfg.data.a, 5)
+        cfg.changes_made = True
+        self.assertTrue(cfg.load())
+        self.assertEqual(cfg.data.a, 1)
+
+    def test_splice_save(self):
+        items = [Dummy(a='x' * 20000, b=i) for i in range(3)]
+        data = Dummy(a=items, b=Dummy(a=1, b={'k': [1, 2]}))
+        cfg = ConfigFile(TEST_FILE_PATH, data=data, formatter=self.get_formatter(), splice_saves=True)
+        formatter = self.get_formatter()
+        cfg.save()
+        self.assertEqual(self.read_file_contents(), formatter.dumps(data))
+        self.assertEqual(cfg.splice_writer.copied, 0)
+
+        data.b['a'] = 2
+        cfg.save()
+        self.assertEqual(self.read_file_contents(), formatter.dumps(data))
+        self.assertGreater(cfg.splice_writer.copied, 60000)
+
+        self.assertFalse(cfg.save())
+
+        items[1]['b'] = 'changed'
+        cfg.save()
+        self.assertEqual(self.read_file_contents(), formatter.dumps(data))
+        self.assertGreater(cfg.splice_writer.copied, 40000)
+
+        self.write_object_to_file(Dummy())  # Changed by something else, written in full
+        data.b['a'] = 3
+        cfg.save()
+        self.assertEqual(cfg.splice_writer.copied, 0)
+        self.assertEqual(self.read_file_contents(), formatter.dumps(data))
+
 
 
 if __name__ == '__main__':
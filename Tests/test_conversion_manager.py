@@ -2,6 +2,7 @@ from unittest import TestCase, main
 
 from ram_util.modules import load_type
 
+from grave_settings.abstract import VersionedSerializable
 from grave_settings.conversion_manager import *
 
 
@@ -175,6 +176,57 @@ class TestConversionManager(TestCase):
         self.assertIn('something', output)
         self.assertEqual(output['something'], [100, 200])
 
+    def test_frozen_manager_caches_chain(self):
+        cm = self.get_conversion_manager()
+        emitted = []
+
+        def convert1(state_obj: dict):
+            state_obj['test'] = 100
+
+        def convert2(state_obj: dict):
+            return {'foo': state_obj['test']}
+
+        cm.add_converter('1.0.0', VersionedObject, convert1, '1.0.1')
+        cm.add_converter('1.0.1', VersionedObject, convert2, '1.0.2')
+
+        def on_converted(state_obj, class_str, ver, target_ver=None):
+            emitted.append((ver, target_ver))
+        cm.converted.subscribe(on_converted)
+        cm.freeze()
+        with self.assertRaises(ConversionError):
+            cm.add_converter('1.0.2', VersionedObject, convert1, '1.0.3')
+        chain = cm.get_converter_chain(format_class_str(VersionedObject), '1.0.0', '1.0.2')
+        self.assertIs(chain, cm.get_converter_chain(format_class_str(VersionedObject), '1.0.0', '1.0.2'))
+        output = cm.try_convert({}, format_class_str(VersionedObject), '1.0.0', '1.0.2')
+        self.assertEqual(output, {'foo': 100})
+        self.assertEqual(emitted, [('1.0.1', '1.0.2')])
+
+    def test_versioned_serializable_caches_manager(self):
+        calls = []
+
+        class Versioned(VersionedSerializable):
+            VERSION = '1.0.0'
+
+            @classmethod
+            def get_conversion_manager(cls) -> ConversionManager:
+                calls.append(cls)
+                cm = super().get_conversion_manager()
+                cm.add_converter('0.1.0', Versioned, lambda x: {'converted': True}, '1.0.0')
+                return cm
+        globals()['Versioned'] = Versioned
+        try:
+            current = Versioned.get_version_object()
+            self.assertFalse(Versioned.check_convert_update({}, load_type, current))
+            old = {format_class_str(Versioned): '0.1.0'}
+            self.assertEqual(Versioned.check_convert_update({}, load_type, old), {'converted': True})
+            self.assertEqual(Versioned.check_convert_update({}, load_type, old), {'converted': True})
+            self.assertEqual(len(calls), 1)
+            Versioned.clear_conversion_cache()
+            Versioned.check_convert_update({}, load_type, old)
+            self.assertEqual(len(calls), 2)
+        finally:
+            del globals()['Versioned']
+
 
 if __name__ == '__main__':
     main()
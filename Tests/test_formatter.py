@@ -1,8 +1,15 @@
+import json
 from unittest import TestCase, main
 
+from grave_settings.base import Settings
 from grave_settings.framestack_context import FrameStackContext
-from grave_settings.formatter import Formatter
+from grave_settings.formatter import Formatter, Serializer
+from grave_settings.formatter_settings import PreservedReference
+from grave_settings.fragment_cache import FragmentCache
+from grave_settings.formatters.json import JsonFormatter
+from grave_settings.lazy import LazyProxy, materialize, is_materialized
 from grave_settings.semantics import *
+from grave_settings.utilities import format_class_str
 
 from integration_tests_base import IntegrationTestCaseBase, Dummy, EmptyFormatter
 
@@ -15,6 +22,303 @@ class TestFormatter(TestCase):
         self.assertListEqual(path, [])
         str_path = formatter.spec.path_to_str([])
         self.assertEqual(str_path, '')
+        self.assertListEqual(formatter.spec.str_to_path('a.0."b.c"'), ['a', 0, 'b.c'])
+        self.assertListEqual(formatter.spec.str_to_path(formatter.spec.path_to_str(['a', 0, '1'])), ['a', 0, '1'])
+        self.assertListEqual(formatter.spec.str_to_path(formatter.spec.path_to_str(['a', -1])), ['a', -1])
+        self.assertListEqual(formatter.spec.str_to_path('a.²'), ['a', '²'])
+
+    def test_processors_are_reused(self):
+        formatter = JsonFormatter()
+        first = formatter.dumps(Dummy(a=1, b=[1, 2]))
+        self.assertEqual(len(formatter.serializer_pool), 1)
+        serializer = formatter.serializer_pool[0]
+        second = formatter.dumps(Dummy(a=1, b=[1, 2]))
+        self.assertEqual(first, second)
+        self.assertIs(formatter.serializer_pool[0], serializer)
+
+        obj = formatter.loads(first)
+        obj = formatter.loads(formatter.dumps(Dummy(a=obj, b=obj)))
+        self.assertIs(obj.a, obj.b)
+        self.assertEqual(len(formatter.deserializer_pool), 1)
+
+    def test_prepare(self):
+        formatter = JsonFormatter()
+        formatter.prepare(types=(Dummy,))
+        self.assertEqual(len(formatter.serializer_pool), formatter.PROCESSOR_POOL_SIZE)
+        self.assertEqual(len(formatter.deserializer_pool), formatter.PROCESSOR_POOL_SIZE)
+        self.assertIn(Dummy, Serializer.get_handler_tables()['handler'].cache)
+        obj = formatter.loads(formatter.dumps(Dummy(a=1, b=2)))
+        self.assertEqual(obj.a, 1)
+
+    def test_customized_handler_does_not_leak_to_class_table(self):
+        formatter = JsonFormatter()
+        serializer = formatter.get_serializer(None, formatter.get_serialization_context())
+
+        def handle_dummy(self, instance: Dummy, **kwargs):
+            return 'custom'
+        serializer.handler.add_handler(Dummy, handle_dummy)
+        self.assertIs(serializer.handler.get_key_func(Dummy), handle_dummy)
+        self.assertIsNot(Serializer.get_handler_tables()['handler'].get_key_func(Dummy), handle_dummy)
+
+    def test_loads_look_ahead_preserved_reference(self):
+        formatter = JsonFormatter()
+        class_id = formatter.spec.class_id
+        buffer = formatter.dumps({
+            class_id: format_class_str(Dummy),
+            'a': {
+                class_id: format_class_str(PreservedReference),
+                'ref': '"b"'
+            },
+            'b': [1, 2]
+        })
+        obj = formatter.loads(buffer)
+        self.assertIs(obj.a, obj.b)
+
+
+class Unserializable(Dummy):
+    def to_dict(self, *args, **kwargs):
+        raise AssertionError('Excluded objects should not be visited')
+
+
+class TestProjection(TestCase):
+    def test_include(self):
+        formatter = JsonFormatter()
+        obj = Dummy(a=Dummy(a=1, b=Unserializable()), b=Unserializable())
+        buffer = formatter.dumps(obj, include=['a.a'])
+        self.assertEqual(json.loads(buffer), {
+            '__class__': format_class_str(Dummy),
+            'a': {
+                '__class__': format_class_str(Dummy),
+                'a': 1
+            }
+        })
+        loaded = formatter.loads(buffer)
+        self.assertEqual(loaded.a.a, 1)
+
+    def test_exclude(self):
+        formatter = JsonFormatter()
+        obj = Dummy(a=Dummy(a=1, b=Unserializable()), b=[1, 2])
+        ser_obj = json.loads(formatter.dumps(obj, exclude=[('a', 'b')]))
+        self.assertNotIn('b', ser_obj['a'])
+        self.assertEqual(ser_obj['b'], [1, 2])
+
+    def test_list_items_keep_their_index(self):
+        formatter = JsonFormatter()
+        shared = [3]
+        obj = Dummy(a=[Unserializable(), shared, Unserializable()], b=shared)
+        loaded = formatter.loads(formatter.dumps(obj, include=['a.1', 'b']))
+        self.assertEqual(loaded.a, [None, [3], None])
+        self.assertIs(loaded.a[1], loaded.b)
+
+    def test_references_into_excluded_regions_are_inlined(self):
+        formatter = JsonFormatter()
+        shared = Dummy(a=1)
+        obj = Dummy(a=shared, b=Dummy(a=shared))
+        buffer = formatter.dumps(obj, exclude=['a'])
+        self.assertNotIn('a', json.loads(buffer))
+        loaded = formatter.loads(buffer)
+        self.assertEqual(loaded.b.a.a, 1)
+
+    def test_path_through_a_reference(self):
+        formatter = JsonFormatter()
+        shared = Dummy(a=1, b=2)
+        obj = Dummy(a=Dummy(a=shared), b=Dummy(a=shared))
+        buffer = formatter.dumps(obj, include=['a', 'b.a.a'])
+        self.assertIn('ref', json.loads(buffer)['b']['a'])
+        loaded = formatter.loads(buffer)
+        self.assertIs(loaded.b.a, loaded.a.a)
+        self.assertEqual((loaded.b.a.a, loaded.b.a.b), (1, 2))
+
+    def test_projection_semantic(self):
+        formatter = JsonFormatter()
+        formatter.add_semantics(IncludeKeyPath('b'))
+        ser_obj = json.loads(formatter.dumps(Dummy(a=Unserializable(), b=2)))
+        self.assertEqual(ser_obj['b'], 2)
+        self.assertNotIn('a', ser_obj)
+        formatter.semantics.clear()
+        loaded = formatter.loads(formatter.dumps(Dummy(a=1, b=2)))
+        self.assertEqual((loaded.a, loaded.b), (1, 2))
+
+
+class EagerDummy(Dummy):
+    @classmethod
+    def check_in_deserialization_context(cls, route: FrameStackContext):
+        super().check_in_deserialization_context(route)
+        route.add_semantics(LazyDeserialization(False))
+
+
+class FailingDummy(Dummy):
+    def from_dict(self, state_obj: dict, context, **kwargs):
+        raise ValueError('failing')
+
+
+class TestLazyDeserialization(TestCase):
+    def get_formatter(self):
+        formatter = JsonFormatter()
+        formatter.add_semantics(LazyDeserialization(True))
+        return formatter
+
+    def test_objects_are_built_on_access(self):
+        formatter = self.get_formatter()
+        loaded = formatter.loads(formatter.dumps(Dummy(a=Dummy(a=1, b=[2]), b=3)))
+        self.assertIs(type(loaded), Dummy)
+        self.assertIs(type(loaded.a), LazyProxy)
+        self.assertFalse(is_materialized(loaded.a))
+        self.assertEqual(loaded.b, 3)
+        proxy = loaded.a
+        self.assertEqual(proxy.b, [2])
+        self.assertIs(type(loaded.a), Dummy)
+        self.assertIs(materialize(proxy), loaded.a)
+        self.assertEqual(proxy, loaded.a)
+
+    def test_references_share_a_proxy(self):
+        formatter = self.get_formatter()
+        shared = Dummy(a=1)
+        loaded = formatter.loads(formatter.dumps(Dummy(a=shared, b=[shared])))
+        self.assertIs(loaded.a, loaded.b[0])
+        self.assertEqual(loaded.b[0].a, 1)
+        self.assertIs(type(loaded.a), Dummy)
+        self.assertIs(loaded.a, loaded.b[0])
+
+    def test_reference_into_a_lazy_object(self):
+        formatter = self.get_formatter()
+        inner = Dummy(a=1)
+        buffer = formatter.dumps(Dummy(a=Dummy(a=inner), b=inner))
+        loaded = formatter.loads(buffer)
+        self.assertIs(type(loaded.a), Dummy)
+        self.assertIs(loaded.a.a, loaded.b)
+
+    def test_circular_reference(self):
+        formatter = self.get_formatter()
+        obj = Dummy(a=1)
+        obj.b = Dummy(a=obj)
+        loaded = formatter.loads(formatter.dumps(obj))
+        formatter.loads(formatter.dumps(Dummy(a=Dummy())))  # reuses the pooled deserializer
+        self.assertIs(type(loaded.b), LazyProxy)
+        self.assertIs(loaded.b.a, loaded)
+
+    def test_loaded_objects_are_clean(self):
+        obj = Dummy(a=1)
+        obj.b = Dummy(a=obj)
+        loaded = JsonFormatter().loads(JsonFormatter().dumps(obj))
+        self.assertIs(loaded.b.a, loaded)
+        self.assertFalse(loaded.is_dirty(recursive=True))
+        self.assertFalse(loaded.b.is_dirty(recursive=True))
+
+        formatter = self.get_formatter()
+        loaded = formatter.loads(formatter.dumps(Dummy(a=Dummy(a=1), b=obj)))
+        loaded.a.a
+        loaded.b.b.a
+        self.assertIs(type(loaded.a), Dummy)
+        self.assertFalse(loaded.is_dirty(recursive=True))
+        self.assertFalse(loaded.b.b.is_dirty(recursive=True))
+
+    def test_dumps_materializes(self):
+        formatter = self.get_formatter()
+        buffer = JsonFormatter().dumps(Dummy(a=Dummy(a=1, b=[1, 2]), b=Dummy(a=2)))
+        loaded = formatter.loads(buffer)
+        self.assertEqual(formatter.dumps(loaded), buffer)
+
+    def test_negated_in_subtree(self):
+        formatter = self.get_formatter()
+        loaded = formatter.loads(formatter.dumps(Dummy(a=EagerDummy(a=Dummy(a=1)))))
+        self.assertIs(type(loaded.a), LazyProxy)
+        self.assertIs(type(loaded.a.a), Dummy)
+
+    def test_repr_after_failed_build(self):
+        formatter = self.get_formatter()
+        loaded = formatter.loads(formatter.dumps(Dummy(a=FailingDummy(a=1), b=Dummy(a=2))))
+        proxy, pending = loaded.a, loaded.b
+        self.assertIn('a', repr(proxy))
+        with self.assertRaises(Exception):
+            materialize(proxy)
+        self.assertIn('failed', repr(proxy))
+        self.assertIs(type(pending), LazyProxy)
+        self.assertEqual(pending.a, 2)
+        self.assertIn('failed', repr(proxy))  # The session let go of its deserializer
+
+
+class CountingDummy(Dummy):
+    calls = 0
+
+    def to_dict(self, context, **kwargs) -> dict:
+        CountingDummy.calls += 1
+        return super().to_dict(context, **kwargs)
+
+
+class TestFragmentCache(TestCase):
+    def setUp(self) -> None:
+        self.formatter = JsonFormatter()
+        self.cache = FragmentCache()
+
+    def dumps(self, obj):
+        serializer = self.formatter.get_serializer(obj, self.formatter.get_serialization_context())
+        serializer.fragment_cache = self.cache
+        return self.formatter.dumps(obj, serializer=serializer)
+
+    def test_clean_subtrees_are_reused(self):
+        shared = [1, 2]
+        inner = CountingDummy(a=1, b=shared)
+        right = CountingDummy(a=3, b=shared)
+        root = CountingDummy(a=CountingDummy(a=inner, b=2), b=right)
+        first = self.dumps(root)
+        self.assertEqual(first, self.formatter.dumps(root))
+        CountingDummy.calls = 0
+        self.assertEqual(self.dumps(root), first)
+        self.assertEqual(CountingDummy.calls, 0)
+
+        right['a'] = 4
+        buffer = self.dumps(root)
+        self.assertEqual(CountingDummy.calls, 2)  # right and root
+        self.assertEqual(buffer, self.formatter.dumps(root))
+        loaded = self.formatter.loads(buffer)
+        self.assertIs(loaded.a.a.b, loaded.b.b)
+
+        CountingDummy.calls = 0
+        inner['a'] = 7  # No parent is set, the fragments containing inner are dropped by the cache
+        buffer = self.dumps(root)
+        self.assertEqual(CountingDummy.calls, 3)
+        self.assertEqual(self.formatter.loads(buffer).a.a.a, 7)
+
+    def test_equal_but_distinct_replacement(self):
+        first, second = CountingDummy(a=1), CountingDummy(a=1)
+        root = Settings()
+        root['k0'] = first
+        root['k1'] = first
+        self.dumps(root)
+        root['k1'] = second  # Equal to first, but no longer the same object
+        buffer = self.dumps(root)
+        self.assertEqual(buffer, self.formatter.dumps(root))
+        self.assertNotIn('ref', json.loads(buffer)['k1'])
+        root['k1'] = first
+        buffer = self.dumps(root)
+        self.assertEqual(buffer, self.formatter.dumps(root))
+        self.assertIn('ref', json.loads(buffer)['k1'])
+        root['k2'] = [first]
+        self.dumps(root)
+        root['k2'] = [second]  # An equal list does not invalidate root
+        buffer = self.dumps(root)
+        self.assertEqual(buffer, self.formatter.dumps(root))
+        self.assertNotIn('ref', json.loads(buffer)['k2'][0])
+
+    def test_moved_reference_target(self):
+        shared = CountingDummy(a=1)
+        root = CountingDummy(a=CountingDummy(a=shared), b=CountingDummy(a=2, b=shared))
+        self.dumps(root)
+        root['a'] = CountingDummy(a=5)  # shared is now first met inside b
+        buffer = self.dumps(root)
+        self.assertEqual(buffer, self.formatter.dumps(root))
+        loaded = self.formatter.loads(buffer)
+        self.assertEqual(loaded.b.b.a, 1)
+
+    def test_unvisited_fragments_are_pruned(self):
+        child = CountingDummy(a=1)
+        root = CountingDummy(a=child)
+        self.dumps(root)
+        self.assertIn(id(child), self.cache.fragments)
+        root['a'] = None
+        self.dumps(root)
+        self.assertNotIn(id(child), self.cache.fragments)
 
 
 class TestSemantics(IntegrationTestCaseBase):
@@ -8,7 +8,9 @@ from types import MethodType
 from typing import get_type_hints
 from unittest import TestCase, main
 
+from grave_settings.framestack_context import FrameStackContext
 from grave_settings.handlers import OrderedHandler, OrderedMethodHandler
+from grave_settings.semantics import Semantics
 
 
 class TrackException(Exception):
@@ -40,6 +42,63 @@ class TestOrderedHandler(TestCase):
             oh.handle(5)
 
 
+    def test_layer_over(self):
+        base = self.get_handler()
+        base.add_handler(object, lambda x: 'base object')
+        base.add_handler(int, lambda x: 'base int')
+        layer = self.get_handler()
+        layer.add_handler(int, lambda x: 'layer int')
+
+        layered = layer.layer_over(base)
+        self.assertIsNot(layered, layer)
+        self.assertIsNone(layer.parent)
+        self.assertEqual(layered.handle(5), 'layer int')
+        self.assertEqual(layered.handle('a'), 'base object')
+        self.assertEqual(base.handle(5), 'base int')
+
+        layered = layer.layer_over(base, update_order=False)
+        self.assertEqual(layered.handle(5), 'base int')
+
+    def test_layer_over_layered(self):
+        base = self.get_handler()
+        base.add_handler(bytes, lambda x: 'base bytes')
+        base.add_handler(int, lambda x: 'base int')
+        layer = self.get_handler()
+        layer.add_handler(int, lambda x: 'layer int')
+        layer.add_handler(str, lambda x: 'layer str')
+        top = self.get_handler()
+        top.add_handler(float, lambda x: 'top float')
+        top.add_handler(str, lambda x: 'top str')
+        top.add_handler(int, lambda x: 'top int')
+
+        for update_order, first in ((True, 'layer'), (False, 'base')):
+            layered = layer.layer_over(base, update_order=update_order)
+            twice = layered.layer_over(top)
+            self.assertEqual(twice.handle(5), f'{first} int')
+            self.assertEqual(twice.handle('a'), 'layer str')
+            self.assertEqual(twice.handle(1.5), 'top float')
+            self.assertEqual(twice.handle(b''), 'base bytes')
+            under = layered.layer_over(top, update_order=False)
+            self.assertEqual(under.handle(5), 'top int')
+            self.assertEqual(under.handle('a'), 'top str')
+            self.assertEqual(under.handle(b''), 'base bytes')
+            self.assertIsNone(layer.parent)
+            self.assertIs(layered.parent, base)
+
+    def test_framestack_context_handler_layers_pop(self):
+        base = self.get_handler()
+        base.add_handler(object, lambda x: 'base')
+        context = FrameStackContext(base, Semantics())
+        layer = self.get_handler()
+        layer.add_handler(int, lambda x: 'layer')
+        with context:
+            context.set_handler(layer)
+            self.assertEqual(context.handler.handle(5), 'layer')
+            self.assertEqual(context.handler.handle('a'), 'base')
+        self.assertIs(context.handler, base)
+        self.assertEqual(context.handler.handle(5), 'base')
+
+
 class TestOrderedMethodHanlder(TestCase):
     def get_handler(self) -> OrderedMethodHandler:
         return OrderedMethodHandler()
@@ -0,0 +1,113 @@
+# - * -coding: utf - 8 - * -
+"""
+
+
+@author: ☙ Ryan McConnell ❧
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from pathlib import Path
+from unittest import TestCase, main
+
+from integrated_tests import VersionedDummy
+from integration_tests_base import Dummy
+from grave_settings.cli import main as cli_main
+from grave_settings.formatters.json import JsonFormatter
+from grave_settings.migration import is_outdated, migrate_file, migrate_files, CURRENT, OUTDATED, MIGRATED, \
+    FAILED
+from grave_settings.semantics import HoistVersionInfo
+from grave_settings.utilities import format_class_str
+
+
+class TestMigration(TestCase):
+    def setUp(self) -> None:
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def write_file(self, name: str, obj, version: str | None = '0.1', hoist=False) -> str:
+        formatter = JsonFormatter()
+        if hoist:
+            formatter.add_semantics(HoistVersionInfo(True))
+        ser_obj = formatter.serialize(obj)
+        if version is not None:
+            if hoist:
+                ser_obj[formatter.spec.version_header_id][format_class_str(VersionedDummy)] = version
+            else:
+                ser_obj[formatter.spec.version_id][format_class_str(VersionedDummy)] = version
+        path = str(self.directory / name)
+        with open(path, 'w') as f:
+            f.write(json.dumps(ser_obj))
+        return path
+
+    def read_file(self, path: str) -> dict:
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def test_is_outdated(self):
+        formatter = JsonFormatter()
+        current = formatter.serialize(Dummy(a=VersionedDummy(a=1)))
+        self.assertFalse(is_outdated(current, formatter))
+        old = formatter.serialize(Dummy(a=VersionedDummy(a=1)))
+        old['a'][formatter.spec.version_id][format_class_str(VersionedDummy)] = '0.1'
+        self.assertTrue(is_outdated(old, formatter))
+
+    def test_migrate_file(self):
+        path = self.write_file('a.json', VersionedDummy(a=1, b=1))
+        self.assertEqual(migrate_file(path, JsonFormatter, dry_run=True).status, OUTDATED)
+        self.assertEqual(self.read_file(path)['b'], 1)
+        self.assertEqual(migrate_file(path, JsonFormatter).status, MIGRATED)
+        migrated = self.read_file(path)
+        self.assertEqual(migrated['b'], 'converted')
+        self.assertEqual(migrated[JsonFormatter.FORMAT_SETTINGS.version_id][format_class_str(VersionedDummy)], '1.0')
+        self.assertEqual(migrate_file(path, JsonFormatter).status, CURRENT)
+
+    def test_migrate_file_keeps_version_header(self):
+        path = self.write_file('a.json', VersionedDummy(a=1, b=1), hoist=True)
+        self.assertEqual(migrate_file(path, JsonFormatter).status, MIGRATED)
+        migrated = self.read_file(path)
+        self.assertEqual(migrated['b'], 'converted')
+        header = migrated[JsonFormatter.FORMAT_SETTINGS.version_header_id]
+        self.assertEqual(header[format_class_str(VersionedDummy)], '1.0')
+
+    def test_migrate_file_failure(self):
+        path = str(self.directory / 'broken.json')
+        with open(path, 'w') as f:
+            f.write('{not json')
+        result = migrate_file(path, JsonFormatter)
+        self.assertEqual(result.status, FAILED)
+        self.assertIsNotNone(result.error)
+
+    def test_migrate_files_in_process_pool(self):
+        paths = [self.write_file(f'{i}.json', VersionedDummy(a=i, b=i)) for i in range(4)]
+        results = list(migrate_files([(x, JsonFormatter) for x in paths], jobs=2))
+        self.assertEqual([x.path for x in results], paths)
+        self.assertEqual({x.status for x in results}, {MIGRATED})
+        for path in paths:
+            self.assertEqual(self.read_file(path)['b'], 'converted')
+
+    def test_cli_migrate(self):
+        old = self.write_file('old.json', VersionedDummy(a=1, b=1))
+        current = self.write_file('current.json', VersionedDummy(a=1, b=1), version=None)
+        with open(self.directory / 'broken.json', 'w') as f:
+            f.write('{not json')
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            ret = cli_main(['migrate', str(self.directory), '-j', '1'])
+        self.assertEqual(ret, 1)
+        self.assertIn('1 migrated', out.getvalue())
+        self.assertIn('1 current', out.getvalue())
+        self.assertIn('1 failed', out.getvalue())
+        self.assertIn('broken.json', err.getvalue())
+        self.assertEqual(self.read_file(old)['b'], 'converted')
+        self.assertEqual(self.read_file(current)['b'], 1)
+        self.assertEqual([x for x in os.listdir(self.directory) if x.endswith('.tmp')], [])
+
+
+if __name__ == '__main__':
+    main()
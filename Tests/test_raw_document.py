@@ -0,0 +1,105 @@
+# - * -coding: utf - 8 - * -
+"""
+
+
+@author: ☙ Ryan McConnell ❧
+"""
+import json
+import os
+import tempfile
+from unittest import TestCase, main
+
+from integration_tests_base import Dummy
+from grave_settings.formatters.json import JsonFormatter
+from grave_settings.formatters.toml import TomlFormatter
+from grave_settings.raw_document import PRESERVED_REFERENCE_CLASS_STRING
+
+
+class TestRawDocument(TestCase):
+    def test_get_and_set(self):
+        formatter = JsonFormatter()
+        doc = formatter.loads_raw(formatter.dumps(Dummy(a=Dummy(a=1, b=[1, 2]), b='x')))
+        self.assertEqual(doc['"a"."a"'], 1)
+        self.assertEqual(doc[['a', 'b', 1]], 2)
+        self.assertEqual(doc.get_class_str('"a"'), 'integration_tests_base.Dummy')
+        doc['"a"."b".1'] = 5
+        doc['"b"'] = 'y'
+        obj = formatter.loads(doc.dumps())
+        self.assertEqual(obj.a.b, [1, 5])
+        self.assertEqual(obj.b, 'y')
+
+    def test_missing_paths(self):
+        formatter = JsonFormatter()
+        doc = formatter.loads_raw('{"a": [1]}')
+        self.assertIn('"a".0', doc)
+        self.assertNotIn('"a".1', doc)
+        self.assertNotIn('"b"', doc)
+        self.assertIsNone(doc.get('"b"', None))
+        with self.assertRaises(KeyError):
+            doc.get('"a"."c"')
+        del doc['"a".0']
+        self.assertEqual(doc['"a"'], [])
+
+    def test_class_strings_are_not_resolved(self):
+        formatter = JsonFormatter()
+        doc = formatter.loads_raw(json.dumps({
+            '__class__': 'not_a_module.Missing',
+            'a': 1
+        }))
+        doc['"a"'] = 2
+        self.assertEqual(doc.get_class_str(), 'not_a_module.Missing')
+        self.assertEqual(json.loads(doc.dumps())['a'], 2)
+        with self.assertRaises(ImportError):
+            doc.get_class()
+
+    def test_paths_follow_preserved_references(self):
+        formatter = JsonFormatter()
+        shared = [1, 2]
+        doc = formatter.loads_raw(formatter.dumps(Dummy(a=shared, b=Dummy(a=shared))))
+        self.assertEqual(doc['"b"."a".0'], 1)
+        doc['"b"."a".0'] = 3
+        obj = formatter.loads(doc.dumps())
+        self.assertEqual(obj.a, [3, 2])
+        self.assertIs(obj.a, obj.b.a)
+
+    def test_set_shared_object(self):
+        formatter = JsonFormatter()
+        shared = Dummy(a=1)
+        doc = formatter.loads_raw(formatter.dumps(Dummy(a=[1], b=Dummy(a=[2]))))
+        doc['"b"'] = [shared, shared]
+        obj = formatter.loads(doc.dumps())
+        self.assertIs(obj.b[0], obj.b[1])
+        self.assertEqual(obj.b[0].a, 1)
+
+        doc = formatter.loads_raw(formatter.dumps(Dummy(a=Dummy(a=1), b=None)))
+        doc['"b"'] = doc.get_node('"a"', follow_reference=False)
+        doc['"a"'] = {formatter.spec.class_id: PRESERVED_REFERENCE_CLASS_STRING, 'ref': formatter.spec.path_to_str(['b'])}
+        doc['"a"."b"'] = {'x': shared, 'y': shared}  # Lands in "b" so references are stored relative to that
+        obj = formatter.loads(doc.dumps())
+        self.assertIs(obj.b.b['x'], obj.b.b['y'])
+
+    def test_set_uses_formatter_representation(self):
+        formatter = TomlFormatter()
+        doc = formatter.loads_raw(formatter.dumps(Dummy(a=1, b=2)))
+        doc['"a"'] = None
+        doc['"b"'] = [None, 1]
+        obj = formatter.loads(doc.dumps())
+        self.assertIsNone(obj.a)
+        self.assertEqual(obj.b, [None, 1])
+
+    def test_save(self):
+        formatter = JsonFormatter()
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            formatter.write_to_file(Dummy(a=1, b=2), path)
+            doc = formatter.read_raw(path)
+            doc['"a"'] = 10
+            doc.save()
+            self.assertEqual(formatter.read_from_file(path).a, 10)
+        finally:
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
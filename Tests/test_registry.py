@@ -0,0 +1,87 @@
+# - * -coding: utf - 8 - * -
+"""
+
+
+@author: ☙ Ryan McConnell ❧
+"""
+import gc
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import TestCase, main
+
+from integration_tests_base import Dummy
+from integrated_tests import VersionedDummy
+from grave_settings.config_file import ConfigFile
+from grave_settings.formatters.json import JsonFormatter
+from grave_settings.registry import ConfigRegistry
+
+
+class TestConfigRegistry(TestCase):
+    def setUp(self) -> None:
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / 'shared.json'
+        JsonFormatter().write_to_file(Dummy(a=1, b=[1, 2]), str(self.path))
+        self.registry = ConfigRegistry()
+        self.loads = 0
+        self.load = ConfigFile.load
+
+    def tearDown(self) -> None:
+        ConfigFile.load = self.load
+        shutil.rmtree(self.directory)
+
+    def count_loads(self, delay=0.0):
+        load = self.load
+
+        def counting_load(config, *args, **kwargs):
+            self.loads += 1
+            time.sleep(delay)
+            return load(config, *args, **kwargs)
+        ConfigFile.load = counting_load
+
+    def test_single_flight(self):
+        self.count_loads(delay=0.1)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            configs = list(pool.map(lambda _: self.registry.acquire(self.path, data=Dummy), range(8)))
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(all(config is configs[0] for config in configs))
+        self.assertEqual(configs[0].data.b, [1, 2])
+        self.assertEqual(self.registry.get_users(self.path), 8)
+        other = self.directory / '.' / 'shared.json'
+        self.assertIs(self.registry.acquire(other, data=Dummy, formatter='json'), configs[0])
+
+    def test_release_and_eviction(self):
+        self.count_loads()
+        config = self.registry.acquire(self.path, data=Dummy)
+        with self.registry.use(self.path, data=Dummy) as second:
+            self.assertIs(second, config)
+            self.assertEqual(self.registry.get_users(self.path), 2)
+        self.registry.release(config)
+        self.assertEqual(self.registry.get_users(self.path), 0)
+        self.assertIs(self.registry.acquire(self.path, data=Dummy), config)  # Still alive, reused
+        self.registry.release(config)
+        del config, second
+        gc.collect()
+        self.assertEqual(len(self.registry.configs), 0)
+        self.registry.acquire(self.path, data=Dummy)
+        self.assertEqual(self.loads, 2)
+
+    def test_failed_load(self):
+        with open(self.path, 'w') as f:
+            f.write('{')
+        with self.assertRaises(ValueError):
+            self.registry.acquire(self.path, data=Dummy)
+        self.assertEqual(self.registry.loading, {})
+        JsonFormatter().write_to_file(Dummy(a=2), str(self.path))
+        self.assertEqual(self.registry.acquire(self.path, data=Dummy).data.a, 2)
+
+    def test_mismatched_type(self):
+        self.registry.acquire(self.path, data=Dummy)
+        with self.assertRaises(ValueError):
+            self.registry.acquire(self.path, data=VersionedDummy)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 from unittest import TestCase, main
 from typing import Type
-from grave_settings.base import SlotSettings, assemble_settings_keys_from_base
+from grave_settings.base import SlotSettings, Settings, assemble_settings_keys_from_base
 
 
 class TestSlotSettingsSettingsKeysResolution(TestCase):
@@ -189,5 +189,161 @@ class TestSlotSettingsSettingsKeysResolutionObject(TestSlotSettingsSettingsKeysR
         self.assertEqual(Foo.SETTINGS_KEYS, tuple())
 
 
+class BatchSlots(SlotSettings):
+    __slots__ = 'a', 'b', 'c'
+
+    def init_settings(self, **kwargs) -> None:
+        self.a = 0
+        self.b = 0
+        self.c = 0
+
+
+class TestBatchedInvalidation(TestCase):
+    def setUp(self) -> None:
+        self.events = []
+
+    def on_invalidate(self):
+        self.events.append(self.obj.get_invalidated_keys())
+
+    def on_parent_invalidate(self):
+        self.events.append(('parent', self.parent.get_invalidated_keys()))
+
+    def subscribe(self, obj, parent=None):
+        self.obj = obj
+        obj.invalidate.subscribe(self.on_invalidate)
+        if parent is not None:
+            self.parent = parent
+            parent.invalidate.subscribe(self.on_parent_invalidate)
+
+    def test_batch_emits_once_with_keys(self):
+        obj = BatchSlots()
+        self.subscribe(obj)
+        with obj.batch():
+            obj['a'] = 1
+            obj['b'] = 2
+            obj['a'] = 3
+            self.assertListEqual(self.events, [])
+        self.assertListEqual(self.events, [frozenset({'a', 'b'})])
+        self.assertEqual(obj.a, 3)
+        self.assertIsNone(obj.get_invalidated_keys())
+
+    def test_nested_batches(self):
+        obj = BatchSlots()
+        self.subscribe(obj)
+        with obj.batch():
+            obj['a'] = 1
+            with obj.batch():
+                obj['c'] = 1
+            self.assertListEqual(self.events, [])
+        self.assertListEqual(self.events, [frozenset({'a', 'c'})])
+
+    def test_batch_emits_on_error(self):
+        obj = BatchSlots()
+        self.subscribe(obj)
+        with self.assertRaises(ValueError):
+            with obj.batch():
+                obj['a'] = 1
+                raise ValueError()
+        self.assertListEqual(self.events, [frozenset({'a'})])
+        obj['b'] = 1
+        obj.invalidate()
+        self.assertListEqual(self.events, [frozenset({'a'}), frozenset({'b'}), None])
+
+    def test_bulk_set_propagates_to_parent(self):
+        parent = Settings()
+        child = Settings()
+        child.parent = parent
+        child.update({'a': 1, 'b': 2})
+        self.subscribe(child, parent)
+        child.bulk_set({'a': 1, 'b': 3}, c=4)
+        self.assertCountEqual(self.events, [frozenset({'b', 'c'}), ('parent', None)])
+        self.events.clear()
+        child.bulk_set(a=1)
+        self.assertListEqual(self.events, [])
+
+    def test_plain_subscribers_and_overrides(self):
+        calls = []
+
+        class Overriding(BatchSlots):
+            def invalidate(self):
+                calls.append('override')
+
+        obj = BatchSlots()
+        obj.invalidate.subscribe(self.on_plain_invalidate)
+        obj.update({'a': 1, 'b': 2})
+        self.assertListEqual(self.events, ['plain'])
+        Overriding().update({'a': 1}, b=2)
+        self.assertListEqual(calls, ['override'])
+
+    def on_plain_invalidate(self):
+        self.events.append('plain')
+
+    def test_batch_merges_child_invalidations(self):
+        parent = Settings()
+        child = BatchSlots()
+        other = BatchSlots()
+        parent['child'] = child
+        parent['other'] = other
+        child.parent = parent
+        other.parent = parent
+        self.subscribe(child, parent)
+        with parent.batch():
+            parent[('child', 'a')] = 1
+            other['b'] = 2
+            self.assertListEqual(self.events, [frozenset({'a'})])
+        self.assertListEqual(self.events, [frozenset({'a'}), ('parent', frozenset({'child', 'other'}))])
+        self.events.clear()
+        with parent.batch():
+            stray = BatchSlots()
+            stray.parent = parent
+            stray['a'] = 1
+        self.assertListEqual(self.events, [('parent', None)])  # Not held by parent, the key is unknown
+
+
+class TestDirtyTracking(TestCase):
+    def test_slot_settings_dirty_mask(self):
+        obj = BatchSlots()
+        self.assertFalse(obj.is_dirty())
+        obj['c'] = 1
+        obj['a'] = 1
+        self.assertEqual(obj.get_dirty_mask(), 0b101)
+        self.assertSetEqual(obj.get_dirty_keys(), {'a', 'c'})
+        obj.clear_dirty()
+        self.assertFalse(obj.is_dirty())
+        self.assertSetEqual(obj.get_dirty_keys(), set())
+
+    def test_settings_dirty_keys(self):
+        obj = Settings()
+        obj['a'] = 1
+        obj.clear_dirty()
+        obj['a'] = 1
+        self.assertFalse(obj.is_dirty())
+        obj.bulk_set(a=2, b=3)
+        self.assertSetEqual(obj.get_dirty_keys(), {'a', 'b'})
+
+    def test_dirty_child_propagates(self):
+        root = Settings()
+        child = Settings()
+        leaf = BatchSlots()
+        other = BatchSlots()
+        root['child'] = child
+        root['other'] = other
+        child['leaf'] = leaf
+        child.parent = root
+        leaf.parent = child
+        other.parent = root
+        root.clear_dirty()
+        child.clear_dirty()
+        leaf['b'] = 5
+        self.assertFalse(root.is_dirty())
+        self.assertTrue(root.is_dirty(recursive=True))
+        self.assertTrue(child.has_dirty_children())
+        self.assertFalse(other.is_dirty(recursive=True))
+        root.clear_dirty(recursive=True)
+        self.assertFalse(root.is_dirty(recursive=True))
+        self.assertFalse(child.is_dirty(recursive=True))
+        self.assertFalse(leaf.is_dirty())
+
+
 if __name__ == '__main__':
     main()
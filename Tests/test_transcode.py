@@ -0,0 +1,108 @@
+# - * -coding: utf - 8 - * -
+"""
+
+
+@author: ☙ Ryan McConnell ❧
+"""
+import io
+import shutil
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import TestCase, main
+
+from integration_tests_base import Dummy
+from grave_settings.cli import main as cli_main
+from grave_settings.formatter_settings import PreservedReference
+from grave_settings.formatters.json import JsonFormatter
+from grave_settings.formatters.toml import TomlFormatter
+from grave_settings.transcode import Transcoder
+from grave_settings.utilities import format_class_str
+
+
+def to_buffer(formatter, ser_obj):
+    return formatter.serialized_obj_to_buffer(ser_obj, formatter.get_serialization_context())
+
+
+class TestTranscoder(TestCase):
+    def test_none_to_toml(self):
+        json_formatter = JsonFormatter()
+        toml_formatter = TomlFormatter()
+        ser_obj = json_formatter.serialize(Dummy(a=None, b=[1, None]))
+        transcoded = Transcoder(json_formatter, toml_formatter).transcode(ser_obj)
+        none_obj = {toml_formatter.spec.class_id: 'types.NoneType'}
+        self.assertEqual(transcoded['a'], none_obj)
+        self.assertEqual(transcoded['b'], [1, none_obj])
+        obj = toml_formatter.loads(to_buffer(toml_formatter, transcoded))
+        self.assertIsInstance(obj, Dummy)
+        self.assertIsNone(obj.a)
+        self.assertEqual(obj.b, [1, None])
+
+    def test_none_from_toml(self):
+        toml_formatter = TomlFormatter()
+        ser_obj = toml_formatter.serialize(Dummy(a=None, b=[None]))
+        transcoded = Transcoder(toml_formatter, JsonFormatter()).transcode(ser_obj)
+        self.assertIsNone(transcoded['a'])
+        self.assertEqual(transcoded['b'], [None])
+
+    def test_values_the_target_can_not_hold(self):
+        toml_formatter = TomlFormatter()
+        json_formatter = JsonFormatter()
+        date = datetime(1979, 5, 27, 7, 32, tzinfo=timezone.utc)
+        ser_obj = toml_formatter.buffer_to_obj('a = 1979-05-27T07:32:00Z', None)
+        transcoded = Transcoder(toml_formatter, json_formatter).transcode(ser_obj)
+        self.assertEqual(transcoded['a'][json_formatter.spec.class_id], format_class_str(datetime))
+        self.assertEqual(json_formatter.loads(to_buffer(json_formatter, transcoded)), {'a': date})
+
+    def test_preserved_references(self):
+        json_formatter = JsonFormatter()
+        toml_formatter = TomlFormatter()
+        shared = [1, 2]
+        ser_obj = json_formatter.serialize(Dummy(a=shared, b=Dummy(a=shared)))
+        transcoded = Transcoder(json_formatter, toml_formatter).transcode(ser_obj)
+        obj = toml_formatter.loads(to_buffer(toml_formatter, transcoded))
+        self.assertIs(obj.a, obj.b.a)
+
+    def test_keys_the_target_can_not_hold(self):
+        reference = format_class_str(PreservedReference)
+        ser_obj = {
+            'x': [1, 2],
+            'm': {5: [3], 6: {'__class__': reference, 'ref': '"x"'}},
+            'y': {'__class__': reference, 'ref': '"m".5'}
+        }
+        toml_formatter = TomlFormatter()
+        transcoded = Transcoder(JsonFormatter(), toml_formatter).transcode(ser_obj)
+        obj = toml_formatter.loads(to_buffer(toml_formatter, transcoded))
+        self.assertEqual(obj['m'], {5: [3], 6: [1, 2]})
+        self.assertIs(obj['m'][6], obj['x'])
+        self.assertIs(obj['y'], obj['m'][5])
+
+
+class TestConvertCommand(TestCase):
+    def setUp(self) -> None:
+        self.directory = Path(tempfile.mkdtemp())
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_cli_convert(self):
+        json_formatter = JsonFormatter()
+        source = self.directory / 'source'
+        source.mkdir()
+        for i in range(4):
+            json_formatter.write_to_file(Dummy(a=i, b=None), str(source / f'{i}.json'))
+        out, err = io.StringIO(), io.StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            ret = cli_main(['convert', str(source), '--to', 'toml', '-o', str(self.directory / 'out'), '-j', '2'])
+        self.assertEqual(ret, 0, err.getvalue())
+        self.assertIn('4 converted', out.getvalue())
+        toml_formatter = TomlFormatter()
+        for i in range(4):
+            obj = toml_formatter.read_from_file(str(self.directory / 'out' / f'{i}.toml'))
+            self.assertEqual(obj.a, i)
+            self.assertIsNone(obj.b)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+# - * -coding: utf - 8 - * -
+"""
+
+
+@author: ☙ Ryan McConnell ❧
+"""
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase, main
+
+from integration_tests_base import Dummy
+from grave_settings.base import Settings
+from grave_settings.config_file import ConfigFile
+from grave_settings.formatters.json import JsonFormatter
+from grave_settings.watcher import merge_into, ConfigWatcher
+
+
+class Recorder:
+    def __init__(self, obj):
+        self.obj = obj
+        self.calls = []
+        obj.invalidate.subscribe(self.invalidated)
+
+    def invalidated(self):
+        self.calls.append(self.obj.get_invalidated_keys())
+
+
+class TestMerge(TestCase):
+    def test_merge_keeps_identity(self):
+        child = Dummy(a=1, b=[Dummy(a='x'), 2])
+        target = Dummy(a=child, b={'k': 1})
+        target_rec, child_rec = Recorder(target), Recorder(child)
+        item_rec = Recorder(child.b[0])
+        inner = child.b[0]
+
+        self.assertFalse(merge_into(target, Dummy(a=Dummy(a=1, b=[Dummy(a='x'), 2]), b={'k': 1})))
+        self.assertEqual(target_rec.calls + child_rec.calls + item_rec.calls, [])
+
+        self.assertTrue(merge_into(target, Dummy(a=Dummy(a=1, b=[Dummy(a='y'), 2]), b={'k': 1})))
+        self.assertIs(target.a, child)
+        self.assertIs(child.b[0], inner)
+        self.assertEqual(inner.a, 'y')
+        self.assertEqual(item_rec.calls, [frozenset({'a'})])
+        self.assertEqual(target_rec.calls + child_rec.calls, [])
+
+        self.assertTrue(merge_into(target, Dummy(a=Dummy(a=2, b=[Dummy(a='y'), 3]), b={'k': 2})))
+        self.assertIs(target.a, child)
+        self.assertEqual(child.b, [inner, 3])
+        self.assertIs(child.b[0], inner)
+        self.assertEqual(child_rec.calls, [frozenset({'a', 'b'})])
+        self.assertEqual(target_rec.calls, [frozenset({'b'})])
+        self.assertEqual(target.b, {'k': 2})
+
+    def test_merge_settings_keys(self):
+        target = Settings()
+        target['a'] = 1
+        target['b'] = 2
+        source = Settings()
+        source['b'] = 2
+        source['c'] = 3
+        rec = Recorder(target)
+        self.assertTrue(merge_into(target, source))
+        self.assertEqual(dict(target), {'b': 2, 'c': 3})
+        self.assertEqual(rec.calls, [frozenset({'a', 'c'})])
+
+    def test_merge_unset_slots(self):
+        target = Dummy(a=1, b=2)
+        source = Dummy.__new__(Dummy)
+        source.a = 3
+        rec = Recorder(target)
+        self.assertTrue(merge_into(target, source))
+        self.assertEqual((target.a, target.b), (3, 2))
+        self.assertEqual(rec.calls, [frozenset({'a'})])
+
+
+class TestConfigWatcher(TestCase):
+    def setUp(self) -> None:
+        self.directory = Path(tempfile.mkdtemp())
+        self.path = self.directory / 'watched.json'
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def write(self, obj):
+        mtime = os.stat(self.path).st_mtime_ns if self.path.exists() else 0
+        JsonFormatter().write_to_file(obj, str(self.path))
+        os.utime(self.path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))  # Coarse clocks would hide the change
+
+    def test_reload(self):
+        self.write(Dummy(a=Dummy(a=1), b=2))
+        cfg = ConfigFile(self.path, data=Dummy)
+        cfg.load()
+        data, child = cfg.data, cfg.data.a
+        rec = Recorder(child)
+
+        self.write(Dummy(a=Dummy(a=5), b=2))
+        self.assertTrue(cfg.reload())
+        self.assertIs(cfg.data, data)
+        self.assertIs(data.a, child)
+        self.assertEqual(child.a, 5)
+        self.assertEqual(rec.calls, [frozenset({'a'})])
+        self.assertFalse(cfg.changes_made)
+        self.assertFalse(cfg.reload())
+
+        data['b'] = 3
+        self.assertTrue(cfg.changes_made)
+
+    def test_reload_removed_key(self):
+        self.write(Dummy(a=1, b=2))
+        cfg = ConfigFile(self.path, data=Dummy)
+        cfg.load()
+        data = cfg.data
+        with open(self.path) as f:
+            contents = json.load(f)
+        del contents['b']
+        with open(self.path, 'w') as f:
+            json.dump(contents, f)
+        os.utime(self.path, ns=(1, 1))
+        self.assertTrue(cfg.reload())
+        self.assertIs(cfg.data, data)
+        self.assertEqual((data.a, data.b), (1, None))
+
+    def test_observers_see_the_data_during_reload(self):
+        self.write(Dummy(a=1, b=2))
+        cfg = ConfigFile(self.path, data=Dummy)
+        cfg.load()
+        live = cfg.data
+        seen = []
+
+        def invalidated():
+            seen.append(cfg.data)
+            cfg.save()
+        live.invalidate.subscribe(invalidated)
+        self.write(Dummy(a=5, b=2))
+        self.assertTrue(cfg.reload())
+        self.assertEqual(seen, [live])
+        self.assertFalse(cfg.changes_made)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['a'], 5)
+
+    def test_poll(self):
+        self.write(Dummy(a=1))
+        cfg = ConfigFile(self.path, data=Dummy)
+        cfg.load()
+        reloaded = []
+        watcher = ConfigWatcher([cfg], on_reload=reloaded.append)
+        self.assertEqual(watcher.poll(), [])
+
+        self.write(Dummy(a=2))
+        self.assertEqual(watcher.poll(), [cfg])
+        self.assertEqual(cfg.data.a, 2)
+        self.assertEqual(watcher.poll(), [])
+
+        cfg.data['a'] = 3
+        cfg.save()
+        self.assertEqual(watcher.poll(), [])  # Its own save
+
+        self.write(Dummy(a=3))
+        self.assertEqual(watcher.poll(), [])  # Touched but the same
+        self.assertEqual(reloaded, [cfg])
+
+        with open(self.path, 'w') as f:
+            f.write('{')
+        os.utime(self.path, ns=(1, 1))
+        self.assertEqual(watcher.poll(), [])
+        self.assertIsNotNone(watcher.error)
+        self.assertEqual(cfg.data.a, 3)
+
+    def test_background(self):
+        self.write(Dummy(a=1))
+        cfg = ConfigFile(self.path, data=Dummy)
+        cfg.load()
+        watcher = ConfigWatcher([cfg], interval=0.01, jitter=0.005)
+        watcher.start()
+        try:
+            self.write(Dummy(a=2))
+            deadline = time.monotonic() + 5
+            while cfg.data.a != 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(cfg.data.a, 2)
+        finally:
+            self.assertTrue(watcher.stop(timeout=5))
+
+        async def run():
+            watcher.start_task()
+            self.write(Dummy(a=3))
+            deadline = time.monotonic() + 5
+            while cfg.data.a != 3 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            watcher.stop()
+        asyncio.run(run())
+        self.assertEqual(cfg.data.a, 3)
+
+
+if __name__ == '__main__':
+    main()
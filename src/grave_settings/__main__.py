@@ -0,0 +1,13 @@
+# - * -coding: utf - 8 - * -
+"""
+
+
+@author: ☙ Ryan McConnell ❧
+"""
+import sys
+
+from grave_settings.cli import main
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,6 +5,7 @@
 @author: ☙ Ryan McConnell ❧
 """
 from abc import abstractmethod
+from contextlib import contextmanager
 from typing import TypeVar, MutableMapping, Type, Mapping, Callable, Self, Generator, Literal
 
 from observer_hooks import notify
@@ -63,9 +64,9 @@ class VersionedSerializable(Serializable):
     @classmethod
     def get_version_object(cls):
         """
-        It is saf to override this as an instance method
+        It is saf to override this as an instance method. The result is cached per class and should not be mutated
         """
-        return cls.get_conversion_manager().get_version_object(cls)
+        return cls.get_current_version_object()
 
     @classmethod
     def get_conversion_manager(cls) -> ConversionManager:
@@ -73,10 +74,40 @@ class VersionedSerializable(Serializable):
         cm.converted.subscribe(cls.conversion_manager_converted)
         return cm
 
+    @classmethod
+    def get_cached_conversion_manager(cls) -> ConversionManager:
+        """
+        The result of get_conversion_manager is built and frozen once per class. Call clear_conversion_cache if the
+        converters of a class change after it has been used.
+        """
+        cm = cls.__dict__.get('_conversion_manager')
+        if cm is None:
+            cm = cls.get_conversion_manager()
+            cm.freeze()
+            cls._conversion_manager = cm
+        return cm
+
+    @classmethod
+    def get_current_version_object(cls) -> dict | None:
+        """
+        The version object of this class as it is defined now. Cached per class
+        """
+        if '_current_version_object' not in cls.__dict__:
+            cls._current_version_object = ConversionManager.get_version_object(cls)
+        return cls._current_version_object
+
+    @classmethod
+    def clear_conversion_cache(cls):
+        for attr in ('_conversion_manager', '_current_version_object'):
+            if attr in cls.__dict__:
+                delattr(cls, attr)
+
     @classmethod
     def check_convert_update(cls, state_obj: dict, load_type: Callable[[str], Type],
                              version_obj: dict) -> dict | Literal[False]:
-        conversion_manager = cls.get_conversion_manager()
+        if version_obj == cls.get_current_version_object():
+            return False
+        conversion_manager = cls.get_cached_conversion_manager()
         rst = state_obj
         instance = conversion_manager.update_to_current(state_obj, load_type, version_obj)
         if rst is instance:
@@ -97,11 +128,32 @@ def make_kill_converter(cls: Type[VersionedSerializable]) -> Callable[[dict], di
     return lambda *_: cls().to_dict(None)
 
 
+_TRANSIENT_SLOTS = frozenset({'_invalidate', '_batch', '_dirty', '_child_dirty', '_invalidated_keys'})
+
+
+class SettingsBatch:
+    """
+    What changed inside an open IASettings.batch: the keys that were set and the children that were invalidated
+    """
+    __slots__ = 'keys', 'children'
+
+    def __init__(self):
+        self.keys = set()
+        self.children: dict[int, IASettings] | None = None
+
+    def __bool__(self):
+        return bool(self.keys) or bool(self.children)
+
+
 class IASettings(VersionedSerializable, MutableMapping):
-    __slots__ = 'parent', '_invalidate'
+    __slots__ = 'parent', '_invalidate', '_batch', '_dirty', '_child_dirty', '_invalidated_keys'
 
     def __init__(self, *args, initialize_settings=True, **kwargs):
         self.parent: IASettings | None = None
+        self._batch: SettingsBatch | None = None
+        self._invalidated_keys = None
+        self._dirty = None
+        self._child_dirty = False
         if initialize_settings:
             self.init_settings(**kwargs)
 
@@ -111,26 +163,172 @@ class IASettings(VersionedSerializable, MutableMapping):
     def get_versioning_endpoint(self) -> Type[VersionedSerializable]:
         return IASettings
 
+    def __getstate__(self):
+        """
+        Events, open batches and dirty state belong to this process and are not pickled
+        """
+        state = super().__getstate__()
+        if type(state) is tuple and state[1]:
+            slots = {k: v for k, v in state[1].items() if k not in _TRANSIENT_SLOTS}
+            return state[0], slots
+        return state
+
     @notify()
     def invalidate(self) -> None:
         if self.parent is not None:
-            self.parent.invalidate()
+            self.parent.child_invalidated(self)
 
-    def update(self, mapping_obj: Mapping[_KT, _VT], **kwargs: _VT):
-        it_t = type(mapping_obj)
+    def child_invalidated(self, child: 'IASettings') -> None:
+        """
+        Called when a child that has this object as its parent was invalidated. Waits for the open batch if there is one
+        """
+        batch = getattr(self, '_batch', None)
+        if batch is None:
+            self.invalidate()
+        else:
+            if batch.children is None:
+                batch.children = {}
+            batch.children[id(child)] = child
+
+    def invalidate_keys(self, keys: frozenset | tuple | None) -> None:
+        """
+        Fires invalidate with keys available to the subscribers through get_invalidated_keys
+        """
+        previous = getattr(self, '_invalidated_keys', None)
+        self._invalidated_keys = keys
+        try:
+            self.invalidate()
+        finally:
+            self._invalidated_keys = previous
+
+    def get_invalidated_keys(self) -> frozenset | None:
+        """
+        For subscribers of invalidate: the keys that changed, every key set while the batch was open if it is fired by
+        a batch. None if they are not known
+        """
+        keys = getattr(self, '_invalidated_keys', None)
+        return None if keys is None else frozenset(keys)
+
+    def key_changed(self, key) -> None:
+        """
+        Called by __setitem__ when the value of key changed. Marks key dirty and invalidates unless a batch is open
+        """
+        it_t = type(key)
         if it_t == list or it_t == tuple:
-            for k, v in mapping_obj:
-                self[k] = v
+            key = key[0]
+        self.mark_dirty(key)
+        batch = getattr(self, '_batch', None)
+        if batch is None:
+            self.invalidate_keys((key,))
         else:
-            for k, v in mapping_obj.items():
+            batch.keys.add(key)
+
+    def patch_item(self, key, value) -> None:
+        """
+        Stores value under key without calling key_changed, so nothing is marked dirty or invalidated. For replacing
+        placeholders that already stood in for value, like PreservedReferences and LazyProxies. Defaults to
+        __setitem__, override it along with __setitem__
+        """
+        self[key] = value
+
+    def mark_dirty(self, key) -> None:
+        """
+        Records that key changed and flags the parents as having a dirty child
+        """
+        dirty = getattr(self, '_dirty', None)
+        if dirty is None:
+            self._dirty = {key}
+        else:
+            dirty.add(key)
+        self.mark_parent_dirty()
+
+    def mark_parent_dirty(self) -> None:
+        parent = getattr(self, 'parent', None)
+        while parent is not None and not getattr(parent, '_child_dirty', False):
+            parent._child_dirty = True
+            parent = parent.parent
+
+    def get_dirty_keys(self) -> set:
+        """
+        The keys of this object that changed since the last clear_dirty. Changes inside children are not included,
+        see has_dirty_children
+        """
+        return set(getattr(self, '_dirty', None) or ())
+
+    def is_dirty(self, recursive=False) -> bool:
+        if getattr(self, '_dirty', None):
+            return True
+        return recursive and self.has_dirty_children()
+
+    def has_dirty_children(self) -> bool:
+        """
+        True if a child that has this object as its parent changed since the last recursive clear_dirty
+        """
+        return getattr(self, '_child_dirty', False)
+
+    def clear_dirty(self, recursive=False) -> None:
+        """
+        :param recursive: Also clear the children that are flagged as dirty. Clean subtrees are not visited
+        """
+        self._dirty = None
+        if recursive and getattr(self, '_child_dirty', False):
+            self._child_dirty = False
+            for _, v in self.generate_key_value_pairs():
+                if isinstance(v, IASettings) and v.is_dirty(recursive=True):
+                    v.clear_dirty(recursive=True)
+
+    @contextmanager
+    def batch(self):
+        """
+        Collects the keys changed inside the block, and the invalidations of children that have this object as their
+        parent, and invalidates once when the outermost batch exits (see get_invalidated_keys). Nothing is emitted if
+        nothing changed
+        """
+        if getattr(self, '_batch', None) is not None:
+            yield self
+            return
+        self._batch = batch = SettingsBatch()
+        try:
+            yield self
+        finally:
+            self._batch = None
+            if batch:
+                self.invalidate_keys(self.resolve_batch_keys(batch))
+
+    def resolve_batch_keys(self, batch: SettingsBatch) -> frozenset | None:
+        """
+        The keys of a batch including the keys the invalidated children are held under, None if one is not found
+        """
+        keys = set(batch.keys)
+        if children := batch.children:
+            found = set()
+            for k, v in self.generate_key_value_pairs():
+                if children.get(id(v)) is v:
+                    keys.add(k)
+                    found.add(id(v))
+            if len(found) != len(children):
+                return None
+        return frozenset(keys)
+
+    def bulk_set(self, mapping_obj: Mapping[_KT, _VT] = None, **kwargs: _VT):
+        """
+        Sets every item of mapping_obj and kwargs in one batch
+        """
+        with self.batch():
+            if mapping_obj is not None:
+                it_t = type(mapping_obj)
+                for k, v in (mapping_obj if it_t == list or it_t == tuple else mapping_obj.items()):
+                    self[k] = v
+            for k, v in kwargs.items():
                 self[k] = v
-        for k, v in kwargs.items():
-            self[k] = v
+
+    def update(self, mapping_obj: Mapping[_KT, _VT], **kwargs: _VT):
+        self.bulk_set(mapping_obj, **kwargs)
 
     def finalize(self, frame: FormatterContext):
         for key, v in self.generate_key_value_pairs():
             if isinstance(v, PreservedReference):
-                self[key] = frame.find(v)
+                self.patch_item(key, frame.find(v))
 
     @abstractmethod
     def __contains__(self, item):
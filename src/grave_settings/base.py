@@ -44,7 +44,10 @@ class Settings(IASettings):
         else:
             self.sd[key] = value
         if is_new:
-            self.invalidate()
+            self.key_changed(key)
+
+    def patch_item(self, key, value) -> None:
+        self.sd[key] = value
 
     def __getitem__(self, item):
         it_t = type(item)
@@ -108,6 +111,7 @@ class slotsettings_meta(ABCMeta):
         else:
             settings_keys = assemble_settings_keys_from_base(tt)
         setattr(tt, 'SETTINGS_KEYS', settings_keys)
+        setattr(tt, '_settings_key_bits', {k: 1 << i for i, k in enumerate(settings_keys)})
         setattr(tt, '__metaclass__', slotsettings_meta)
         return tt
 
@@ -132,6 +136,22 @@ class SlotSettings(IASettings, metaclass=slotsettings_meta):
     def get_settings_keys(self):
         return self.SETTINGS_KEYS
 
+    def mark_dirty(self, key) -> None:
+        """
+        The dirty keys are kept as a bitmask indexed by position in SETTINGS_KEYS. Keys that are not settings keys are
+        not tracked
+        """
+        if (bit := self._settings_key_bits.get(key)) is not None:
+            self._dirty = (getattr(self, '_dirty', None) or 0) | bit
+        self.mark_parent_dirty()
+
+    def get_dirty_mask(self) -> int:
+        return getattr(self, '_dirty', None) or 0
+
+    def get_dirty_keys(self) -> set:
+        mask = self.get_dirty_mask()
+        return {k for k, bit in self._settings_key_bits.items() if mask & bit}
+
     def safe_update(self, mapping_obj: Mapping[_KT, _VT], **kwargs: _VT):
         try:
             return super(SlotSettings, self).update(mapping_obj, **kwargs)
@@ -163,7 +183,10 @@ class SlotSettings(IASettings, metaclass=slotsettings_meta):
                 setattr(self, key, value)
             else:
                 raise ValueError('Keys for member settings must be string')
-        self.invalidate()
+        self.key_changed(key)
+
+    def patch_item(self, key, value) -> None:
+        setattr(self, key, value)
 
     def __getitem__(self, item):
         it_t = type(item)
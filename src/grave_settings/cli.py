@@ -0,0 +1,144 @@
+# - * -coding: utf - 8 - * -
+"""
+Command line entry point: python -m grave_settings <command>
+
+@author: ☙ Ryan McConnell ❧
+"""
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Type, TextIO
+
+from grave_settings.config_file import ConfigFile
+from grave_settings.formatter import Formatter
+from grave_settings.migration import find_files, migrate_files, CURRENT, FAILED, MIGRATED, OUTDATED
+from grave_settings.transcode import transcode_files
+
+
+def get_formatter_types() -> dict[str, Type[Formatter]]:
+    formatter_types = dict(ConfigFile.FORMATTER_STR_DICT)
+    try:
+        from grave_settings.formatters.bson import BsonFormatter
+    except ImportError:
+        pass
+    else:
+        formatter_types['bson'] = BsonFormatter
+    return formatter_types
+
+
+def print_throughput(verb: str, counts: dict[str, int], n_files: int, n_bytes: int, elapsed: float,
+                     out: TextIO | None = None):
+    if out is None:
+        out = sys.stdout
+    elapsed = max(elapsed, 1e-9)
+    mega_bytes = n_bytes / 1e6
+    summary = ', '.join(f'{v} {k}' for k, v in counts.items() if v) or 'nothing to do'
+    print(f'{verb} {n_files} files ({mega_bytes:.2f} MB) in {elapsed:.2f}s: {summary}. '
+          f'{n_files / elapsed:.1f} files/s, {mega_bytes / elapsed:.2f} MB/s', file=out)
+
+
+def command_migrate(args) -> int:
+    formatter_types = get_formatter_types()
+    if args.format is None:
+        extensions = formatter_types.keys()
+    else:
+        extensions = (args.format,)
+    files = []
+    for path in find_files(args.directory, extensions, recursive=not args.no_recursive):
+        formatter_t = formatter_types[args.format or path.suffix.lower().lstrip('.')]
+        files.append((str(path), formatter_t))
+
+    counts = {MIGRATED: 0, OUTDATED: 0, CURRENT: 0, FAILED: 0}
+    n_bytes = 0
+    start = perf_counter()
+    for result in migrate_files(files, jobs=args.jobs, dry_run=args.dry_run, python_path=args.python_path):
+        counts[result.status] += 1
+        n_bytes += result.size
+        if result.status == FAILED:
+            print(f'FAILED {result.path}: {result.error}', file=sys.stderr)
+        elif args.verbose and result.status in (MIGRATED, OUTDATED):
+            print(f'{result.status} {result.path}')
+    print_throughput('Checked' if args.dry_run else 'Migrated', counts, len(files), n_bytes,
+                     perf_counter() - start)
+    return 1 if counts[FAILED] else 0
+
+
+def command_convert(args) -> int:
+    formatter_types = get_formatter_types()
+    target_t = formatter_types[args.to]
+    if args.source_format is None:
+        extensions = [x for x in formatter_types if x != args.to]
+    else:
+        extensions = (args.source_format,)
+    files = []
+    for source in args.sources:
+        if source.is_dir():
+            found = [(x, x.relative_to(source)) for x in find_files(source, extensions,
+                                                                   recursive=not args.no_recursive)]
+        else:
+            found = [(source, Path(source.name))]
+        for path, relative_path in found:
+            source_format = args.source_format or path.suffix.lower().lstrip('.')
+            if source_format not in formatter_types:
+                print(f'Can not tell the format of {path}, use --from', file=sys.stderr)
+                return 2
+            if args.output is None:
+                target = path.with_suffix(f'.{args.to}')
+            else:
+                target = args.output / relative_path.with_suffix(f'.{args.to}')
+                target.parent.mkdir(parents=True, exist_ok=True)
+            files.append((str(path), formatter_types[source_format], str(target)))
+
+    counts = {'converted': 0, FAILED: 0}
+    n_bytes = 0
+    start = perf_counter()
+    for result in transcode_files(files, target_t, jobs=args.jobs, python_path=args.python_path):
+        n_bytes += result.size
+        if result.error is None:
+            counts['converted'] += 1
+            if args.verbose:
+                print(f'{result.source_path} -> {result.target_path}')
+        else:
+            counts[FAILED] += 1
+            print(f'FAILED {result.source_path}: {result.error}', file=sys.stderr)
+    print_throughput('Converted', counts, len(files), n_bytes, perf_counter() - start)
+    return 1 if counts[FAILED] else 0
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m grave_settings')
+    commands = parser.add_subparsers(dest='command', required=True)
+    formats = sorted(get_formatter_types())
+
+    migrate = commands.add_parser('migrate', help='Upgrade stored files to the current versions of their classes')
+    migrate.add_argument('directory', type=Path)
+    migrate.add_argument('-f', '--format', choices=formats, default=None,
+                         help='Only migrate files of this format (default: pick by file extension)')
+    migrate.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    migrate.add_argument('-n', '--dry-run', action='store_true', help='Only report the files that need migrating')
+    migrate.add_argument('-p', '--python-path', action='append', default=[],
+                         help='Add a directory to sys.path so the stored classes can be imported')
+    migrate.add_argument('--no-recursive', action='store_true')
+    migrate.add_argument('-v', '--verbose', action='store_true')
+    migrate.set_defaults(func=command_migrate)
+
+    convert = commands.add_parser('convert', help='Convert stored files to another format without loading them')
+    convert.add_argument('sources', type=Path, nargs='+', help='Files or directories to convert')
+    convert.add_argument('-t', '--to', choices=formats, required=True)
+    convert.add_argument('-f', '--from', dest='source_format', choices=formats, default=None,
+                         help='Format of the source files (default: pick by file extension)')
+    convert.add_argument('-o', '--output', type=Path, default=None,
+                         help='Directory for the converted files (default: next to the source files)')
+    convert.add_argument('-j', '--jobs', type=int, default=None, help='Worker processes (default: CPU count)')
+    convert.add_argument('-p', '--python-path', action='append', default=[],
+                         help='Add a directory to sys.path in the worker processes')
+    convert.add_argument('--no-recursive', action='store_true')
+    convert.add_argument('-v', '--verbose', action='store_true')
+    convert.set_defaults(func=command_convert)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = get_parser().parse_args(argv)
+    return args.func(args)
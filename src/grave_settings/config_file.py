@@ -6,20 +6,29 @@
 """
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor, Future, wait
 from datetime import datetime
+from enum import Enum
 from pathlib import Path
-from typing import Self, Any, Type
+from threading import Thread, Condition, RLock
+from time import monotonic
+from typing import Self, Any, Type, Callable
 
 from observer_hooks import EventCapturer
 
-from grave_settings.conversion_manager import get_descendent_class_formats
-from grave_settings.utilities import format_class_str, generate_type_hierarchy_to_base
+from grave_settings.conversion_manager import get_descendent_class_formats, ConversionError
+from grave_settings.utilities import format_class_str, generate_type_hierarchy_to_base, hash_buffer, file_signature
 from grave_settings.abstract import IASettings, Serializable
 from grave_settings.formatter_settings import FormatterContext
 from grave_settings.formatters.toml import TomlFormatter
-from grave_settings.formatters.json import JsonFormatter
+from grave_settings.formatters.json import JsonFormatter, JsonSpliceWriter
 from grave_settings.formatter import Formatter, DeSerializer, Serializer
 from grave_settings.handlers import OrderedHandler
+from grave_settings.lazy import LazySession, LazyProxy, materialize, is_materialized
+from grave_settings.fragment_cache import FragmentCache
+from grave_settings.migration import iter_version_blocks
+from grave_settings.snapshot_cache import SnapshotCache
+from grave_settings.watcher import merge_into
 from grave_settings.semantics import ClassStringPassFunction, Semantics, Semantic, SecurityException
 
 
@@ -27,6 +36,27 @@ class PassLogFilePath(Semantic[str]):
     pass
 
 
+class ConversionWriteBack(Enum):
+    """
+    What ConfigFile.load does with a file that had to be converted to the current version
+    """
+    NEVER = 'never'  # leave the file alone, it will be converted again on every load
+    SYNC = 'sync'  # write the converted document back before load returns
+    BACKGROUND = 'background'  # serialize during load, write the buffer from a worker thread
+
+
+class LoadCache(Enum):
+    """
+    When ConfigFile.load keeps the data object instead of parsing the file again. Only if the data object is an
+    IASettings that was not invalidated since it was loaded or saved. Changes that do not invalidate it (assigning a
+    slot attribute, changing a nested object without a parent in place) are not seen and survive the skipped load, set
+    changes_made on the config after making them
+    """
+    NEVER = 'never'
+    STAT = 'stat'  # the inode, size and modification time of the file are unchanged
+    HASH = 'hash'  # the file holds the same bytes, it is read and hashed but not parsed
+
+
 class LogFileLink(Serializable):
     def __init__(self, config=None, file_path=None, rel_path=None):
         self.file_path = file_path
@@ -55,6 +85,156 @@ class LogFileLink(Serializable):
         self.config = state_obj['config']
 
 
+class LinkedConfigLoader(LazySession):
+    """
+    Loads the config of a LogFileLink the first time its data object is accessed
+    """
+    def __init__(self, owner: 'ConfigFile', link: LogFileLink, deserializer: DeSerializer):
+        super().__init__()
+        self.owner = owner
+        self.link = link
+        self.deserializer = deserializer  # patches the slots the proxy was deserialized into
+
+    def build(self, proxy: LazyProxy):
+        return self.link.config.get_load_data_obj()
+
+    def patch_slot(self, obj, key, proxy: LazyProxy, resolved) -> bool:
+        with self.owner.link_lock:  # Links held by the same object can be materialized from different threads
+            return self.deserializer.patch_slot(obj, key, proxy, resolved)
+
+    def materialized(self, proxy: LazyProxy):
+        with self.owner.link_lock:
+            self.owner.add_log_file_link(self.link)
+            self.owner.pending_links.pop(id(proxy), None)
+        self.deserializer = None
+
+    def describe(self, proxy: LazyProxy) -> str:
+        return str(self.link.config.file_path)
+
+
+class AutoSaver:
+    """
+    Saves from a single background thread once changes stop arriving for debounce seconds, or at the latest max_delay
+    seconds after the first unsaved change.
+
+    The state is snapshot by serialize on the writer thread while holding lock. Threads that change the state should
+    hold lock while doing so. If a change is reported through notify while serialize runs, the snapshot, or the error
+    it raised, is thrown away and taken again: after the next quiet period, or right away if the deadline passed or a
+    flush is waiting. A snapshot is only written if nothing was reported while it was taken. error holds the error of
+    the last attempt only and is cleared by a successful write.
+    """
+    def __init__(self, serialize: Callable[[], Any], write: Callable[[Any], None], debounce: float = 0.5,
+                 max_delay: float = 5.0, lock=None):
+        """
+        :param lock: Held while serialize runs, a new RLock by default
+        """
+        self.serialize = serialize
+        self.lock = RLock() if lock is None else lock
+        self.write = write
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.condition = Condition()
+        self.generation = 0
+        self.first_change: float | None = None
+        self.last_change = 0.0
+        self.busy = False
+        self.flush_requested = False
+        self.closed = False
+        self.error: BaseException | None = None
+        self.thread: Thread | None = None
+
+    def notify(self):
+        with self.condition:
+            now = monotonic()
+            self.generation += 1
+            if self.first_change is None:
+                self.first_change = now
+            self.last_change = now
+            if self.thread is None:
+                self.closed = False
+                self.thread = Thread(target=self.run, daemon=True, name='config_auto_save')
+                self.thread.start()
+            self.condition.notify_all()
+
+    def is_pending(self) -> bool:
+        return self.first_change is not None or self.busy
+
+    def wait_until_due(self):
+        while not (self.flush_requested or self.closed):
+            due = min(self.last_change + self.debounce, self.first_change + self.max_delay)
+            if (now := monotonic()) >= due:
+                return
+            self.condition.wait(due - now)
+
+    def run(self):
+        condition = self.condition
+        with condition:
+            while True:
+                while self.first_change is None and not self.closed:
+                    condition.wait()
+                if self.first_change is None:
+                    self.thread = None
+                    return
+                self.wait_until_due()
+                self.busy = True
+                condition.release()
+                with self.lock:
+                    with condition:
+                        generation = self.generation
+                    try:
+                        snapshot = self.serialize()
+                        error = None
+                    except BaseException as e:
+                        snapshot, error = None, e
+                condition.acquire()
+                if self.generation != generation:
+                    self.busy = False
+                    continue  # changed while serializing, the snapshot may be torn
+                self.first_change = None
+                self.flush_requested = False
+                if error is None:
+                    condition.release()
+                    try:
+                        self.write(snapshot)
+                    except BaseException as e:
+                        error = e
+                    condition.acquire()
+                self.error = error
+                self.busy = False
+                condition.notify_all()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Writes pending changes now and waits for the write to finish
+
+        :return: False if the timeout expired first
+        """
+        with self.condition:
+            if self.is_pending():
+                self.flush_requested = True
+                self.condition.notify_all()
+                if not self.condition.wait_for(lambda: not self.is_pending(), timeout):
+                    return False
+            if (error := self.error) is not None:
+                self.error = None
+                raise error
+            return True
+
+    def close(self, timeout: float | None = None) -> bool:
+        """
+        Flushes and stops the writer thread
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            thread = self.thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                return False
+        return self.flush(timeout)
+
+
 class ConfigFile(Serializable):
     FORMATTER_STR_DICT = {
         'json': JsonFormatter,
@@ -66,7 +246,33 @@ class ConfigFile(Serializable):
     }  # Might seem redundant but FORMATTER_STR_DICT values might not be types
 
     def __init__(self, file_path: Path, data: IASettings | Any | Type | None = None,
-                 formatter: None | Formatter | str = None, auto_save=False, read_only=False):
+                 formatter: None | Formatter | str = None, auto_save=False, read_only=False,
+                 write_back_converted: ConversionWriteBack = ConversionWriteBack.NEVER, lazy_links=False,
+                 prefetch_links: int = 0, link_workers: int = 1, auto_save_debounce: float | None = None,
+                 auto_save_max_delay: float = 5.0, cache_fragments=False, splice_saves=False,
+                 load_cache: LoadCache = LoadCache.NEVER, snapshot_dir: Path | None = None,
+                 skip_unchanged_links=False):
+        """
+        :param lazy_links: Linked configs are loaded the first time their data object is accessed instead of during
+            load. Until then a LazyProxy stands in for the data object
+        :param prefetch_links: Number of threads that load the lazy linked configs in the background after load, 0
+            to only load them on access
+        :param link_workers: Number of threads that load the linked configs during load and write the changed ones
+            during save
+        :param skip_unchanged_links: Only serialize the linked configs that were changed (see needs_save) when saving.
+            Changes that do not invalidate the data object of a linked config are lost with this
+        :param auto_save_debounce: With auto_save, save from a background thread once the data has not been
+            invalidated for this many seconds instead of on every invalidation. See AutoSaver
+        :param auto_save_max_delay: The longest a change waits for a debounced auto save
+        :param cache_fragments: Keep the serialized form of IASettings objects between saves and only serialize the
+            ones that were invalidated again. See FragmentCache
+        :param splice_saves: Json only. Saves copy the unchanged parts of the file written before instead of encoding
+            them again, see JsonSpliceWriter. Implies cache_fragments
+        :param load_cache: When load can skip parsing a file it already holds the data of, see LoadCache. Only use it
+            if every change to the data object invalidates it
+        :param snapshot_dir: Keep pickled snapshots of loaded data in this directory and unpickle them instead of
+            deserializing a file that was loaded before, see SnapshotCache. Only for trusted directories
+        """
         if file_path is not None:
             if formatter is None:
                 formatter = file_path.suffix.lower()
@@ -76,6 +282,9 @@ class ConfigFile(Serializable):
         if type(formatter) == str:
             formatter = self.guess_formatter_from_str(formatter)()
         self.file_path = file_path
+        self.content_hash: bytes | None = None  # Of the bytes last written to or read from file_path, see write_buffer
+        self.content_signature: tuple | None = None
+        self._data = None
         self.data = data
         self.save_on_invalidate = auto_save
         self.formatter = formatter
@@ -84,6 +293,44 @@ class ConfigFile(Serializable):
         self.read_only = read_only
         self.sub_configs: dict[Any, LogFileLink] = {}
         self.sub_config_paths: dict[Path, Any] = {}
+        self.write_back_converted = write_back_converted
+        self.write_back_thread: Thread | None = None
+        self.write_back_error: BaseException | None = None
+        self.lazy_links = lazy_links
+        self.prefetch_links = prefetch_links
+        self.link_workers = link_workers
+        self.skip_unchanged_links = skip_unchanged_links
+        self.pending_links: dict[int, tuple[LazyProxy, LogFileLink]] = {}
+        self.link_lock = RLock()  # Guards the linked configs and the slots of their proxies
+        self.data_lock = RLock()  # Held while the data object is serialized for a save
+        self.merging = False  # Set while reload merges the file into the data object
+        self.prefetch_futures: list[Future] = []
+        self.auto_saver: AutoSaver | None = None
+        if auto_save and auto_save_debounce is not None:
+            self.auto_saver = AutoSaver(self.auto_save_snapshot, self.auto_save_write, debounce=auto_save_debounce,
+                                        max_delay=auto_save_max_delay, lock=self.data_lock)
+        self.fragment_cache = FragmentCache() if cache_fragments or splice_saves else None
+        self.splice_saves = splice_saves
+        self.splice_writer: JsonSpliceWriter | None = None
+        self.load_cache = load_cache
+        self.snapshot_cache = SnapshotCache(snapshot_dir) if snapshot_dir is not None else None
+
+    @property
+    def data(self) -> IASettings | Any | Type | None:
+        """
+        Invalidating an IASettings data object marks the config as changed, see settings_invalidated
+        """
+        return self._data
+
+    @data.setter
+    def data(self, data: IASettings | Any | Type | None):
+        if isinstance(self._data, IASettings):
+            self._data.invalidate.unsubscribe(self.settings_invalidated)
+        self._data = data
+        self.content_hash = None  # The file no longer necessarily holds this data
+        self.content_signature = None
+        if isinstance(data, IASettings):
+            data.invalidate.subscribe(self.settings_invalidated)
 
     def set_file_path(self, path: Path):
         self.file_path = path
@@ -109,10 +356,11 @@ class ConfigFile(Serializable):
 
     def add_log_file_link(self, link: LogFileLink):
         other = link.config
-        if other.file_path in self.sub_config_paths:
-            self.sub_configs.pop(self.sub_config_paths[other.file_path])
-        self.sub_configs[other.data] = link
-        self.sub_config_paths[other.file_path] = other.data
+        with self.link_lock:
+            if other.file_path in self.sub_config_paths:
+                self.sub_configs.pop(self.sub_config_paths[other.file_path])
+            self.sub_configs[other.data] = link
+            self.sub_config_paths[other.file_path] = other.data
 
     def is_loaded(self):
         return self.data is not None and not isinstance(self.data, type)
@@ -125,9 +373,52 @@ class ConfigFile(Serializable):
             shutil.copyfile(str(self.file_path), str(backup_path))
 
     def settings_invalidated(self):
+        if self.merging:
+            return
         self.changes_made = True
         if self.save_on_invalidate:
-            self.save()
+            if self.auto_saver is not None:
+                self.auto_saver.notify()
+            else:
+                self.save()
+
+    def auto_save_snapshot(self) -> str | bytes | tuple:
+        self.changes_made = False  # Changes made while serializing set it again
+        try:
+            serializer = self.get_serializer(self.formatter)
+            if self.get_splice_writer(self.formatter, self.file_path) is None:
+                return self.formatter.dumps(self.data, serializer=serializer)
+            ser_obj = self.formatter.serialize(self.data, serializer=serializer)
+            return ser_obj, self.fragment_cache.get_section_paths(), serializer.context
+        except BaseException:
+            self.changes_made = True
+            raise
+
+    def auto_save_write(self, snapshot: str | bytes | tuple):
+        try:
+            self.save_linked_configs(atomic=True)
+            if type(snapshot) is tuple:
+                ser_obj, section_paths, context = snapshot
+                writer = self.get_splice_writer(self.formatter, self.file_path)
+                self.formatter.splice_to_file(ser_obj, writer, section_paths, context)
+                self.content_hash = None
+                self.content_signature = writer.signature
+            else:
+                self.write_buffer(self.formatter, snapshot, self.file_path, atomic=True)
+        except BaseException:
+            self.changes_made = True
+            raise
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Writes the changes a debounced auto save is holding back and waits for the write to finish. Errors raised by
+        background writes are raised here
+
+        :return: False if the timeout expired first
+        """
+        if self.auto_saver is None:
+            return True
+        return self.auto_saver.flush(timeout)
 
     def validate_file_path(self, path: Path, must_exist=False, test_if_file=True):
         if self.file_path is None:
@@ -143,27 +434,190 @@ class ConfigFile(Serializable):
         if test_if_file and path.exists() and (not path.is_file()):
             raise ValueError(f'File path is invalid: {path}')
 
-    def save(self, path: Path = None, formatter: None | Formatter = None, force=True, validate_path=True):
+    def save(self, path: Path = None, formatter: None | Formatter = None, force=True, validate_path=True,
+             atomic=False, save_links=True):
+        """
+        :param save_links: Also save the linked configs that need it, see save_linked_configs
+        :return: False if nothing was written, because there were no changes or the file already holds the output
+        """
         if self.read_only:
             raise ValueError('Saving in read-only mode')
         if path is None:
             path = self.file_path
-            vf = self.changes_made
-        elif (not force) and (not self.changes_made) and self.track_changes:
-            return
-        else:
-            vf = False
+        if (not force) and (not self.changes_made) and self.track_changes:
+            return False
         if validate_path:
             self.validate_file_path(path)
         if formatter is None:
             formatter = self.formatter
         if formatter is None:
             raise ValueError('No formatter supplied')
-        serializer = self.formatter.get_serializer(self.data, self.get_serialization_context())
-        serializer.handler.type_bank[object] = self.handle_serialize_object
-        #serializer.handler.add_handler(IASettings, self.handle_serialize_IASettings)
-        formatter.write_to_file(self.data, str(self.file_path), serializer=serializer)
-        self.changes_made = vf
+        if save_links:
+            self.save_linked_configs(atomic=atomic)
+        serializer = self.get_serializer(formatter)
+        if (writer := self.get_splice_writer(formatter, path)) is None:
+            with self.data_lock:
+                buffer = formatter.dumps(self.data, serializer=serializer)
+            written = self.write_buffer(formatter, buffer, path, atomic=atomic)
+        else:
+            with self.data_lock:
+                ser_obj = formatter.serialize(self.data, serializer=serializer)
+            written = formatter.splice_to_file(ser_obj, writer, self.fragment_cache.get_section_paths(),
+                                               serializer.context)
+            self.content_hash = None
+            self.content_signature = writer.signature
+        if path == self.file_path:
+            self.changes_made = False
+        return written
+
+    def write_buffer(self, formatter: Formatter, buffer: str | bytes, path: Path, atomic=False) -> bool:
+        """
+        Writes buffer to path unless path is file_path and it still holds exactly the bytes this config last wrote
+        to or read from it. Nothing else is compared, the file is written if it was touched since
+
+        :return: False if the write was skipped
+        """
+        digest = hash_buffer(buffer)
+        own_file = path == self.file_path
+        if own_file and digest == self.content_hash and self.content_signature == file_signature(str(path)):
+            return False
+        formatter.write_buffer_to_file(buffer, str(path), atomic=atomic)
+        if own_file:
+            self.content_hash = digest
+            self.content_signature = file_signature(str(path))
+        return True
+
+    def get_splice_writer(self, formatter: Formatter, path: Path) -> JsonSpliceWriter | None:
+        """
+        The writer used for splice saves to path, None if saves to path with formatter are written in full
+        """
+        if not self.splice_saves or path != self.file_path or not isinstance(formatter, JsonFormatter):
+            return None
+        if self.splice_writer is None or self.splice_writer.path != str(path):
+            self.splice_writer = JsonSpliceWriter(str(path))
+        return self.splice_writer
+
+    def get_linked_configs(self) -> list['ConfigFile']:
+        """
+        Every config reachable through LogFileLinks, each one listed after the configs it links to
+        """
+        order = []
+        seen = {id(self)}
+        stack = [(self, iter(list(self.sub_configs.values())))]
+        while stack:
+            config, links = stack[-1]
+            for link in links:
+                other = link.config
+                if id(other) not in seen:
+                    seen.add(id(other))
+                    stack.append((other, iter(list(other.sub_configs.values()))))
+                    break
+            else:
+                stack.pop()
+                if config is not self:
+                    order.append(config)
+        return order
+
+    def needs_save(self, only_changed=True) -> bool:
+        """
+        True for loaded configs that were never written, and with only_changed for the ones that were changed.
+        changes_made is only set when the data object is invalidated, assigning a slot attribute or changing a nested
+        object in place is not seen. Without only_changed every loaded config needs a save
+
+        :param only_changed: Leave out configs that were written or loaded and not changed since
+        """
+        if self.read_only or self.file_path is None or not self.is_loaded():
+            return False
+        return not only_changed or self.changes_made or not self.file_path.exists()
+
+    def save_linked_configs(self, workers: int | None = None, atomic=False) -> list['ConfigFile']:
+        """
+        Saves the linked configs that need it (every loaded one unless skip_unchanged_links is set, see needs_save).
+        They are serialized on this thread, so each file is a consistent snapshot, and written by a thread pool. Files
+        that already hold the output are not written again
+
+        :param workers: Number of writer threads, defaults to link_workers
+        :return: The configs whose file was written
+        """
+        dirty = [config for config in self.get_linked_configs()
+                 if config.needs_save(only_changed=self.skip_unchanged_links)]
+        if not dirty:
+            return dirty
+        writes = []
+        for config in dirty:
+            if config.formatter is None:
+                raise ValueError('No formatter supplied')
+            config.validate_file_path(config.file_path)
+            writes.append((config, config.formatter.dumps(config.data,
+                                                          serializer=config.get_serializer(config.formatter))))
+
+        def write(config: ConfigFile, buffer: str | bytes) -> bool:
+            written = config.write_buffer(config.formatter, buffer, config.file_path, atomic=atomic)
+            config.changes_made = False
+            return written
+
+        if workers is None:
+            workers = self.link_workers
+        if workers == 1 or len(writes) == 1:
+            written = [write(config, buffer) for config, buffer in writes]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='config_save') as pool:
+                written = [future.result() for future in [pool.submit(write, config, buffer)
+                                                          for config, buffer in writes]]
+        return [config for config, was_written in zip(dirty, written) if was_written]
+
+    def get_serializer(self, formatter: Formatter) -> Serializer:
+        serializer = formatter.get_serializer(self.data, self.get_serialization_context())
+        serializer.handler.add_handler(object, self.handle_serialize_object)
+        serializer.handler.add_handler(LazyProxy, self.handle_serialize_lazy_proxy)
+        serializer.fragment_cache = self.fragment_cache
+        return serializer
+
+    def write_back(self, formatter: Formatter, background=False):
+        """
+        Atomically replaces the file on disk with the current data. In background mode the data is still serialized
+        on the calling thread so the worker only ever sees a consistent snapshot. The worker writes through
+        write_buffer, so the config knows the file it wrote is its own. A failed background write is raised by
+        wait_for_write_back
+        """
+        try:
+            self.wait_for_write_back()
+        except Exception:
+            pass  # Superseded by this write
+        if not background:
+            self.save(formatter=formatter, validate_path=False, atomic=True)
+            return
+        with self.data_lock:
+            buffer = formatter.dumps(self.data, serializer=self.get_serializer(formatter))
+        self.changes_made = False
+        path = self.file_path
+
+        def write_buffer():
+            try:
+                self.write_buffer(formatter, buffer, path, atomic=True)
+            except BaseException as e:
+                self.write_back_error = e
+                self.changes_made = True
+
+        self.write_back_thread = Thread(target=write_buffer, daemon=True)
+        self.write_back_thread.start()
+
+    def wait_for_write_back(self, timeout: float | None = None) -> bool:
+        """
+        Waits for a background write_back to finish and raises the error it failed with, once
+
+        :return: False if the timeout expired first
+        """
+        thread = self.write_back_thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                return False
+            self.write_back_thread = None
+        if (error := self.write_back_error) is not None:
+            self.write_back_error = None
+            raise error
+        return True
 
     @classmethod
     def check_in_serialization_context(cls, context: FormatterContext):
@@ -174,13 +628,41 @@ class ConfigFile(Serializable):
 
     def handle_serialize_object(self, serializer: Serializer, obj: IASettings, **kwargs):
         if obj in self.sub_configs:
-            link = self.sub_configs[obj]
-            link.config.save()
-            return serializer.handle_default(link)
+            return serializer.handle_default(self.sub_configs[obj])
         else:
             return serializer.handle_default(obj, **kwargs)
 
-    def load(self, path: Path = None, formatter: None | Formatter = None, validate_path=True, semantics: Semantics = None):
+    def handle_serialize_lazy_proxy(self, serializer: Serializer, obj: LazyProxy, **kwargs):
+        if (pending := self.pending_links.get(id(obj))) is not None and not is_materialized(obj):
+            return serializer.handle_default(pending[1])  # The linked config was never loaded so it has nothing to save
+        return serializer.serialize(materialize(obj), **kwargs)
+
+    def can_skip_load(self, path: Path, load_cache: LoadCache | None = None) -> bool:
+        """
+        True if the data object still holds what the file at path holds, along with every linked config
+
+        :param load_cache: Defaults to the load_cache of this config
+        """
+        if load_cache is None:
+            load_cache = self.load_cache
+        if load_cache is LoadCache.NEVER or path != self.file_path or self.changes_made or \
+                not isinstance(self.data, IASettings) or self.content_signature is None:
+            return False
+        signature = file_signature(str(path))
+        if load_cache is LoadCache.HASH:
+            if self.content_hash is None or \
+                    hash_buffer(self.formatter.read_buffer_from_file(str(path))) != self.content_hash:
+                return False
+            self.content_signature = signature
+        elif signature != self.content_signature:
+            return False
+        return all(config.can_skip_load(config.file_path, load_cache=load_cache) for config in self.get_linked_configs())
+
+    def load(self, path: Path = None, formatter: None | Formatter = None, validate_path=True,
+             semantics: Semantics = None) -> bool:
+        """
+        :return: False if the file was not parsed because the data object already holds it, see LoadCache
+        """
         if path is None:
             path = self.file_path
         if validate_path:
@@ -189,16 +671,197 @@ class ConfigFile(Serializable):
             formatter = self.formatter
         if formatter is None:
             raise ValueError('No formatter supplied')
-        context = self.get_deserialization_context()
+        if semantics is None and formatter is self.formatter and self.can_skip_load(path):
+            return False
+        data, converted, content = self.read_data(path, formatter, self.data, semantics=semantics)
+        self.data = data
+        if path == self.file_path:
+            self.content_hash, self.content_signature = content
+        self.changes_made = False
+        if self.pending_links:
+            if not self.lazy_links:
+                for future in self.prefetch_linked_configs(self.link_workers):
+                    future.result()
+            elif self.prefetch_links:
+                self.prefetch_linked_configs()
+        if converted:
+            self.converted_on_load(formatter, path)
+        return True
+
+    def read_data(self, path: Path, formatter: Formatter, expected: IASettings | Any | Type | None,
+                  semantics: Semantics = None) -> tuple[Any, bool, tuple[bytes, tuple | None]]:
+        """
+        Reads and deserializes the file at path without touching the data object. The linked configs it holds are
+        registered with this config
+
+        :param expected: The data object or type the file has to hold, see get_deserialization_context
+        :return: The data, whether it had to be converted, and the content hash and signature of the file
+        """
+        context = self.get_deserialization_context(expected)
         deserializer = self.formatter.get_deserializer(None, context)
         deserializer.secondary_handler.add_handler(LogFileLink, self.handle_deserialize_LogFileLink)
         if semantics is not None:
             context.semantic_context.semantics.update(semantics)
-        with EventCapturer(deserializer.notify_settings_converted) as capture:
-            self.data = formatter.read_from_file(str(path), deserializer=deserializer)
-        if len(capture) > 0:
-            self.backup_settings_file()
-        self.changes_made = False
+        self.pending_links = {}
+        signature = file_signature(str(path))  # Taken first so a change made while reading is not missed
+        buffer = formatter.read_buffer_from_file(str(path))
+        content_hash = hash_buffer(buffer)
+        snapshot_key = None
+        capture = ()
+        if self.snapshot_cache is not None and semantics is None:
+            snapshot_key = self.get_snapshot_key(formatter, content_hash, expected)
+            if (data := self.load_snapshot(snapshot_key, context, expected)) is not None:
+                snapshot_key = None
+            else:
+                ser_obj = formatter.buffer_to_obj(buffer, context)
+                class_strs = {class_str for version_info in iter_version_blocks(ser_obj, formatter.spec)
+                              for class_str in version_info}
+                with EventCapturer(deserializer.notify_settings_converted) as capture:
+                    data = formatter.deserialize(ser_obj, deserializer=deserializer)
+        else:
+            with EventCapturer(deserializer.notify_settings_converted) as capture:
+                data = formatter.loads(buffer, deserializer=deserializer)
+        if snapshot_key is not None and len(capture) == 0 and not self.pending_links and not self.sub_configs and \
+                data is not None:
+            self.snapshot_cache.store(snapshot_key, data, class_strs, context.load_type)
+        return data, len(capture) > 0, (content_hash, signature)
+
+    def converted_on_load(self, formatter: Formatter, path: Path):
+        """
+        Called once the data object was loaded from a file that had to be converted to the current version
+        """
+        self.backup_settings_file()
+        if self.write_back_converted is not ConversionWriteBack.NEVER and not self.read_only and \
+                path == self.file_path:
+            self.write_back(formatter, background=self.write_back_converted is ConversionWriteBack.BACKGROUND)
+
+    def reload(self, path: Path = None, formatter: None | Formatter = None, validate_path=True) -> bool:
+        """
+        Loads the file again and merges it into the data object (see merge_into) instead of replacing it, so the
+        objects in it keep their identity and subscribers and only the ones that changed are invalidated. Unsaved
+        changes are overwritten. Linked configs are not loaded, their data objects are left to their own ConfigFile.
+        Loads normally if the data object is not an IASettings.
+
+        :return: True if the data object changed
+        """
+        live = self.data
+        if not isinstance(live, IASettings):
+            self.load(path=path, formatter=formatter, validate_path=validate_path)
+            return True
+        if path is None:
+            path = self.file_path
+        if validate_path:
+            self.validate_file_path(path, must_exist=True)
+        if formatter is None:
+            formatter = self.formatter
+        links = self.sub_configs, self.sub_config_paths, self.pending_links
+        lazy = self.lazy_links, self.prefetch_links
+        self.lazy_links, self.prefetch_links = True, 0  # Links only get a proxy, which is skipped
+        self.sub_configs, self.sub_config_paths = {}, {}
+        try:
+            fresh, converted, content = self.read_data(path, formatter, type(live))
+            skip = {id(obj) for obj in links[0]}
+            skip.update(id(proxy) for proxy, _ in links[2].values())
+            skip.update(id(proxy) for proxy, _ in self.pending_links.values())
+        finally:
+            self.sub_configs, self.sub_config_paths, self.pending_links = links
+            self.lazy_links, self.prefetch_links = lazy
+        with self.data_lock:
+            self.merging = True  # Merging is not a change to save
+            try:
+                changed = merge_into(live, fresh, skip=skip)
+            finally:
+                self.merging = False
+            if path == self.file_path:
+                self.content_hash, self.content_signature = content
+            self.changes_made = False
+            live.clear_dirty(recursive=True)
+        if converted:
+            self.converted_on_load(formatter, path)
+        return changed
+
+    def get_snapshot_key(self, formatter: Formatter, content_hash: bytes,
+                         expected: IASettings | Any | Type | None) -> str:
+        expected = format_class_str(expected) if isinstance(expected, type) else ''
+        return self.snapshot_cache.get_key(content_hash, format_class_str(type(formatter)), expected)
+
+    def load_snapshot(self, key: str, context: FormatterContext, expected: IASettings | Any | Type | None):
+        """
+        The data object stored under key, None if there is no usable snapshot
+        """
+        data = self.snapshot_cache.load(key, context.load_type)
+        if data is None or (isinstance(expected, type) and not isinstance(data, expected)):
+            return None
+        return data
+
+    def load_path(self, key_path: str | list, path: Path = None, formatter: None | Formatter = None,
+                  validate_path=True, semantics: Semantics = None):
+        """
+        Deserializes only the section of the file at key_path and whatever it reaches through PreservedReferences.
+        The data attribute is left alone, unless an object above the section is outdated. In that case the whole file
+        has to be loaded and converted and the section is taken from the loaded data. References from the section to
+        an object that contains it can not be resolved without loading that object and raise
+        PreservedReferenceNotDissolvedError.
+
+        :param key_path: A list of keys or a path string like a.b.0 (see FormatterSpec.str_to_path)
+        """
+        if path is None:
+            path = self.file_path
+        if validate_path:
+            self.validate_file_path(path, must_exist=True)
+        if formatter is None:
+            formatter = self.formatter
+        if formatter is None:
+            raise ValueError('No formatter supplied')
+        if type(key_path) is str:
+            key_path = formatter.spec.str_to_path(key_path)
+        ser_obj = formatter.read_serialized_from_file(str(path))
+        if isinstance(self.data, type) and type(ser_obj) is dict:
+            class_string = ser_obj.get(formatter.spec.class_id)
+            if class_string is not None and class_string not in format_class_str(self.data):
+                raise SecurityException(f'{class_string} does not match correct class string '
+                                        f'{format_class_str(self.data)}')
+        context = formatter.get_deserialization_context()
+        deserializer = formatter.get_deserializer(None, context)
+        deserializer.secondary_handler.add_handler(LogFileLink, self.handle_deserialize_LogFileLink)
+        if semantics is not None:
+            context.semantic_context.semantics.update(semantics)
+        try:
+            return formatter.deserialize_path(ser_obj, key_path, deserializer=deserializer)
+        except ConversionError:
+            self.load(path=path, formatter=formatter, validate_path=False, semantics=semantics)
+            return self.get_part(self.data, key_path)
+
+    def prefetch_linked_configs(self, workers: int | None = None) -> list[Future]:
+        """
+        Loads the lazy linked configs that have not been accessed yet in a thread pool. Errors are raised when the
+        data object of the failed config is accessed
+
+        :param workers: Number of threads, defaults to prefetch_links
+        """
+        proxies = [proxy for proxy, link in self.pending_links.values()]
+        if not proxies:
+            return []
+        pool = ThreadPoolExecutor(max_workers=workers or self.prefetch_links or None,
+                                  thread_name_prefix='config_prefetch')
+        self.prefetch_futures = [pool.submit(materialize, proxy) for proxy in proxies]
+        pool.shutdown(wait=False)
+        return self.prefetch_futures
+
+    def wait_for_prefetch(self, timeout: float | None = None) -> bool:
+        done, not_done = wait(self.prefetch_futures, timeout=timeout)
+        if not not_done:
+            self.prefetch_futures = []
+        return not not_done
+
+    @staticmethod
+    def get_part(obj, key_path: list):
+        for key in key_path:
+            try:
+                obj = obj[key]
+            except (TypeError, KeyError, IndexError):
+                obj = getattr(obj, key)
+        return obj
 
     @classmethod
     def check_in_deserialization_context(cls, context: FormatterContext):
@@ -206,17 +869,22 @@ class ConfigFile(Serializable):
         handler.add_handler(ConfigFile, cls.handle_me)
         context.semantic_context.set_handler(handler, update_order=True)
 
-    def get_deserialization_context(self):
+    def get_deserialization_context(self, expected: IASettings | Any | Type | None = None):
+        """
+        :param expected: The data object or type to check the class of the root object against, defaults to data
+        """
         context = self.formatter.get_deserialization_context()
+        if expected is None:
+            expected = self.data
         found_init = False
         def descriptive_error(class_string: str):
-            if class_string in format_class_str(self.data):
+            if class_string in format_class_str(expected):
                 return True
             elif found_init:
-                if class_string in get_descendent_class_formats(self.data):  # TODO: This is not functional
+                if class_string in get_descendent_class_formats(expected):  # TODO: This is not functional
                     return True
-            raise SecurityException(f'{class_string} does not match correct class string {format_class_str(self.data)}')
-        if isinstance(self.data, type):
+            raise SecurityException(f'{class_string} does not match correct class string {format_class_str(expected)}')
+        if isinstance(expected, type):
             context.add_frame_semantics(ClassStringPassFunction(descriptive_error))
         return context
 
@@ -225,6 +893,14 @@ class ConfigFile(Serializable):
             obj.config.file_path = obj.file_path.absolute()
         else:
             obj.config.file_path = obj.rel_path.absolute()
+        if self.lazy_links or self.link_workers > 1:
+            obj.config.lazy_links = self.lazy_links
+            obj.config.prefetch_links = self.prefetch_links
+            obj.config.link_workers = self.link_workers
+            proxy = LinkedConfigLoader(self, obj, deserializer).create_proxy(obj)
+            with self.link_lock:
+                self.pending_links[id(proxy)] = (proxy, obj)
+            return proxy
         data_obj = obj.config.get_load_data_obj()
         self.add_log_file_link(obj)
         return data_obj
@@ -245,6 +921,8 @@ class ConfigFile(Serializable):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.auto_saver is not None:
+            self.auto_saver.close()
         if self.file_path is not None and not self.read_only:
             self.save()
 
@@ -256,7 +934,7 @@ class ConfigFile(Serializable):
     def to_dict(self, *args):
         return {
             'formatter_t': self.formatter.__class__,
-            'data_t': self.data.__class__
+            'data_t': self.data if isinstance(self.data, type) else self.data.__class__
         }
 
     def from_dict(self, state_obj: dict, *args):
@@ -38,12 +38,21 @@ def get_descendent_class_formats(t_obj: Type | object, end_point=None) -> set[Ty
 
 
 class ConversionManager:
-    __slots__ = 'converters', 'converted'
+    __slots__ = 'converters', 'converted', 'frozen', 'chains'
 
     def __init__(self):
         # mapping of version to tuple of conversion function and output version
         self.converters: dict[tuple[str, str], tuple[Callable, str]] = {}
         self.converted = EventHandler()
+        self.frozen = False
+        # mapping of (class string, version, target version) to a composed conversion function. Only used when frozen
+        self.chains: dict[tuple[str, str, str], Callable[[dict], dict]] = {}
+
+    def freeze(self):
+        """
+        Disallows adding converters so that converter chains can be composed once and cached
+        """
+        self.frozen = True
 
     @classmethod
     def get_version_info_from_class(cls, clt: Type):
@@ -70,29 +79,53 @@ class ConversionManager:
             return versioning_info
 
     def add_converter(self, target_ver, target_class: Type | str, conversion_func, out_ver):
+        if self.frozen:
+            raise ConversionError('Can not add converters to a frozen ConversionManager')
         if type(target_class) is not str:
             target_class = format_class_str(target_class)
         self.converters[(target_class, target_ver)] = (conversion_func, out_ver)
 
-    def try_convert(self, state_obj: dict, class_str: str, ver: str, target_ver: str):
+    def get_converter_chain(self, class_str: str, ver: str, target_ver: str) -> Callable[[dict], dict]:
+        """
+        Composes the converters that take a state object of class_str from ver to target_ver into one function
+        """
+        key = (class_str, ver, target_ver)
+        if key in self.chains:
+            return self.chains[key]
+        steps = []
         search_key = (class_str, ver)
         while (ver != target_ver) and (search_key in self.converters):
-            try:
-                convert_func, out_version = self.converters[search_key]
-            except KeyError:
-                raise ConversionError('Settings version info object is not understood')
-            if (new_object := convert_func(state_obj)) is not None:
-                state_obj = new_object
-                self.converted.emit(state_obj, class_str, ver, target_ver=out_version)
+            if len(steps) > len(self.converters):
+                raise ConversionError(f'Converters for {class_str} loop without reaching version {target_ver}')
+            convert_func, out_version = self.converters[search_key]
+            steps.append((convert_func, ver, out_version))
             ver = out_version
             search_key = (class_str, ver)
-        return state_obj
+        steps = tuple(steps)
+        converted = self.converted
+
+        def converter_chain(state_obj: dict) -> dict:
+            for step_func, step_ver, step_out_ver in steps:
+                if (new_object := step_func(state_obj)) is not None:
+                    state_obj = new_object
+                    converted.emit(state_obj, class_str, step_ver, target_ver=step_out_ver)
+            return state_obj
+        if self.frozen:
+            self.chains[key] = converter_chain
+        return converter_chain
+
+    def try_convert(self, state_obj: dict, class_str: str, ver: str, target_ver: str):
+        return self.get_converter_chain(class_str, ver, target_ver)(state_obj)
 
     def update_to_current(self, json_obj, load_type: Callable[[str], Type], version_info) -> dict:
         if version_info is None:
             return json_obj
+        copied = False
         for class_str, version in version_info.items():
             this_class = load_type(class_str)
             if not version == (target_ver := self.get_version_info_from_class(this_class)):
-                json_obj = self.try_convert(json_obj.copy(), class_str, version, target_ver)
+                if not copied:  # The caller detects conversions by identity
+                    json_obj = json_obj.copy()
+                    copied = True
+                json_obj = self.try_convert(json_obj, class_str, version, target_ver)
         return json_obj
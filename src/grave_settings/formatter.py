@@ -5,6 +5,7 @@
 @author: ☙ Ryan McConnell ❧
 """
 from abc import ABC, abstractmethod
+from copy import copy
 from io import IOBase
 from weakref import WeakSet
 
@@ -14,11 +15,20 @@ from grave_settings.framestack_context import FrameStackContext
 from grave_settings.default_handlers import DeSerializationHandler, SerializationHandler
 from grave_settings.handlers import OrderedHandler, OrderedMethodHandler
 from grave_settings.helper_objects import PreservedReferenceNotDissolvedError, KeySerializableDict
+from grave_settings.abstract import Serializable, IASettings
+from grave_settings.conversion_manager import get_object_versioning_endpoint, ConversionManager, ConversionError
+from grave_settings.lazy import LazyProxy, DeSerializationSession, DeferredObject
+from grave_settings.fragment_cache import FragmentCache, Fragment
+from grave_settings.raw_document import RawDocument
+from grave_settings.utilities import generate_type_hierarchy_to_base, atomic_write
 from grave_settings.formatter_settings import FormatterSpec, Temporary, FormatterContext, PreservedReference, NoRef, \
     AddSemantics
 from grave_settings.semantics import *
 
 
+DEFAULT_FINALIZE_METHODS = (Serializable.finalize, IASettings.finalize)
+
+
 class ProcessingException(Exception):
     def __init__(self, processor, obj=None, wrapped_exception: Exception = None, key_stack=None,
                  frame_semantics: Semantics = None, semantics: Semantics = None):
@@ -65,6 +75,31 @@ class Processor:
         self.attribute = spec.get_attribute_types()
         self.set_default_semantics()
 
+    @classmethod
+    def build_handler_tables(cls) -> dict[str, OrderedMethodHandler]:
+        return {}
+
+    @classmethod
+    def get_handler_tables(cls) -> dict[str, OrderedMethodHandler]:
+        """
+        The handler tables are built once per class because adding handlers by type hints inspects the signature of
+        every handler method. Instances should work on copies so that they can be customized.
+        """
+        tables = cls.__dict__.get('_handler_tables')
+        if tables is None:
+            tables = cls.build_handler_tables()
+            cls._handler_tables = tables
+        return tables
+
+    def reset(self, root_obj, context: FormatterContext):
+        """
+        Prepares a disposed processor to run again. The spec and handler tables (including any customization) are kept
+        """
+        self._root_obj = root_obj
+        self.context = context
+        self.semantics = self.context.semantic_context
+        self.set_default_semantics()
+
     @property
     def root_obj(self):
         return self._root_obj
@@ -110,16 +145,18 @@ class IFormatter(ABC):
             buffer = buffer.encode(encoding)
         _io.write(buffer)
 
-    def write_to_file(self, data, path: str, encoding='utf-8', serializer: Processor = None):
-        if encoding == 'utf-8':
-            fm = 'w'
-        else:
-            fm = 'wb'
+    def write_to_file(self, data, path: str, encoding='utf-8', serializer: Processor = None, atomic=False):
         buffer = self.dumps(data, serializer=serializer)
+        self.write_buffer_to_file(buffer, path, encoding=encoding, atomic=atomic)
+
+    def write_buffer_to_file(self, buffer: str | bytes, path: str, encoding='utf-8', atomic=False):
         if encoding is not None and encoding != 'utf-8':
             buffer = buffer.encode(encoding)
-        with open(path, fm) as f:  # We don't want to overwrite the file is there was an exception
-            f.write(buffer)
+        if atomic:
+            atomic_write(path, buffer)
+        else:
+            with open(path, 'w' if isinstance(buffer, str) else 'wb') as f:  # We don't want to overwrite the file is there was an exception
+                f.write(buffer)
 
     def from_buffer(self, _io: IOBase, encoding='utf-8', kwargs: dict | None = None, deserializer: Processor = None):
         data = _io.read()
@@ -136,6 +173,30 @@ class IFormatter(ABC):
             # noinspection PyTypeChecker
             return self.from_buffer(f, encoding=encoding, kwargs=kwargs, deserializer=deserializer)
 
+    def read_buffer_from_file(self, path: str, encoding='utf-8') -> str | bytes:
+        """
+        The contents of a file in the form loads and buffer_to_obj take
+        """
+        if encoding == 'utf-8':
+            f = open(path, 'r')
+        else:
+            f = open(path, 'rb')
+        with f:
+            data = f.read()
+        if encoding is not None and encoding != 'utf-8':
+            data = data.decode(encoding)
+        return data
+
+    def read_serialized_from_file(self, path: str, encoding='utf-8'):
+        """
+        Parses a file into its serialized form without deserializing it
+        """
+        return self.buffer_to_obj(self.read_buffer_from_file(path, encoding=encoding), self.get_deserialization_context())
+
+    def write_serialized_to_file(self, ser_obj, path: str, encoding='utf-8', atomic=False):
+        buffer = self.serialized_obj_to_buffer(ser_obj, self.get_serialization_context())
+        self.write_buffer_to_file(buffer, path, encoding=encoding, atomic=atomic)
+
     @abstractmethod
     def serialized_obj_to_buffer(self, ser_obj, context: FormatterContext) -> str | bytes:
         pass
@@ -162,17 +223,54 @@ class IFormatter(ABC):
     def get_deserialization_context(self) -> FormatterContext:
         return FormatterContext(self.get_deserialization_frame_context())
 
-    def dumps(self, obj: Any, kwargs: dict | None = None, serializer: Processor = None) -> str | bytes:
+    def dumps(self, obj: Any, kwargs: dict | None = None, serializer: Processor = None,
+              include: Iterable[str | list] | None = None, exclude: Iterable[str | list] | None = None) -> str | bytes:
+        """
+        :param include: Only serialize these key paths, see IncludeKeyPath
+        :param exclude: Do not serialize these key paths, see ExcludeKeyPath
+        """
         if serializer is None:
-            serializer = self.get_serializer(obj, self.get_serialization_context())
+            serializer = self.acquire_serializer(obj)
+            ret = self.dumps(obj, kwargs=kwargs, serializer=serializer, include=include, exclude=exclude)
+            self.release_processor(serializer)
+            return ret
+        if include is not None:
+            serializer.semantics.add_semantics(*(IncludeKeyPath(x if type(x) is str else tuple(x)) for x in include))
+        if exclude is not None:
+            serializer.semantics.add_semantics(*(ExcludeKeyPath(x if type(x) is str else tuple(x)) for x in exclude))
         return self.serialized_obj_to_buffer(self.serialize(obj, kwargs=kwargs, serializer=serializer), serializer.context)
 
     def loads(self, buffer, kwargs: dict | None = None, deserializer: Processor = None):
         if deserializer is None:
-            deserializer = self.get_deserializer(None, self.get_deserialization_context())
+            deserializer = self.acquire_deserializer(None)
+            ret = self.loads(buffer, kwargs=kwargs, deserializer=deserializer)
+            self.release_processor(deserializer)
+            return ret
         obj = self.buffer_to_obj(buffer, deserializer.context)
         return self.deserialize(obj, kwargs=kwargs, deserializer=deserializer)
 
+    def deserialize_path(self, obj, key_path: str | list, kwargs: dict | None = None, deserializer: Processor = None):
+        """
+        Deserializes the part of the serialized object obj at key_path, see DeSerializer.process_path
+        """
+        if deserializer is None:
+            deserializer = self.acquire_deserializer(obj)
+            ret = self.deserialize_path(obj, key_path, kwargs=kwargs, deserializer=deserializer)
+            self.release_processor(deserializer)
+            return ret
+        else:
+            deserializer.root_obj = obj
+        if type(key_path) is str:
+            key_path = deserializer.spec.str_to_path(key_path)
+        with deserializer:
+            if kwargs:
+                ret = deserializer.process_path(key_path, **kwargs)
+            else:
+                ret = deserializer.process_path(key_path)
+            if ret is not obj:
+                self.free_deser_obj(obj)  # drops the sections that were left in the tree after jumping to them
+            return ret
+
     @abstractmethod
     def get_serializer(self, root_obj, context: FormatterContext) -> Processor:
         pass
@@ -181,9 +279,24 @@ class IFormatter(ABC):
     def get_deserializer(self, root_obj, context: FormatterContext) -> Processor:
         pass
 
+    def acquire_serializer(self, root_obj) -> Processor:
+        return self.get_serializer(root_obj, self.get_serialization_context())
+
+    def acquire_deserializer(self, root_obj) -> Processor:
+        return self.get_deserializer(root_obj, self.get_deserialization_context())
+
+    def release_processor(self, processor: Processor):
+        """
+        Called with processors obtained from acquire_serializer or acquire_deserializer once they have been disposed
+        """
+        pass
+
     def serialize(self, obj, kwargs: dict | None = None, serializer: Processor = None):
         if serializer is None:
-            serializer = self.get_serializer(obj, self.get_serialization_context())
+            serializer = self.acquire_serializer(obj)
+            ret = self.serialize(obj, kwargs=kwargs, serializer=serializer)
+            self.release_processor(serializer)
+            return ret
         with serializer:
             if kwargs:
                 return serializer.process(**kwargs)
@@ -195,7 +308,10 @@ class IFormatter(ABC):
 
     def deserialize(self, obj, kwargs: dict | None = None, deserializer: Processor = None):
         if deserializer is None:
-            deserializer = self.get_deserializer(obj, self.get_deserialization_context())
+            deserializer = self.acquire_deserializer(obj)
+            ret = self.deserialize(obj, kwargs=kwargs, deserializer=deserializer)
+            self.release_processor(deserializer)
+            return ret
         else:
             deserializer.root_obj = obj
         with deserializer:
@@ -203,7 +319,8 @@ class IFormatter(ABC):
                 ret = deserializer.process(**kwargs)
             else:
                 ret = deserializer.process()
-            self.free_deser_obj(obj)
+            if ret is not obj:  # plain containers are deserialized in place
+                self.free_deser_obj(obj)
             return ret
 
 
@@ -212,16 +329,40 @@ class Serializer(Processor):
         super().__init__(root_object, spec, context)
         self.root_object = root_object
         self.id_lifecycle_objects = []
-
-        self.handler = OrderedMethodHandler()
+        self.version_header: dict | None = None
+        self.version_header_members: dict[int, dict] = {}
+        self.version_omitted: list[tuple[dict, dict]] = []
+        self.projection: tuple[dict | bool, dict | None] | None = None
+        self.handler = self.get_handler_tables()['handler'].copy()
+        self.fragment_cache: FragmentCache | None = None
+        self.fragments: FragmentCache | None = None  # fragment_cache if it can be used for the current run
+        self.fragment_ids: list[tuple[int, str, object]] = []
+        self.fragment_refs: list[tuple[int, str, object]] = []
+        self.fragment_stack: list[Fragment] = []
+
+    @classmethod
+    def build_handler_tables(cls) -> dict[str, OrderedMethodHandler]:
+        handler = OrderedMethodHandler()
         # noinspection PyTypeChecker
-        self.handler.add_handlers_by_type_hints(
-            self.handle_default,
-            self.handle_add_semantics,
-            self.handle_temporary,
-            self.handle_user_list,
-            self.handle_user_dict
+        handler.add_handlers_by_type_hints(
+            cls.handle_default,
+            cls.handle_add_semantics,
+            cls.handle_temporary,
+            cls.handle_user_list,
+            cls.handle_user_dict,
+            cls.handle_lazy_proxy
         )
+        return {'handler': handler}
+
+    def reset(self, root_obj, context: FormatterContext):
+        super().reset(root_obj, context)
+        self.root_object = root_obj
+        self.id_lifecycle_objects = []
+        self.version_header = None
+        self.version_header_members = {}
+        self.version_omitted = []
+        self.projection = None
+        self.fragment_cache = None
 
     def set_default_semantics(self):
         self.semantics.add_semantics(AutoKeySerializableDictType(KeySerializableDict),
@@ -236,6 +377,9 @@ class Serializer(Processor):
             AutoPreserveReferences,
             PreserveSerializableKeyOrdering,
             SerializeNoneVersionInfo,
+            HoistVersionInfo,
+            IncludeKeyPath,
+            ExcludeKeyPath,
             EnforceReferenceLifecycle,
             KeySemanticsTemplate,
             OverrideClassString,
@@ -250,34 +394,101 @@ class Serializer(Processor):
         if object_id in id_cache:
             auto_preserve_references = self.semantics[AutoPreserveReferences]
             if auto_preserve_references:
+                if self.fragments is not None:
+                    self.fragment_refs.append((object_id, id_cache[object_id], obj))
                 return PreservedReference(obj=obj, ref=id_cache[object_id])
             else:
                 return obj
         else:
-            id_cache[object_id] = self.path_to_str()
+            id_cache[object_id] = path = self.path_to_str()
             if self.semantics[EnforceReferenceLifecycle]:
                 self.id_lifecycle_objects.append(obj)
+            if self.fragments is not None:
+                self.fragment_ids.append((object_id, path, obj))
             return obj
 
+    def build_path_trie(self, semantics: Iterable[Semantic[str | tuple]]) -> dict | bool:
+        """
+        Nested dictionaries of keys built from the key paths in semantics. True marks a path that is covered entirely
+        """
+        trie = {}
+        for semantic in semantics:
+            path = semantic.val
+            if type(path) is str:
+                path = self.spec.str_to_path(path)
+            if not path:
+                return True
+            node = trie
+            for key in path[:-1]:
+                if (node := node.setdefault(key, {})) is True:
+                    break
+            else:
+                node[path[-1]] = True
+        return trie
+
+    def build_projection(self) -> tuple[dict | bool, dict | None] | None:
+        include = self.semantics[IncludeKeyPath]
+        exclude = self.semantics[ExcludeKeyPath]
+        if not (include or exclude):
+            return None
+        if exclude and any(not (x.val if type(x.val) is not str else self.spec.str_to_path(x.val)) for x in exclude):
+            raise ValueError('The root object can not be excluded')
+        return self.build_path_trie(include) if include else True, self.build_path_trie(exclude) if exclude else None
+
+    @staticmethod
+    def project(projection: tuple[dict | bool, dict | None], key) -> tuple[dict | bool, dict | None] | None | bool:
+        """
+        The part of projection below key
+
+        :return: False if key is outside the projection, None if everything below key is included
+        """
+        include, exclude = projection
+        if exclude is not None:
+            if (exclude := exclude.get(key)) is True:
+                return False
+        if include is not True:
+            if (include := include.get(key)) is None:
+                return False
+        if include is True and exclude is None:
+            return None
+        return include, exclude
+
     def handle_serialize_list_in_place(self, instance: list, **kwargs):
+        projection = self.projection
         for i in range(len(instance)):
+            if projection is not None:
+                if (child_projection := self.project(projection, i)) is False:
+                    instance[i] = None
+                    continue
+                self.projection = child_projection
             with self.context(i), self.semantics:
                 instance[i] = self.serialize(instance[i], **kwargs)
+        self.projection = projection
         return instance
 
     def handle_serialize_dict_in_place(self, instance: dict, **kwargs):
         auto_key_serializable_dict = self.semantics[AutoKeySerializableDictType]
         if auto_key_serializable_dict and any(x.__class__ not in self.attribute for x in instance.keys()):
             ksd = auto_key_serializable_dict.val(instance)
+            projection = self.projection
+            self.projection = None  # Key paths can not address the keys of wrapped dictionaries
             with self.semantics:
                 self.context.add_frame_semantics(AutoPreserveReferences(False))
-                return self.serialize(ksd, **kwargs)
+                ret = self.serialize(ksd, **kwargs)
+            self.projection = projection
+            return ret
         else:
             auto_key_semantics = self.semantics[KeySemanticsTemplate]
             rems = []
             if not auto_key_semantics:
                 auto_key_semantics = False
+            projection = self.projection
             for k, v in instance.items():
+                if projection is not None:
+                    if (child_projection := self.project(projection, k)) is False:
+                        rems.append(k)
+                        continue
+                    self.projection = child_projection
                 with self.context(k), self.semantics:
                     if auto_key_semantics:
                         if k in auto_key_semantics.val:
@@ -286,6 +497,7 @@ class Serializer(Processor):
                         instance[k] = self.serialize(v, **kwargs)
                     except OmitMeError:
                         rems.append(k)
+            self.projection = projection
             for rem in rems:
                 instance.pop(rem)
             return instance
@@ -306,6 +518,9 @@ class Serializer(Processor):
         else:
             return self.handle_serialize_dict_in_place(instance.copy(), **kwargs)
 
+    def handle_lazy_proxy(self, instance: LazyProxy, **kwargs):
+        return self.serialize(instance._lazy_materialize(), **kwargs)
+
     def handle_add_semantics(self, instance: AddSemantics, **kwargs):
         tv = instance.val
         if instance.semantics:
@@ -336,23 +551,107 @@ class Serializer(Processor):
         return template_dict
 
     def handle_default(self, instance: object, **kwargs):
+        if self.fragments is not None and isinstance(instance, IASettings) and id(instance) not in self.context.id_cache:
+            return self.handle_fragment(instance, **kwargs)
+        return self.serialize_object(instance, **kwargs)
+
+    def handle_fragment(self, instance: IASettings, **kwargs):
+        """
+        Splices in the cached fragment of instance if it is still valid, otherwise serializes instance and caches it
+        """
+        fragments = self.fragments
+        stack = self.fragment_stack
+        container = stack[-1] if stack else None
+        path = self.path_to_str()
+        if (fragment := fragments.get(instance, path, self.context.id_cache, container)) is not None:
+            self.splice_fragment(fragment)
+            return fragment.ser_obj
+        id_start = len(self.fragment_ids)
+        ref_start = len(self.fragment_refs)
+        fragment = fragments.begin(instance, path, list(self.context.key_path), container)
+        stack.append(fragment)
+        try:
+            ser_obj = self.serialize_object(instance, **kwargs)
+        except BaseException:
+            fragments.drop(fragment)
+            raise
+        finally:
+            stack.pop()
+        fragments.store(fragment, ser_obj, self.fragment_ids[id_start:], self.fragment_refs[ref_start:],
+                        self.context.id_cache)
+        return ser_obj
+
+    def splice_fragment(self, fragment: Fragment):
+        id_cache = self.context.id_cache
+        for object_id, path, obj in fragment.ids:
+            id_cache[object_id] = path
+        if self.semantics[EnforceReferenceLifecycle]:
+            self.id_lifecycle_objects.extend(obj for _, _, obj in fragment.ids)
+        self.fragment_ids.extend(fragment.ids)
+        self.fragment_refs.extend(fragment.refs)
+
+    def serialize_object(self, instance: object, **kwargs):
         ducks = self.it_quack(instance.__class__)
         if ducks and hasattr(instance, 'check_in_serialization_context'):
             instance.check_in_serialization_context(self.context)
         instance = self.check_in_object(instance)
-        ro = {self.spec.class_id: None}  # keeps placement
-        if ducks and hasattr(instance, 'get_version_object'):
-            version_info = instance.get_version_object()
-            if self.semantics[SerializeNoneVersionInfo] or version_info is not None:
-                with self.semantics:
-                    self.context.add_semantics(AutoPreserveReferences(False))
-                    ro[self.spec.version_id] = self.serialize(version_info)
-        return self.template_object_serialize(ro, instance, **kwargs)
+        projection = self.projection
+        if projection is not None and type(instance) is PreservedReference:
+            self.projection = None  # A reference is written whole, even if a key path continues into it
+        try:
+            ro = {self.spec.class_id: None}  # keeps placement
+            if ducks and hasattr(instance, 'get_version_object'):
+                version_info = instance.get_version_object()
+                if version_info is not None and self.version_header is not None and \
+                        self.add_to_version_header(version_info):
+                    self.version_omitted.append((ro, version_info))
+                elif self.semantics[SerializeNoneVersionInfo] or version_info is not None:
+                    object_projection = self.projection
+                    self.projection = None
+                    with self.semantics:
+                        self.context.add_semantics(AutoPreserveReferences(False))
+                        ro[self.spec.version_id] = self.serialize(version_info)
+                    self.projection = object_projection
+            return self.template_object_serialize(ro, instance, **kwargs)
+        finally:
+            self.projection = projection
+
+    def add_to_version_header(self, version_info: dict) -> bool:
+        """
+        Merges version_info into the version header
+
+        :return: False if version_info conflicts with the header and has to be written on the object
+        """
+        if id(version_info) in self.version_header_members:
+            return True
+        header = self.version_header
+        for class_str, version in version_info.items():
+            if class_str in header and header[class_str] != version:
+                return False
+        header.update(version_info)
+        self.version_header_members[id(version_info)] = version_info  # keep the id alive
+        return True
 
     def process(self, obj=None, **kwargs):
         if obj is None:
             obj = self.root_obj
-        return self.serialize(obj, **kwargs)
+        if self.semantics[HoistVersionInfo]:
+            self.version_header = {}
+        self.projection = self.build_projection()
+        fragments = self.fragment_cache
+        if fragments is not None and not (kwargs or self.projection is not None or self.version_header is not None):
+            fragments.start()
+            self.fragments = fragments
+        ret = self.serialize(obj, **kwargs)
+        if self.fragments is not None:
+            fragments.finish()
+        if self.version_header:
+            if type(ret) is dict:
+                ret[self.spec.version_header_id] = self.version_header
+            else:
+                for ro, version_info in self.version_omitted:
+                    ro[self.spec.version_id] = version_info.copy()
+        return ret
 
     def serialize(self, obj: Any, **kwargs):
         try:
@@ -374,6 +673,14 @@ class Serializer(Processor):
     def dispose(self):
         super().dispose()
         self.id_lifecycle_objects = []
+        self.version_header = None
+        self.version_header_members = {}
+        self.version_omitted = []
+        self.projection = None
+        self.fragments = None
+        self.fragment_ids = []
+        self.fragment_refs = []
+        self.fragment_stack = []
 
 
 class DeSerializer(Processor):
@@ -381,20 +688,52 @@ class DeSerializer(Processor):
         super().__init__(root_object, spec, context)
         self.root_object = root_object
         self.preserved_refs = WeakSet()
-
-        self.handler = OrderedMethodHandler()
+        self.parsed_paths: dict[str, list] = {}
+        self.class_semantics: dict[str, Semantics] = {}
+        self.reference_index: dict[str, tuple] | None = None
+        self.reference_slots: list[tuple[object, Any, PreservedReference]] = []
+        self.finalize_callbacks: list[tuple[object, str]] = []
+        self.deferred_refs: set[int] = set()
+        self.version_header: dict | None = None
+        self.header_version_infos: dict[Type, dict | None] = {}
+        self.lazy_session: DeSerializationSession | None = None
+        self.lazy_exempt: dict | None = None
+        self.lazy_types: dict[str, bool] = {}
+        tables = self.get_handler_tables()
+        self.handler = tables['handler'].copy()
+        self.secondary_handler = tables['secondary_handler'].copy()
+
+    @classmethod
+    def build_handler_tables(cls) -> dict[str, OrderedMethodHandler]:
+        handler = OrderedMethodHandler()
         # noinspection PyTypeChecker
-        self.handler.add_handlers_by_type_hints(
-            self.handle_list,
-            self.handle_dict,
-            self.handle_preserved_referece
+        handler.add_handlers_by_type_hints(
+            cls.handle_list,
+            cls.handle_dict,
+            cls.handle_preserved_referece
         )
-        self.secondary_handler = OrderedMethodHandler()
+        secondary_handler = OrderedMethodHandler()
         # noinspection PyTypeChecker
-        self.secondary_handler.add_handlers_by_type_hints(
-            self.cache_instance_ref,
-            self.handle_secondary_preserved_reference
+        secondary_handler.add_handlers_by_type_hints(
+            cls.cache_instance_ref,
+            cls.handle_secondary_preserved_reference
         )
+        return {
+            'handler': handler,
+            'secondary_handler': secondary_handler
+        }
+
+    def reset(self, root_obj, context: FormatterContext):
+        super().reset(root_obj, context)
+        self.root_object = root_obj
+        self.preserved_refs = WeakSet()
+        self.parsed_paths = {}
+        self.class_semantics = {}
+        self.reference_index = None
+        self.version_header = None
+        self.header_version_infos = {}
+        self.lazy_session = None
+        self.lazy_exempt = None
 
     def set_default_semantics(self):
         self.semantics.add_semantics(DetonateDanglingPreservedReferences(True),
@@ -404,6 +743,7 @@ class DeSerializer(Processor):
         return semantic_class in {
             DetonateDanglingPreservedReferences,
             ResolvePreservedReferences,
+            LazyDeserialization,
             NotifyFinalizedMethodName,
             DoNotAllowImportingModules,
             ClassStringPassFunction,
@@ -412,26 +752,183 @@ class DeSerializer(Processor):
             IgnoreDuckTypingForSubclasses
         }
 
-    def run_semantics_through_path(self, key_path: list) -> Semantics:
-        start = self.root_object
-        save_semantic_contex = self.context.semantic_context
-        self.context.key_path.clear()
+    def get_path(self, reference: str) -> list:
+        """
+        Memoized version of :py:meth:`~grave_settings.formatter_settings.FormatterSpec.str_to_path`. The returned list is
+        shared and should not be mutated
+        """
+        try:
+            return self.parsed_paths[reference]
+        except KeyError:
+            path = self.spec.str_to_path(reference)
+            self.parsed_paths[reference] = path
+            return path
+
+    def get_class_semantics(self, class_str: str) -> Semantics:
+        """
+        The semantics a class adds to its descendants through check_in_deserialization_context. Frame semantics are
+        discarded since they do not propagate to the children of the object
+        """
+        try:
+            return self.class_semantics[class_str]
+        except KeyError:
+            pass
         semantics = Semantics()
-        self.context.semantic_context = semantics
+        _class = self.context.load_type(class_str)
+        if self.it_quack(_class) and hasattr(_class, 'check_in_deserialization_context'):
+            save_semantic_context = self.context.semantic_context
+            frame = FrameStackContext(None, semantics)
+            self.context.semantic_context = frame
+            try:
+                _class.check_in_deserialization_context(self.context)
+            finally:
+                self.context.semantic_context = save_semantic_context
+            semantics = Semantics(semantics=frame.semantics)
+        self.class_semantics[class_str] = semantics
+        return semantics
+
+    def scan_references(self, obj) -> set[str]:
+        ref_class_str = format_class_str(PreservedReference)
+        class_id = self.spec.class_id
+        refs = set()
+        stack = [obj]
+        while stack:
+            node = stack.pop()
+            if type(node) is dict:
+                if node.get(class_id) == ref_class_str:
+                    refs.add(node['ref'])
+                else:
+                    stack.extend(v for v in node.values() if type(v) in self.special)
+            else:
+                stack.extend(v for v in node if type(v) in self.special)
+        return refs
+
+    def index_references(self):
+        """
+        Builds a table of reference string -> (section parent, section key, ancestors) for every reference in the raw
+        tree so jumping to a forward reference does not have to walk the tree again. Ancestors are the raw objects along
+        the path that carry a class string.
+        """
+        class_id = self.spec.class_id
+        index = {}
+        prefixes = {(): (self.root_obj, ())}
+        for ref in self.scan_references(self.root_obj):
+            path = self.get_path(ref)
+            if not path:
+                continue
+            node, ancestors = self.root_obj, ()
+            try:
+                for i in range(len(path) - 1):
+                    prefix = tuple(path[:i + 1])
+                    if prefix in prefixes:
+                        node, ancestors = prefixes[prefix]
+                    else:
+                        if type(node) is dict and class_id in node:
+                            ancestors = ancestors + (node,)
+                        node = node[path[i]]
+                        prefixes[prefix] = (node, ancestors)
+                if type(node) is dict and class_id in node:
+                    ancestors = ancestors + (node,)
+                node[path[-1]]
+            except (KeyError, IndexError, TypeError):
+                continue
+            index[ref] = (node, path[-1], ancestors)
+        self.reference_index = index
+
+    def get_path_semantics(self, ancestors: Iterable[dict]) -> Semantics:
+        semantics = Semantics()
+        class_id = self.spec.class_id
+        for ancestor in ancestors:
+            # Ancestors that have already been visited have their class string removed and their semantics are already
+            # on the stack
+            if (class_str := ancestor.get(class_id)) is not None:
+                semantics.update(self.get_class_semantics(class_str))
+        return semantics
+
+    def get_path_ancestors(self, key_path: list) -> list[dict]:
+        """
+        The raw objects that carry a class string along key_path, not including the object at key_path
+        """
+        start = self.root_obj
+        ancestors = []
         for key in key_path:
             if type(start) == dict and self.spec.class_id in start:
-                _class = self.context.load_type(start[self.spec.class_id])  # NOTE: This is why we use check for semantics
-                if self.it_quack(_class) and hasattr(_class, 'check_in_deserialization_context'):
-                    _class.check_in_deserialization_context(self.context)
+                ancestors.append(start)
             start = start[key]
-        self.context.semantic_context = save_semantic_contex
-        return semantics
+        return ancestors
+
+    def run_semantics_through_path(self, key_path: list) -> Semantics:
+        return self.get_path_semantics(self.get_path_ancestors(key_path))
+
+    def resolve_path(self, key_path: list) -> list:
+        """
+        Rewrites key_path so that it does not pass through any PreservedReference in the raw tree
+        """
+        ref_class_str = format_class_str(PreservedReference)
+        class_id = self.spec.class_id
+        node = self.root_obj
+        resolved = []
+        for key in key_path:
+            while type(node) is dict and node.get(class_id) == ref_class_str:
+                resolved = list(self.get_path(node['ref']))
+                node = self.spec.get_part_from_path(self.root_obj, resolved)
+            node = node[key]
+            resolved.append(key)
+        return resolved
+
+    def check_path_versions(self, ancestors: Iterable[dict]):
+        """
+        Raises ConversionError if one of the ancestors would have been converted. Converters work on the state of the
+        whole object so a section under an outdated object can not be deserialized on its own
+        """
+        class_id = self.spec.class_id
+        for ancestor in ancestors:
+            type_obj = self.context.load_type(ancestor[class_id])
+            if not (self.it_quack(type_obj) and hasattr(type_obj, 'check_convert_update')):
+                continue
+            if self.spec.version_id in ancestor:
+                version_info = ancestor[self.spec.version_id]
+            elif self.version_header is not None:
+                version_info = self.get_header_version_info(type_obj)
+            else:
+                continue
+            if version_info is not None and version_info != ConversionManager.get_version_object(type_obj):
+                raise ConversionError(f'{ancestor[class_id]} is stored with an old version: {version_info}')
+
+    def process_path(self, key_path: list, **kwargs):
+        """
+        Deserializes only the section of the root object at key_path and the sections it reaches through
+        PreservedReferences. Semantics that the ancestors of the section would have added are replayed first.
+
+        :raises ConversionError: If an ancestor of the section is outdated
+        """
+        root = self.root_obj
+        if type(root) is dict and self.spec.version_header_id in root:
+            self.version_header = root.pop(self.spec.version_header_id)
+        if not key_path:
+            return self.deserialize(root, **kwargs)
+        key_path = self.resolve_path(key_path)
+        ancestors = self.get_path_ancestors(key_path)
+        self.check_path_versions(ancestors)
+        if self.reference_index is None:
+            self.reference_index = {}  # Indexing scans the whole document, references are looked up one at a time
+        section = self.spec.get_part_from_path(root, key_path)
+        self.lazy_exempt = section
+        self.context.key_path = list(key_path[:-1])
+        with self.context(key_path[-1]), self.semantics:
+            self.semantics.update(self.get_path_semantics(ancestors))
+            return self.deserialize(section, **kwargs)
 
     def handle_list(self, instance: list, **kwargs):
         for i in range(len(instance)):
             cv = instance[i]
-            with self.context(i), self.semantics:
-                instance[i] = cv if type(cv) in self.primitives else self.deserialize(cv, **kwargs)
+            if type(cv) not in self.primitives:
+                with self.context(i), self.semantics:
+                    instance[i] = cv = self.deserialize(cv, **kwargs)
+                if type(cv) is PreservedReference and id(cv) in self.deferred_refs:
+                    self.reference_slots.append((instance, i, cv))
+                elif type(cv) is LazyProxy:
+                    cv._lazy_add_slot(instance, i)
         return instance
 
     def handle_dict(self, instance: dict, **kwargs):
@@ -440,6 +937,8 @@ class DeSerializer(Processor):
         class_id = None
         type_obj = None
         if self.spec.class_id in instance:
+            if self.semantics[LazyDeserialization] and self.is_lazy_candidate(instance):
+                return self.create_lazy_proxy(instance)
             class_id = instance.pop(self.spec.class_id)
             type_obj = self.context.load_type(class_id)
             ducks = self.it_quack(type_obj)
@@ -450,13 +949,23 @@ class DeSerializer(Processor):
                 version_obj = instance.pop(self.spec.version_id)
                 with self.semantics:
                     version_info = self.deserialize(version_obj)
+            elif self.version_header is not None and ducks:
+                version_info = self.get_header_version_info(type_obj)
 
+        unresolved = None
+        proxied = None
         for k, v in instance.items():
-            if type(v) in self.primitives:
-                instance[k] = v
-            else:
+            if type(v) not in self.primitives:
                 with self.context(k), self.semantics:
-                    instance[k] = self.deserialize(v, **kwargs)
+                    instance[k] = v = self.deserialize(v, **kwargs)
+                if type(v) is PreservedReference and id(v) in self.deferred_refs:
+                    if unresolved is None:
+                        unresolved = []
+                    unresolved.append((k, v))
+                elif type(v) is LazyProxy:
+                    if proxied is None:
+                        proxied = []
+                    proxied.append((k, v))
 
         if class_id is not None:
             if ducks and (version_info is not None) and hasattr(type_obj, 'check_convert_update'):
@@ -466,10 +975,86 @@ class DeSerializer(Processor):
                         self.notify_settings_converted(class_id)
             ret = self.context.handler.handle_node(type_obj, instance, self.context, **kwargs)
             if method_name := self.semantics[NotifyFinalizedMethodName]:
-                self.context.finalize.subscribe(getattr(ret, method_name.val))
-            return ret
+                self.finalize_callbacks.append((ret, method_name.val))
         else:
-            return instance
+            ret = instance
+        if unresolved is not None:
+            self.reference_slots.extend((ret, k, v) for k, v in unresolved)
+        if proxied is not None:
+            for k, v in proxied:
+                v._lazy_add_slot(ret, k)
+        return ret
+
+    def is_lazy_candidate(self, instance: dict) -> bool:
+        """
+        Only Serializable objects below the object being deserialized are deferred. Helper objects like
+        KeySerializableDict and PreservedReference stand in for other values and are always built
+        """
+        if not self.context.key_path or instance is self.lazy_exempt:
+            return False
+        class_str = instance[self.spec.class_id]
+        try:
+            return self.lazy_types[class_str]
+        except KeyError:
+            pass
+        type_obj = self.context.load_type(class_str)
+        lazy = isinstance(type_obj, type) and issubclass(type_obj, Serializable) and \
+            not issubclass(type_obj, KeySerializableDict)
+        self.lazy_types[class_str] = lazy
+        return lazy
+
+    def create_lazy_proxy(self, instance: dict) -> LazyProxy:
+        if self.lazy_session is None:
+            self.lazy_session = DeSerializationSession(self)
+        semantics = self.semantics
+        return self.lazy_session.create_proxy(DeferredObject(instance, self.context.key_path.copy(),
+                                                             semantics.copy_semantics(), semantics.parent,
+                                                             semantics.handler))
+
+    def materialize(self, state: DeferredObject):
+        """
+        Deserializes the raw object of a lazy proxy with the key path and semantics it was deferred with
+        """
+        key_path = state.key_path
+        preserve_key_path = self.context.key_path
+        preserve_exempt = self.lazy_exempt
+        self.context.key_path = key_path[:-1]
+        self.lazy_exempt = state.raw
+        try:
+            with self.context(key_path[-1]), self.semantics:
+                self.semantics.semantics = state.semantics
+                self.semantics.parent = state.frame_semantics
+                self.semantics.handler = state.handler
+                return self.deserialize(state.raw)
+        finally:
+            self.context.key_path = preserve_key_path
+            self.lazy_exempt = preserve_exempt
+
+    def finish_materialize(self):
+        """
+        Runs what dispose would have run for an object materialized after the deserialization finished
+        """
+        self.run_finalize_callbacks()
+        if len(self.preserved_refs) > 0:
+            self.preserved_refs = WeakSet()
+            raise PreservedReferenceNotDissolvedError()
+
+    def fork(self) -> Self:
+        """
+        A copy of this deserializer that keeps the id cache, semantics, version header and customized handlers after
+        this one is disposed and reused. Used to materialize the lazy proxies that are still pending
+        """
+        clone = copy(self)
+        clone.context = copy(self.context)
+        clone.context.key_path = []
+        clone.context.id_cache = self.context.id_cache.copy()
+        clone.root_obj = None
+        clone.root_object = None
+        clone.preserved_refs = WeakSet()
+        clone.reference_slots = []
+        clone.finalize_callbacks = []
+        clone.deferred_refs = set()
+        return clone
 
     def handle_preserved_referece(self, instance: PreservedReference, **kwargs):
         return instance.obj
@@ -482,31 +1067,44 @@ class DeSerializer(Processor):
 
         resolve_preserved = self.semantics[ResolvePreservedReferences]
         detonate = self.semantics[DetonateDanglingPreservedReferences]
-        if (not resolve_preserved) or self.spec.is_circular_ref((key_path := self.spec.str_to_path(instance.ref)),
+        if (not resolve_preserved) or self.spec.is_circular_ref((key_path := self.get_path(instance.ref)),
                                                                 self.context.key_path):
             if detonate:
                 self.preserved_refs.add(instance)
+            if resolve_preserved:
+                self.deferred_refs.add(id(instance))
             return instance
         else:
             if v := self.context.check_ref(instance):
                 return v
             if key_path is None:
-                key_path = self.spec.str_to_path(instance.ref)
-            section_parent = self.spec.get_part_from_path(self.root_object, key_path[:-1])
-            section_key = key_path[-1]
+                key_path = self.get_path(instance.ref)
+            if self.lazy_session is not None:
+                # The section is inside an object that has not been built yet
+                while (proxy := self.lazy_session.find_proxy(key_path)) is not None:
+                    proxy._lazy_materialize()
+                    if v := self.context.check_ref(instance):
+                        return v
+            if self.reference_index is None:
+                self.index_references()
+            if instance.ref in self.reference_index:
+                section_parent, section_key, ancestors = self.reference_index[instance.ref]
+                semantics = self.get_path_semantics(ancestors)
+            else:
+                section_parent = self.spec.get_part_from_path(self.root_obj, key_path[:-1])
+                section_key = key_path[-1]
+                semantics = self.run_semantics_through_path(key_path)
             section = section_parent[section_key]
 
             preserve_key_path = self.context.key_path
-            self.context.key_path = key_path
-
-            semantics = self.run_semantics_through_path(key_path[:-1])
+            self.context.key_path = key_path[:-1]
             with self.context(section_key), self.semantics:
                 self.semantics.update(semantics)
                 ro = self.deserialize(section, **kwargs)
-
             self.context.key_path = preserve_key_path
 
             npo = PreservedReference(obj=ro, ref=self.path_to_str())
+
             self.context.id_cache[npo.ref] = ro
             section_parent[section_key] = npo
             if detonate:
@@ -517,9 +1115,27 @@ class DeSerializer(Processor):
         self.context.id_cache[self.path_to_str()] = instance
         return instance
 
+    def get_header_version_info(self, type_obj: Type) -> dict | None:
+        """
+        Rebuilds the version information of an object that omitted it from the version header
+        """
+        if type_obj in self.header_version_infos:
+            return self.header_version_infos[type_obj]
+        header = self.version_header
+        version_info = {}
+        for clt in generate_type_hierarchy_to_base(get_object_versioning_endpoint(type_obj), type_obj):
+            if (class_str := format_class_str(clt)) in header:
+                version_info[class_str] = header[class_str]
+        if not version_info:
+            version_info = None
+        self.header_version_infos[type_obj] = version_info
+        return version_info
+
     def process(self, obj=None, **kwargs):
         if obj is None:
             obj = self.root_obj
+        if type(obj) is dict and self.spec.version_header_id in obj:
+            self.version_header = obj.pop(self.spec.version_header_id)
         return self.deserialize(obj, **kwargs)
 
     def deserialize(self, obj, **kwargs):
@@ -540,8 +1156,67 @@ class DeSerializer(Processor):
                                       semantics=self.context.semantic_context,
                                       frame_semantics=self.context.semantic_context.parent)
 
+    def resolve_reference_slots(self) -> set[int]:
+        """
+        Replaces the PreservedReferences that were handed to objects before the object they point to was finished
+        (circular references). Only the slots recorded during deserialization are visited.
+
+        :return: ids of objects that did not store a PreservedReference under the key it was given to them with
+        """
+        unpatched = set()
+        find = self.context.id_cache
+        for obj, key, ref in self.reference_slots:
+            if ref.ref not in find:
+                continue
+            if not self.patch_slot(obj, key, ref, find[ref.ref]):
+                unpatched.add(id(obj))
+        self.reference_slots = []
+        self.deferred_refs.clear()
+        return unpatched
+
+    def patch_slot(self, obj, key, placeholder, resolved) -> bool:
+        """
+        Replaces placeholder with resolved in obj under key. IASettings are patched with patch_item, the placeholder
+        already stood in for resolved so nothing changed for their subscribers or dirty keys
+
+        :return: False if obj does not store placeholder under key
+        """
+        try:
+            if isinstance(obj, IASettings):
+                if obj[key] is placeholder:
+                    obj.patch_item(key, resolved)
+                    return True
+            elif type(obj) in self.special:
+                if obj[key] is placeholder:
+                    obj[key] = resolved
+                    return True
+            elif getattr(obj, key, None) is placeholder:
+                setattr(obj, key, resolved)
+                return True
+        except (KeyError, IndexError, TypeError, AttributeError, ValueError):
+            pass
+        return False
+
+    def run_finalize_callbacks(self):
+        unpatched = self.resolve_reference_slots()
+        for obj, method_name in self.finalize_callbacks:
+            # The default finalize methods only scan for PreservedReferences, which has already been done above
+            if getattr(obj.__class__, method_name, None) in DEFAULT_FINALIZE_METHODS and id(obj) not in unpatched:
+                continue
+            getattr(obj, method_name)(self.context)
+        self.finalize_callbacks = []
+
     def dispose(self):
+        self.run_finalize_callbacks()
+        if (session := self.lazy_session) is not None:
+            for ref in list(self.preserved_refs):
+                if session.find_proxy(self.get_path(ref.ref)) is not None:  # Dissolved when the proxy is materialized
+                    self.preserved_refs.discard(ref)
+            session.detach(self)
+            self.lazy_session = None
+        self.lazy_exempt = None
         super().dispose()
+        self.reference_slots = []
         if len(self.preserved_refs) > 0:
             raise PreservedReferenceNotDissolvedError()
 
@@ -553,6 +1228,9 @@ class DeSerializer(Processor):
 class Formatter(IFormatter, ABC):
     FORMAT_SETTINGS = FormatterSpec()
     TYPES = FORMAT_SETTINGS.type_primitives | FORMAT_SETTINGS.type_special
+    SERIALIZER_T = Serializer
+    DESERIALIZER_T = DeSerializer
+    PROCESSOR_POOL_SIZE = 4
 
     def __init__(self, spec: FormatterSpec = None):
         if spec is None:
@@ -561,6 +1239,8 @@ class Formatter(IFormatter, ABC):
         self.semantics = set()
         self.serialization_handler = SerializationHandler()
         self.deserialization_handler = DeSerializationHandler()
+        self.serializer_pool: list[Serializer] = []
+        self.deserializer_pool: list[DeSerializer] = []
 
     def get_serialization_handler(self) -> OrderedHandler:
         return self.serialization_handler
@@ -569,14 +1249,79 @@ class Formatter(IFormatter, ABC):
         return self.deserialization_handler
 
     def get_serializer(self, root_obj, context) -> Serializer:
-        s = Serializer(root_obj, self.spec.copy(), context)
+        s = self.SERIALIZER_T(root_obj, self.spec.copy(), context)
         s.semantics.update(self.semantics)
         return s
 
     def get_deserializer(self, root_obj, context) -> DeSerializer:
-        d = DeSerializer(root_obj, self.spec.copy(), context)
+        d = self.DESERIALIZER_T(root_obj, self.spec.copy(), context)
         d.semantics.update(self.semantics)
         return d
 
+    def acquire_serializer(self, root_obj) -> Serializer:
+        context = self.get_serialization_context()
+        try:
+            serializer = self.serializer_pool.pop()
+        except IndexError:
+            return self.get_serializer(root_obj, context)
+        serializer.reset(root_obj, context)
+        serializer.semantics.update(self.semantics)
+        return serializer
+
+    def acquire_deserializer(self, root_obj) -> DeSerializer:
+        context = self.get_deserialization_context()
+        try:
+            deserializer = self.deserializer_pool.pop()
+        except IndexError:
+            return self.get_deserializer(root_obj, context)
+        deserializer.reset(root_obj, context)
+        deserializer.semantics.update(self.semantics)
+        return deserializer
+
+    def release_processor(self, processor: Processor):
+        if isinstance(processor, Serializer):
+            pool = self.serializer_pool
+        else:
+            pool = self.deserializer_pool
+        if len(pool) < self.PROCESSOR_POOL_SIZE:
+            pool.append(processor)
+
+    def clear_processor_pool(self):
+        """
+        Call this after changing the spec or customizing the processors returned by get_serializer/get_deserializer
+        """
+        self.serializer_pool.clear()
+        self.deserializer_pool.clear()
+
+    def prepare(self, types: Iterable[Type] = ()):
+        """
+        Warm up the dispatch tables for the given types and fill the processor pools so the first call to dumps/loads
+        does not pay for building them
+
+        :param types: Types that are expected to be serialized and deserialized
+        """
+        serializer_table = self.SERIALIZER_T.get_handler_tables()['handler']
+        deserializer_tables = self.DESERIALIZER_T.get_handler_tables()
+        for t in types:
+            for handler in (self.serialization_handler, self.deserialization_handler, serializer_table,
+                            deserializer_tables['secondary_handler']):
+                if t in handler:
+                    handler.get_key_func(t)
+        for special in self.spec.get_special_types():
+            deserializer_tables['handler'].get_key_func(special)
+        for _ in range(self.PROCESSOR_POOL_SIZE - len(self.serializer_pool)):
+            self.serializer_pool.append(self.get_serializer(None, self.get_serialization_context()))
+        for _ in range(self.PROCESSOR_POOL_SIZE - len(self.deserializer_pool)):
+            self.deserializer_pool.append(self.get_deserializer(None, self.get_deserialization_context()))
+
+    def loads_raw(self, buffer: str | bytes) -> RawDocument:
+        """
+        Parses buffer into a RawDocument, which can be edited and dumped again without deserializing anything
+        """
+        return RawDocument(self, self.buffer_to_obj(buffer, self.get_deserialization_context()))
+
+    def read_raw(self, path: str) -> RawDocument:
+        return RawDocument(self, self.read_serialized_from_file(path), file_path=path)
+
     def add_semantics(self, *semantics: T_S_E):
         self.semantics.update(semantics)
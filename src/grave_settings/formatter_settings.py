@@ -93,6 +93,7 @@ class FormatterSpec:
     def __init__(self):
         self.str_id = '__id__'
         self.version_id = '__version__'
+        self.version_header_id = '__versions__'
         self.class_id = '__class__'
         self.type_primitives = self.PRIMITIVES
         self.type_special = self.SPECIAL
@@ -113,8 +114,19 @@ class FormatterSpec:
         return '.'.join(parts)
 
     def str_to_path(self, reference: str) -> list:
-        return list(p[1:-1] if p.startswith('"') and p.endswith('"') else int(p)
-                    for p in self.ROUTE_PATH_REGEX.findall(reference))
+        """
+        Inverse of path_to_str. Unquoted parts that are not integers are taken as string keys so paths like a.b.0 can
+        be written by hand
+        """
+        return [p[1:-1] if p.startswith('"') and p.endswith('"') else self.str_to_path_part(p)
+                for p in self.ROUTE_PATH_REGEX.findall(reference)]
+
+    @staticmethod
+    def str_to_path_part(part: str) -> int | str:
+        try:
+            return int(part)
+        except ValueError:
+            return part
 
     def get_part_from_path(self, obj: TYPES, path: list | str) -> TYPES:
         if type(path) is str:
@@ -18,11 +18,23 @@ class BsonFormatter(Formatter):
     def to_buffer(self, data, _io: IOBase, encoding=None, serializer: Processor = None):
         return super().to_buffer(data, _io, encoding=encoding, serializer=serializer)
 
-    def write_to_file(self, settings, path: str, encoding=None, serializer: Processor = None):
-        return super().write_to_file(settings, path, encoding=encoding, serializer=serializer)
+    def write_to_file(self, settings, path: str, encoding=None, serializer: Processor = None, atomic=False):
+        return super().write_to_file(settings, path, encoding=encoding, serializer=serializer, atomic=atomic)
+
+    def write_buffer_to_file(self, buffer: str | bytes, path: str, encoding=None, atomic=False):
+        return super().write_buffer_to_file(buffer, path, encoding=encoding, atomic=atomic)
 
     def from_buffer(self, _io: IOBase, encoding=None, kwargs: dict | None = None, deserializer: Processor = None):
         return super().from_buffer(_io, encoding=encoding, kwargs=kwargs, deserializer=deserializer)
 
     def read_from_file(self, path: str, encoding=None, kwargs: dict | None = None, deserializer: Processor = None):
         return super().read_from_file(path, encoding=encoding, kwargs=kwargs, deserializer=deserializer)
+
+    def read_buffer_from_file(self, path: str, encoding=None) -> str | bytes:
+        return super().read_buffer_from_file(path, encoding=encoding)
+
+    def read_serialized_from_file(self, path: str, encoding=None):
+        return super().read_serialized_from_file(path, encoding=encoding)
+
+    def write_serialized_to_file(self, ser_obj, path: str, encoding=None, atomic=False):
+        return super().write_serialized_to_file(ser_obj, path, encoding=encoding, atomic=atomic)
@@ -1,8 +1,17 @@
 import json
+import os
+import shutil
+import tempfile
+from threading import RLock
+from typing import Iterable
 
 from grave_settings.formatter_settings import FormatterContext
 from grave_settings.semantics import Indentation
 from grave_settings.formatter import Formatter
+from grave_settings.utilities import file_signature
+
+
+_SECTION = object()
 
 
 class JsonFormatter(Formatter):
@@ -10,10 +19,278 @@ class JsonFormatter(Formatter):
         super().__init__(*args, **kwargs)
         self.semantics.add(Indentation(4))
 
-    def serialized_obj_to_buffer(self, ser_obj: dict, context: FormatterContext) -> str:
+    def get_indent(self, context: FormatterContext) -> int | None:
         if indent := context.semantic_context[Indentation]:
             indent = indent.val
-        return json.dumps(ser_obj, indent=indent)
+        return indent
+
+    def serialized_obj_to_buffer(self, ser_obj: dict, context: FormatterContext) -> str:
+        return json.dumps(ser_obj, indent=self.get_indent(context))
 
     def buffer_to_obj(self, buffer: str, context: FormatterContext):
         return json.loads(buffer)
+
+    def splice_to_file(self, ser_obj, writer: 'JsonSpliceWriter', section_paths: Iterable[list],
+                       context: FormatterContext) -> bool:
+        """
+        Writes a serialized object with writer, see JsonSpliceWriter
+        """
+        return writer.write(ser_obj, section_paths, indent=self.get_indent(context))
+
+
+class JsonSection:
+    """
+    Where a node of the serialized tree was written. start is relative to the start of the enclosing section
+    """
+    __slots__ = 'node', 'start', 'length', 'children'
+
+    def __init__(self, node, start: int, length: int, children: list['JsonSection']):
+        self.node = node
+        self.start = start
+        self.length = length
+        self.children = children
+
+
+class JsonSpliceWriter:
+    """
+    Writes serialized objects to one file. Sections are the nodes at the key paths given to write. A section that is
+    the same object as a section of the previous write is copied from the file instead of being encoded again, large
+    spans with copy_file_range or sendfile where available. Everything else is encoded exactly like json.dumps.
+
+    The file is written in full if it was changed by anything else since the last write, and not at all if the output
+    is the same as what it holds.
+    """
+    COPY_THRESHOLD = 1 << 14  # Shorter spans are read and written along with the text around them
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = RLock()
+        self.root: JsonSection | None = None
+        self.index: dict[int, tuple[JsonSection, int]] = {}  # id of node -> section and its absolute start
+        self.indent: int | None = None
+        self.signature: tuple | None = None
+        self.copied = 0  # Bytes copied from the previous file by the last write
+
+    def can_splice(self, indent: int | None) -> bool:
+        return self.root is not None and indent == self.indent and self.signature == file_signature(self.path)
+
+    def is_unchanged(self, parts: list, end: int) -> bool:
+        """
+        True if parts rebuild the previous file exactly. Only valid if the file can be spliced
+        """
+        if end != self.signature[1]:
+            return False
+        pos = 0
+        with open(self.path, 'rb') as f:
+            for part in parts:
+                if type(part) is str:
+                    data = part.encode('ascii')
+                    f.seek(pos)
+                    if f.read(len(data)) != data:
+                        return False
+                    pos += len(data)
+                else:
+                    start, length = part
+                    if start != pos:
+                        return False
+                    pos += length
+        return True
+
+    @staticmethod
+    def build_trie(section_paths: Iterable[list]) -> dict:
+        trie = {}
+        for path in section_paths:
+            node = trie
+            for key in path:
+                node = node.setdefault(key, {})
+            node[_SECTION] = True
+        return trie
+
+    @staticmethod
+    def encode_key(key) -> str:
+        if type(key) is not str:
+            if key is True:
+                key = 'true'
+            elif key is False:
+                key = 'false'
+            elif key is None:
+                key = 'null'
+            elif type(key) is float:
+                key = float.__repr__(key)
+            else:
+                key = int.__repr__(key)
+        return json.dumps(key)
+
+    def encode(self, node, trie: dict | None, level: int, parts: list, pos: int, parent_start: int,
+               sections: list[JsonSection], index: dict) -> int:
+        """
+        Appends the text of node to parts, and (start, length) tuples for the spans copied from the previous file
+
+        :return: The position after node
+        """
+        if trie is None:
+            text = json.dumps(node, indent=self.indent)
+            if self.indent is not None and level:
+                text = text.replace('\n', '\n' + ' ' * (self.indent * level))  # Strings never hold a raw newline
+            parts.append(text)
+            return pos + len(text)
+        if _SECTION in trie:
+            if (entry := index.get(id(node))) is not None and entry[0].node is node:
+                section, start = entry
+                parts.append((start, section.length))
+                sections.append(JsonSection(node, pos - parent_start, section.length, section.children))
+                return pos + section.length
+            children = []
+            end = self.encode_container(node, trie, level, parts, pos, pos, children, index)
+            sections.append(JsonSection(node, pos - parent_start, end - pos, children))
+            return end
+        return self.encode_container(node, trie, level, parts, pos, parent_start, sections, index)
+
+    def encode_container(self, node, trie: dict, level: int, parts: list, pos: int, parent_start: int,
+                         sections: list[JsonSection], index: dict) -> int:
+        t = type(node)
+        if t is dict:
+            items = node.items()
+            opening, closing = '{', '}'
+        elif t is list:
+            items = enumerate(node)
+            opening, closing = '[', ']'
+        else:
+            return self.encode(node, None, level, parts, pos, parent_start, sections, index)
+        if not node:
+            parts.append(opening + closing)
+            return pos + 2
+        if self.indent is None:
+            separator = ', '
+        else:
+            newline = '\n' + ' ' * (self.indent * (level + 1))
+            opening += newline
+            separator = ',' + newline
+            closing = '\n' + ' ' * (self.indent * level) + closing
+        parts.append(opening)
+        pos += len(opening)
+        first = True
+        for key, value in items:
+            text = '' if first else separator
+            first = False
+            if t is dict:
+                text += self.encode_key(key) + ': '
+            if text:
+                parts.append(text)
+                pos += len(text)
+            pos = self.encode(value, trie.get(key), level + 1, parts, pos, parent_start, sections, index)
+        parts.append(closing)
+        return pos + len(closing)
+
+    def write(self, ser_obj, section_paths: Iterable[list], indent: int | None = None) -> bool:
+        """
+        :return: False if the file already held the output and was left alone
+        """
+        with self.lock:
+            splice = self.can_splice(indent)
+            index = self.index if splice else {}
+            self.indent = indent
+            parts = []
+            sections = []
+            end = self.encode(ser_obj, self.build_trie(section_paths), 0, parts, 0, 0, sections, index)
+            self.root = None
+            self.index = {}
+            written = not (splice and self.is_unchanged(parts, end))
+            if written:
+                self.copied = self.write_parts(parts)
+            else:
+                self.copied = 0
+            self.root = JsonSection(None, 0, end, sections)
+            self.build_index()
+            self.signature = file_signature(self.path)
+            return written
+
+    def write_parts(self, parts: list) -> int:
+        """
+        Writes parts to a temporary file next to path and moves it over path
+
+        :return: Number of bytes copied from the previous file
+        """
+        directory, name = os.path.split(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+        src = None
+        copied = 0
+        try:
+            buffer = []
+            for part in parts:
+                if type(part) is str:
+                    buffer.append(part.encode('ascii'))  # json.dumps escapes everything else
+                    continue
+                start, length = part
+                if src is None:
+                    src = os.open(self.path, os.O_RDONLY)
+                if length < self.COPY_THRESHOLD:
+                    buffer.append(os.pread(src, length, start))
+                else:
+                    self.write_all(fd, b''.join(buffer))
+                    buffer.clear()
+                    self.copy_range(src, fd, start, length)
+                copied += length
+            self.write_all(fd, b''.join(buffer))
+            os.fsync(fd)
+            os.close(fd)
+            fd = None
+            if os.path.exists(self.path):
+                shutil.copymode(self.path, tmp_path)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            if src is not None:
+                os.close(src)
+        return copied
+
+    @staticmethod
+    def write_all(fd: int, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+
+    @classmethod
+    def copy_range(cls, src: int, dst: int, offset: int, count: int):
+        """
+        Appends count bytes of src starting at offset to dst without passing them through python where possible
+        """
+        copy_file_range = getattr(os, 'copy_file_range', None)
+        sendfile = getattr(os, 'sendfile', None)
+        while count:
+            n = 0
+            if copy_file_range is not None:
+                try:
+                    n = copy_file_range(src, dst, count, offset)
+                except OSError:
+                    copy_file_range = None
+                    continue
+            elif sendfile is not None:
+                try:
+                    n = sendfile(dst, src, offset, count)
+                except OSError:
+                    sendfile = None
+                    continue
+            else:
+                data = os.pread(src, min(count, 1 << 20), offset)
+                cls.write_all(dst, data)
+                n = len(data)
+            if n == 0:
+                raise EOFError(f'Unexpected end of file while copying a section: {offset}')
+            offset += n
+            count -= n
+
+    def build_index(self):
+        index = self.index
+        stack = [(self.root, 0)]
+        while stack:
+            section, start = stack.pop()
+            for child in section.children:
+                child_start = start + child.start
+                index[id(child.node)] = child, child_start
+                stack.append((child, child_start))
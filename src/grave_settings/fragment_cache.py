@@ -0,0 +1,168 @@
+# - * -coding: utf - 8 - * -
+"""
+Reusing the serialized form of IASettings objects that have not changed between saves
+
+@author: ☙ Ryan McConnell ❧
+"""
+from threading import RLock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from grave_settings.abstract import IASettings
+
+
+class Fragment:
+    """
+    The serialized form of one IASettings object along with what it needs from the id cache of the serializer: the ids
+    it registered (ids) and the ids it referenced outside itself (refs). Both are (id, path, object) and keep their
+    objects alive so the ids can not be reused. held is the (key, value) pairs the object had when it was serialized.
+    """
+    __slots__ = ('cache', 'obj', 'path', 'key_path', 'ser_obj', 'ids', 'refs', 'held', 'container', 'children',
+                 'generation', 'stale', '__weakref__')
+
+    def __init__(self, cache: 'FragmentCache', obj: 'IASettings', path: str, key_path: list,
+                 container: 'Fragment | None'):
+        self.cache = cache
+        self.obj = obj
+        self.path = path
+        self.key_path = key_path
+        self.ser_obj = None
+        self.ids: list[tuple[int, str, object]] = []
+        self.refs: list[tuple[int, str, object]] = []
+        self.held: list[tuple] = [(key, obj[key]) for key in obj if key in obj]
+        self.container = container
+        self.children: list[Fragment] = []
+        self.generation = cache.generation
+        self.stale = False
+
+    def is_ready(self) -> bool:
+        return self.ser_obj is not None and not self.stale
+
+    def invalidated(self):
+        self.cache.drop(self)
+
+
+class FragmentCache:
+    """
+    Keeps the serialized fragments of the IASettings objects met by the serializers it is given to (see
+    Serializer.fragment_cache), keyed by identity. A fragment is dropped along with every fragment containing it when
+    the invalidate event of its object fires, and is only spliced back in at the same key path, when its object still
+    holds the same objects and when every reference it holds still points to the same path. Assigning an equal object
+    does not fire invalidate, so the objects held are compared by identity.
+
+    Changes that do not fire invalidate (mutating a list in place, setting a slot attribute directly) are not seen.
+    """
+    def __init__(self):
+        self.lock = RLock()
+        self.fragments: dict[int, Fragment] = {}
+        self.generation = 0
+
+    def start(self):
+        """
+        Called when a serializer starts processing
+        """
+        with self.lock:
+            self.generation += 1
+
+    def finish(self):
+        """
+        Called when a serializer finished without errors. Drops the fragments of objects that were not met
+        """
+        with self.lock:
+            generation = self.generation
+            for fragment in list(self.fragments.values()):
+                if fragment.container is None and fragment.generation != generation and fragment.ser_obj is not None:
+                    self.discard(fragment)
+
+    def get(self, obj: 'IASettings', path: str, id_cache: dict, container: Fragment | None) -> Fragment | None:
+        with self.lock:
+            fragment = self.fragments.get(id(obj))
+            if fragment is None or not fragment.is_ready() or fragment.path != path:
+                return None
+            for key, value in fragment.held:
+                if key not in obj or obj[key] is not value:
+                    return None
+            for object_id, _, _ in fragment.ids:
+                if object_id in id_cache:
+                    return None
+            for object_id, ref, _ in fragment.refs:
+                if id_cache.get(object_id) != ref:
+                    return None
+            fragment.generation = self.generation
+            self.set_container(fragment, container)
+            return fragment
+
+    def begin(self, obj: 'IASettings', path: str, key_path: list, container: Fragment | None) -> Fragment:
+        """
+        Starts recording the fragment of obj. It is subscribed right away so changes made while obj is being
+        serialized are not cached
+        """
+        with self.lock:
+            if (old := self.fragments.get(id(obj))) is not None:
+                self.discard(old)
+            fragment = Fragment(self, obj, path, key_path, None)
+            self.set_container(fragment, container)
+            self.fragments[id(obj)] = fragment
+        obj.invalidate.subscribe(fragment.invalidated)
+        return fragment
+
+    def store(self, fragment: Fragment, ser_obj, ids: list, refs: list, id_cache: dict):
+        with self.lock:
+            if fragment.stale:
+                return
+            own_ids = set()
+            for entry in ids:
+                if id_cache.get(entry[0]) == entry[1]:  # Some handlers take their registration back
+                    own_ids.add(entry[0])
+                    fragment.ids.append(entry)
+            fragment.refs = [entry for entry in refs if entry[0] not in own_ids]
+            fragment.ser_obj = ser_obj
+
+    def get_section_paths(self) -> list[list]:
+        """
+        The key paths of the cached fragments
+        """
+        with self.lock:
+            return [fragment.key_path for fragment in self.fragments.values() if fragment.is_ready()]
+
+    @staticmethod
+    def set_container(fragment: Fragment, container: Fragment | None):
+        fragment.container = container
+        if container is not None:
+            container.children.append(fragment)
+
+    def remove(self, fragment: Fragment):
+        fragment.stale = True  # The event only holds a weak reference so the subscription goes away with the fragment
+        if self.fragments.get(id(fragment.obj)) is fragment:
+            del self.fragments[id(fragment.obj)]
+
+    def discard(self, fragment: Fragment):
+        """
+        Removes fragment and the fragments inside it
+        """
+        with self.lock:
+            stack = [fragment]
+            while stack:
+                fragment = stack.pop()
+                self.remove(fragment)
+                stack.extend(fragment.children)
+                fragment.children = []
+
+    def drop(self, fragment: Fragment):
+        """
+        Removes fragment and the fragments containing it. The fragments inside it are still valid
+        """
+        with self.lock:
+            while fragment is not None:
+                self.remove(fragment)
+                for child in fragment.children:
+                    child.container = None
+                fragment.children = []
+                container = fragment.container
+                fragment.container = None
+                fragment = container
+
+    def clear(self):
+        with self.lock:
+            for fragment in list(self.fragments.values()):
+                self.remove(fragment)
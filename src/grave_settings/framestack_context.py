@@ -14,7 +14,7 @@ class FrameStackContext(SemanticContext):
 
     def set_handler(self, handler: OrderedHandler, merge: bool = True, update_order=True):
         if merge and self.handler is not None and self.handler is not handler:
-            handler.update(self.handler, update_order=update_order)
+            handler = handler.layer_over(self.handler, update_order=update_order)
         self.handler = handler
 
     def __enter__(self):
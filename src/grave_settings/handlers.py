@@ -82,6 +82,8 @@ class Handler(object):
 class OrderedHandler(Handler):
     def __init__(self, *args, **kwargs):
         self.cache = {}  # types checked second
+        self.parent: OrderedHandler | None = None  # types checked last (or first if parent_first)
+        self.parent_first = False
         # CAREFUL: initialize is called in the constructor here
         super(OrderedHandler, self).__init__(*args, **kwargs)
 
@@ -104,10 +106,63 @@ class OrderedHandler(Handler):
                 self.cache.pop(_type)
         self.cache.update(handler.cache)
 
+    def layer_over(self, handler: 'OrderedHandler', update_order=True) -> Self:
+        """
+        Returns a copy of this handler that falls back on handler for types it does not handle itself. This is the
+        copy-free alternative to update, the cost depends only on the size of this handler and the handlers it is
+        already layered over. If those have to come after handler, the handlers handler is layered over are copied too.
+
+        :param handler: The handler to fall back on
+        :param update_order: If False the handler being layered over takes priority over this one
+        """
+        layer = self.copy()
+        layer.cache = {}
+        if self.parent is None:
+            layer.parent = handler
+            layer.parent_first = not update_order
+        elif update_order == self.parent_first:
+            # handler has to go between the types of this handler and its parent, which takes a second layer
+            layer.parent = handler
+            layer.parent_first = not update_order
+            if update_order:
+                return self.parent.layer_over(layer)
+            return layer.layer_over(self.parent)
+        else:
+            layer.parent = self.parent.layer_over(handler, update_order=update_order)
+        return layer
+
     def add_handler(self, target_type, func_format, bind_as_method=False):
         if bind_as_method:
             func_format = MethodType(func_format, self)
         self.type_bank[target_type] = func_format
+        self.invalidate_cache(target_type)
+
+    def add_handlers(self, handlers: Mapping | Iterable):
+        if isinstance(handlers, Mapping):
+            handlers = handlers.items()
+        for target_type, func_format in handlers:
+            self.add_handler(target_type, func_format)
+
+    def invalidate_cache(self, target_type):
+        if not self.cache:
+            return
+        try:
+            rems = [t for t in self.cache if issubclass(t, target_type)]
+        except TypeError:
+            self.cache.clear()
+            return
+        for t in rems:
+            self.cache.pop(t)
+
+    def copy(self) -> Self:
+        """
+        Copies the handler without running init_handler again. The dispatch cache is copied along with the type bank
+        """
+        handler = self.__class__.__new__(self.__class__)
+        handler.__dict__.update(self.__dict__)
+        handler.type_bank = self.type_bank.copy()
+        handler.cache = self.cache.copy()
+        return handler
 
     def __contains__(self, item: Type):
         if item in self.cache:
@@ -116,17 +171,35 @@ class OrderedHandler(Handler):
             for t in self.type_bank:
                 if issubclass(item, t):
                     return True
+        if self.parent is not None:
+            return item in self.parent
         return False
 
+    def get_own_key_func(self, key_type: Type):
+        for t, f in reversed(self.type_bank.items()):
+            if issubclass(key_type, t):
+                return f
+        raise HandlerNotFound()
+
     def get_key_func(self, key_type: Type):
         if key_type in self.cache:
             return self.cache[key_type]
         else:
-            for t, f in reversed(self.type_bank.items()):
-                if issubclass(key_type, t):
-                    self.cache[key_type] = f
-                    return f
-            raise HandlerNotFound()
+            parent = self.parent
+            if parent is None:
+                f = self.get_own_key_func(key_type)
+            elif self.parent_first:
+                try:
+                    f = parent.get_key_func(key_type)
+                except HandlerNotFound:
+                    f = self.get_own_key_func(key_type)
+            else:
+                try:
+                    f = self.get_own_key_func(key_type)
+                except HandlerNotFound:
+                    f = parent.get_key_func(key_type)
+            self.cache[key_type] = f
+            return f
 
     def handle_node(self, key, *args, **kwargs):
         try:
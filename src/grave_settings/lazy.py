@@ -0,0 +1,234 @@
+# - * -coding: utf - 8 - * -
+"""
+Stand-ins for objects whose deserialization is deferred until they are used
+
+@author: ☙ Ryan McConnell ❧
+"""
+from abc import ABC, abstractmethod
+from threading import RLock
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from grave_settings.formatter import DeSerializer
+    from grave_settings.semantics import Semantics
+    from grave_settings.handlers import OrderedHandler
+
+
+_UNSET = object()
+
+
+class LazyProxy:
+    """
+    Stands in for an object until the first time one of its attributes or items is accessed, then asks its session to
+    build the object. The slots the proxy was given to are patched with the real object at that point, proxies held
+    elsewhere keep forwarding to it. Use materialize to get the real object.
+
+    Every reference to the same object shares one proxy so identity is kept across PreservedReferences.
+    """
+    __slots__ = ('_lazy_session', '_lazy_state', '_lazy_obj', '_lazy_error', '_lazy_slots', '__weakref__')
+
+    def __init__(self, session: 'LazySession', state):
+        setattr_ = object.__setattr__
+        setattr_(self, '_lazy_session', session)
+        setattr_(self, '_lazy_state', state)
+        setattr_(self, '_lazy_obj', _UNSET)
+        setattr_(self, '_lazy_error', None)
+        setattr_(self, '_lazy_slots', [])
+
+    def _lazy_materialize(self):
+        obj = object.__getattribute__(self, '_lazy_obj')
+        if obj is _UNSET:
+            return object.__getattribute__(self, '_lazy_session').materialize(self)
+        return obj
+
+    def _lazy_add_slot(self, obj, key):
+        """
+        Records that obj stores this proxy under key so it can be replaced with the real object later
+        """
+        with self._lazy_session.lock:
+            if self._lazy_obj is _UNSET:
+                self._lazy_slots.append((obj, key))
+                return
+        self._lazy_session.patch_slot(obj, key, self, self._lazy_obj)
+
+    def __getattr__(self, item):
+        return getattr(self._lazy_materialize(), item)
+
+    def __setattr__(self, key, value):
+        setattr(self._lazy_materialize(), key, value)
+
+    def __delattr__(self, item):
+        delattr(self._lazy_materialize(), item)
+
+    def __getitem__(self, item):
+        return self._lazy_materialize()[item]
+
+    def __setitem__(self, key, value):
+        self._lazy_materialize()[key] = value
+
+    def __delitem__(self, key):
+        del self._lazy_materialize()[key]
+
+    def __contains__(self, item):
+        return item in self._lazy_materialize()
+
+    def __iter__(self):
+        return iter(self._lazy_materialize())
+
+    def __len__(self):
+        return len(self._lazy_materialize())
+
+    def __bool__(self):
+        return bool(self._lazy_materialize())
+
+    def __eq__(self, other):
+        return self._lazy_materialize() == materialize(other)
+
+    def __ne__(self, other):
+        return self._lazy_materialize() != materialize(other)
+
+    def __hash__(self):
+        return hash(self._lazy_materialize())
+
+    def __call__(self, *args, **kwargs):
+        return self._lazy_materialize()(*args, **kwargs)
+
+    def __str__(self):
+        return str(self._lazy_materialize())
+
+    def __repr__(self):
+        if self._lazy_obj is _UNSET:
+            return f'<LazyProxy {self._lazy_session.describe(self)}>'
+        return repr(self._lazy_obj)
+
+
+def materialize(obj):
+    """
+    The real object behind a LazyProxy, building it if needed. Anything else is returned as is
+    """
+    if type(obj) is LazyProxy:
+        return obj._lazy_materialize()
+    return obj
+
+
+def is_materialized(obj) -> bool:
+    return type(obj) is not LazyProxy or obj._lazy_obj is not _UNSET
+
+
+class LazySession(ABC):
+    """
+    Builds the objects behind its proxies. Building and slot patching happen under the lock of the session
+    """
+    def __init__(self):
+        self.lock = RLock()
+
+    def create_proxy(self, state) -> LazyProxy:
+        return LazyProxy(self, state)
+
+    @abstractmethod
+    def build(self, proxy: LazyProxy):
+        pass
+
+    @abstractmethod
+    def patch_slot(self, obj, key, proxy: LazyProxy, resolved) -> bool:
+        pass
+
+    def materialized(self, proxy: LazyProxy):
+        """
+        Called once the object of proxy has been built and its slots patched
+        """
+        pass
+
+    def describe(self, proxy: LazyProxy) -> str:
+        return ''
+
+    def materialize(self, proxy: LazyProxy):
+        with self.lock:
+            if proxy._lazy_obj is not _UNSET:
+                return proxy._lazy_obj
+            if proxy._lazy_error is not None:
+                raise proxy._lazy_error
+            try:
+                obj = self.build(proxy)
+            except Exception as e:
+                object.__setattr__(proxy, '_lazy_error', e)
+                raise
+            finally:
+                object.__setattr__(proxy, '_lazy_state', None)
+            object.__setattr__(proxy, '_lazy_obj', obj)
+            for slot_obj, key in proxy._lazy_slots:
+                self.patch_slot(slot_obj, key, proxy, obj)
+            proxy._lazy_slots.clear()
+            self.materialized(proxy)
+            return obj
+
+
+class DeferredObject(NamedTuple):
+    raw: dict
+    key_path: list
+    semantics: dict
+    frame_semantics: 'Semantics | None'
+    handler: 'OrderedHandler'
+
+
+class DeSerializationSession(LazySession):
+    """
+    Keeps what the proxies of one deserialization need to build their objects: the deserializer while it is running,
+    a detached copy of it with the id cache afterwards. The copy is dropped once every proxy has been materialized.
+    """
+    def __init__(self, deserializer: 'DeSerializer'):
+        super().__init__()
+        self.deserializer: 'DeSerializer | None' = deserializer
+        self.proxies: dict[tuple, LazyProxy] = {}
+        self.detached = False
+
+    def create_proxy(self, state: DeferredObject) -> LazyProxy:
+        proxy = super().create_proxy(state)
+        self.proxies[tuple(state.key_path)] = proxy
+        return proxy
+
+    def find_proxy(self, key_path: list) -> LazyProxy | None:
+        """
+        The pending proxy whose object contains key_path
+        """
+        proxies = self.proxies
+        if not proxies:
+            return None
+        for i in range(len(key_path) - 1, 0, -1):
+            if (proxy := proxies.get(tuple(key_path[:i]))) is not None:
+                return proxy
+        return None
+
+    def build(self, proxy: LazyProxy):
+        state: DeferredObject = proxy._lazy_state
+        self.proxies.pop(tuple(state.key_path), None)
+        obj = self.deserializer.materialize(state)
+        del state
+        object.__setattr__(proxy, '_lazy_state', None)  # The raw tree may still hold PreservedReferences
+        if self.detached:
+            self.deserializer.finish_materialize()
+        return obj
+
+    def patch_slot(self, obj, key, proxy: LazyProxy, resolved) -> bool:
+        return self.deserializer.patch_slot(obj, key, proxy, resolved)
+
+    def materialized(self, proxy: LazyProxy):
+        if self.detached and not self.proxies:
+            self.deserializer.context.dispose()
+            self.deserializer = None
+
+    def describe(self, proxy: LazyProxy) -> str:
+        state: DeferredObject | None = proxy._lazy_state
+        if state is None or self.deserializer is None:  # Being built or failed to build
+            return '' if proxy._lazy_error is None else f'failed: {type(proxy._lazy_error).__name__}'
+        return self.deserializer.spec.path_to_str(state.key_path)
+
+    def detach(self, deserializer: 'DeSerializer'):
+        """
+        Called when the deserializer that created the proxies is disposed
+        """
+        if self.proxies:
+            self.deserializer = deserializer.fork()
+        else:
+            self.deserializer = None
+        self.detached = True
@@ -0,0 +1,117 @@
+# - * -coding: utf - 8 - * -
+"""
+Offline migration of stored files to the current versions of their classes
+
+@author: ☙ Ryan McConnell ❧
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Type, Callable, Generator, Iterable, NamedTuple
+
+from grave_settings.conversion_manager import ConversionManager
+from grave_settings.formatter import Formatter
+from grave_settings.formatter_settings import FormatterSpec
+from grave_settings.semantics import HoistVersionInfo
+
+
+CURRENT = 'current'
+OUTDATED = 'outdated'
+MIGRATED = 'migrated'
+FAILED = 'failed'
+
+
+class MigrationResult(NamedTuple):
+    path: str
+    status: str
+    size: int = 0
+    error: str | None = None
+
+
+def iter_version_blocks(ser_obj, spec: FormatterSpec) -> Generator[dict, None, None]:
+    """
+    Yields the version information stored in a serialized document, including the hoisted version header
+    """
+    if type(ser_obj) is dict and type(header := ser_obj.get(spec.version_header_id)) is dict:
+        yield header
+    stack = [ser_obj]
+    while stack:
+        node = stack.pop()
+        if type(node) is dict:
+            if spec.class_id in node and type(version_info := node.get(spec.version_id)) is dict:
+                yield version_info
+            stack.extend(node.values())
+        elif type(node) is list:
+            stack.extend(node)
+
+
+def is_outdated(ser_obj, formatter: Formatter, load_type: Callable[[str], Type] = None) -> bool:
+    """
+    Checks if any class in a serialized document was stored with a version other than its current one. Only the version
+    blocks are read so the objects themselves are never instantiated
+    """
+    if load_type is None:
+        load_type = formatter.get_deserialization_context().load_type
+    current_versions = {}
+    for version_info in iter_version_blocks(ser_obj, formatter.spec):
+        for class_str, version in version_info.items():
+            if class_str not in current_versions:
+                current_versions[class_str] = ConversionManager.get_version_info_from_class(load_type(class_str))
+            if current_versions[class_str] != version:
+                return True
+    return False
+
+
+def migrate_file(path: str, formatter_t: Type[Formatter], dry_run=False) -> MigrationResult:
+    size = 0
+    try:
+        size = os.path.getsize(path)
+        formatter = formatter_t()
+        ser_obj = formatter.read_serialized_from_file(path)
+        if not is_outdated(ser_obj, formatter):
+            return MigrationResult(path, CURRENT, size)
+        if dry_run:
+            return MigrationResult(path, OUTDATED, size)
+        if type(ser_obj) is dict and formatter.spec.version_header_id in ser_obj:
+            formatter.add_semantics(HoistVersionInfo(True))
+        data = formatter.deserialize(ser_obj)
+        formatter.write_to_file(data, path, atomic=True)
+        return MigrationResult(path, MIGRATED, size)
+    except Exception as e:
+        return MigrationResult(path, FAILED, size, error=f'{e.__class__.__name__}: {e}')
+
+
+def find_files(directory: Path, extensions: Iterable[str], recursive=True) -> list[Path]:
+    extensions = {x.lower().lstrip('.') for x in extensions}
+    files = directory.rglob('*') if recursive else directory.glob('*')
+    return sorted(x for x in files if x.is_file() and x.suffix.lower().lstrip('.') in extensions)
+
+
+def extend_sys_path(paths: Iterable[str]):
+    for path in paths:
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def migrate_files(files: Iterable[tuple[str, Type[Formatter]]], jobs: int | None = None, dry_run=False,
+                  python_path: Iterable[str] = ()) -> Generator[MigrationResult, None, None]:
+    """
+    Migrates (path, formatter type) pairs in a process pool. Results are yielded in the order they were submitted
+
+    :param jobs: Number of worker processes. 1 runs in this process, None uses the number of CPUs
+    :param python_path: Entries added to sys.path in the workers so the stored classes can be imported
+    """
+    python_path = tuple(python_path)
+    extend_sys_path(python_path)
+    if jobs == 1:
+        for path, formatter_t in files:
+            yield migrate_file(path, formatter_t, dry_run=dry_run)
+        return
+    files = list(files)
+    if not files:
+        return
+    paths, formatter_ts = zip(*files)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=extend_sys_path, initargs=(python_path,)) as pool:
+        chunk_size = max(1, len(paths) // ((jobs or os.cpu_count() or 1) * 4))
+        yield from pool.map(migrate_file, paths, formatter_ts, (dry_run,) * len(paths), chunksize=chunk_size)
@@ -0,0 +1,161 @@
+# - * -coding: utf - 8 - * -
+"""
+Read/modify/write access to a stored document without deserializing it
+
+@author: ☙ Ryan McConnell ❧
+"""
+from typing import Any, Type, TYPE_CHECKING
+
+from grave_settings.formatter_settings import PreservedReference
+from grave_settings.utilities import format_class_str
+
+if TYPE_CHECKING:
+    from grave_settings.formatter import Formatter
+
+
+PRESERVED_REFERENCE_CLASS_STRING = format_class_str(PreservedReference)
+_MISSING = object()
+
+
+class RawDocument:
+    """
+    A parsed document in the serialized form of its formatter. Values are addressed with key paths in the same format
+    PreservedReferences use (see FormatterSpec.path_to_str), either as a string or as a list of keys.
+
+    PreservedReferences met on the way to a value are followed, so a path reaches the same object it would reach in
+    the deserialized hierarchy. Class strings are only resolved when get_class is called. Nothing else is imported or
+    instantiated.
+    """
+    def __init__(self, formatter: 'Formatter', root, file_path: str | None = None):
+        self.formatter = formatter
+        self.spec = formatter.spec
+        self.root = root
+        self.primitives = self.spec.get_primitive_types()
+        self.file_path = file_path
+        self.paths: dict[str, list] = {}
+        self.classes: dict[str, Type] = {}
+
+    def get_path(self, path: str | list) -> list:
+        if type(path) is not str:
+            return path
+        if path not in self.paths:
+            self.paths[path] = self.spec.str_to_path(path)
+        return self.paths[path]
+
+    def is_reference(self, node) -> bool:
+        return type(node) is dict and node.get(self.spec.class_id) == PRESERVED_REFERENCE_CLASS_STRING
+
+    def follow(self, node):
+        seen = None
+        while self.is_reference(node):
+            ref = node['ref']
+            if seen is None:
+                seen = set()
+            elif ref in seen:
+                raise ValueError(f'PreservedReference loop at: {ref}')
+            seen.add(ref)
+            node = self.walk(self.get_path(ref))
+        return node
+
+    def walk(self, path: list):
+        node = self.root
+        for key in path:
+            node = self.follow(node)[key]
+        return node
+
+    def get_real_path(self, path: str | list) -> list:
+        """
+        path with the PreservedReferences met on the way to its parent replaced by the paths they point to
+        """
+        real = []
+        node = self.root
+        for key in self.get_path(path):
+            seen = None
+            while self.is_reference(node):
+                ref = node['ref']
+                if seen is None:
+                    seen = set()
+                elif ref in seen:
+                    raise ValueError(f'PreservedReference loop at: {ref}')
+                seen.add(ref)
+                real = list(self.get_path(ref))
+                node = self.walk(real)
+            node = node[key]
+            real.append(key)
+        return real
+
+    def get_node(self, path: str | list, follow_reference=True):
+        node = self.walk(self.get_path(path))
+        return self.follow(node) if follow_reference else node
+
+    def get_parent(self, path: str | list) -> tuple[dict | list, Any]:
+        path = self.get_path(path)
+        if not path:
+            raise KeyError('The root of a document has no parent')
+        return self.follow(self.walk(path[:-1])), path[-1]
+
+    def get(self, path: str | list, default=_MISSING):
+        try:
+            return self.get_node(path)
+        except (KeyError, IndexError, TypeError):
+            if default is _MISSING:
+                raise KeyError(path)
+            return default
+
+    def set(self, path: str | list, value):
+        """
+        Sets the value at path. Anything but a primitive is passed through the formatter's serializer first so that
+        containers end up in the representation the formatter expects (None in toml, non-string keys, ...). Objects
+        shared inside value are stored as PreservedReferences to where value ends up in the document
+        """
+        if type(value) not in self.primitives:
+            context = self.formatter.get_serialization_context()
+            context.key_path = self.get_real_path(path)
+            value = self.formatter.serialize(value, serializer=self.formatter.get_serializer(value, context))
+        if not self.get_path(path):
+            self.root = value
+            return
+        parent, key = self.get_parent(path)
+        parent[key] = value
+
+    def delete(self, path: str | list):
+        parent, key = self.get_parent(path)
+        del parent[key]
+
+    def get_class_str(self, path: str | list = ()) -> str | None:
+        node = self.get_node(path)
+        if type(node) is dict:
+            return node.get(self.spec.class_id)
+
+    def get_class(self, path: str | list = ()) -> Type | None:
+        if (class_str := self.get_class_str(path)) is None:
+            return None
+        if class_str not in self.classes:
+            self.classes[class_str] = self.formatter.get_deserialization_context().load_type(class_str)
+        return self.classes[class_str]
+
+    def __getitem__(self, path: str | list):
+        return self.get(path)
+
+    def __setitem__(self, path: str | list, value):
+        self.set(path, value)
+
+    def __delitem__(self, path: str | list):
+        self.delete(path)
+
+    def __contains__(self, path: str | list) -> bool:
+        try:
+            self.get_node(path)
+            return True
+        except (KeyError, IndexError, TypeError):
+            return False
+
+    def dumps(self) -> str | bytes:
+        return self.formatter.serialized_obj_to_buffer(self.root, self.formatter.get_serialization_context())
+
+    def save(self, path: str | None = None, atomic=True):
+        if path is None:
+            path = self.file_path
+        if path is None:
+            raise ValueError('File path not specified')
+        self.formatter.write_serialized_to_file(self.root, path, atomic=atomic)
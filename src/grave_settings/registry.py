@@ -0,0 +1,132 @@
+# - * -coding: utf - 8 - * -
+"""
+Sharing one ConfigFile per file between the parts of a process
+
+@author: ☙ Ryan McConnell ❧
+"""
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, Type, Generator
+from weakref import WeakValueDictionary
+
+from grave_settings.abstract import IASettings
+from grave_settings.config_file import ConfigFile
+from grave_settings.formatter import Formatter
+from grave_settings.utilities import format_class_str
+
+
+class ConfigRegistry:
+    """
+    Hands out one shared ConfigFile per resolved path and formatter type. The first acquire creates and loads it,
+    acquires that arrive while it is loading wait for that load instead of starting their own. A failed load is raised
+    to every waiting acquire and the next one tries again.
+
+    The registry keeps a config alive while it has users, see release. After that it only holds a weak reference, so
+    the config is handed out again for as long as anything else keeps it alive and is evicted once it is collected.
+
+    Only the first acquire decides how the config is constructed. Everyone shares the same data object, so changes
+    are seen by every user and should be synchronized between threads like any other shared object.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.configs: WeakValueDictionary[tuple, ConfigFile] = WeakValueDictionary()
+        self.held: dict[tuple, ConfigFile] = {}
+        self.users: dict[tuple, int] = {}
+        self.loading: dict[tuple, Future] = {}
+
+    @staticmethod
+    def get_key(file_path: Path, formatter: None | Formatter | str = None) -> tuple:
+        file_path = Path(file_path)
+        if formatter is None:
+            formatter = file_path.suffix.lower().removeprefix('.')
+        if type(formatter) == str:
+            formatter_t = ConfigFile.guess_formatter_from_str(formatter)
+        else:
+            formatter_t = type(formatter)
+        return file_path.resolve().absolute(), format_class_str(formatter_t)
+
+    def add_user(self, key: tuple, config: ConfigFile) -> ConfigFile:
+        with self.lock:
+            self.users[key] = self.users.get(key, 0) + 1
+            self.held[key] = config
+        return config
+
+    def acquire(self, file_path: Path, data: IASettings | Any | Type | None = None,
+                formatter: None | Formatter | str = None, **kwargs) -> ConfigFile:
+        """
+        The shared config for file_path, loaded unless data is already an object. Every acquire should be matched
+        by a release
+
+        :param kwargs: Passed to ConfigFile when this acquire creates the config
+        """
+        key = self.get_key(file_path, formatter)
+        with self.lock:
+            config = self.configs.get(key)
+            future = None if config is not None else self.loading.get(key)
+            loader = config is None and future is None
+            if loader:
+                future = self.loading[key] = Future()
+        if config is None and not loader:
+            config = future.result()
+        if config is not None:
+            self.check_data(config, data)
+            return self.add_user(key, config)
+        try:
+            config = ConfigFile(Path(file_path), data=data, formatter=formatter, **kwargs)
+            config.get_load_data_obj()
+        except BaseException as e:
+            with self.lock:
+                del self.loading[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            del self.loading[key]
+            self.configs[key] = config
+        future.set_result(config)
+        return self.add_user(key, config)
+
+    @staticmethod
+    def check_data(config: ConfigFile, data: IASettings | Any | Type | None):
+        if isinstance(data, type) and not isinstance(config.data, data):
+            raise ValueError(f'{config.file_path} is shared holding {type(config.data)}, not {data}')
+
+    def release(self, config: ConfigFile):
+        """
+        Gives up one use of config. The registry lets go of it once the last user released it
+        """
+        key = self.get_key(config.file_path, config.formatter)
+        with self.lock:
+            users = self.users.get(key, 0) - 1
+            if users > 0:
+                self.users[key] = users
+            else:
+                self.users.pop(key, None)
+                self.held.pop(key, None)
+
+    @contextmanager
+    def use(self, file_path: Path, data: IASettings | Any | Type | None = None,
+            formatter: None | Formatter | str = None, **kwargs) -> Generator[ConfigFile, None, None]:
+        config = self.acquire(file_path, data=data, formatter=formatter, **kwargs)
+        try:
+            yield config
+        finally:
+            self.release(config)
+
+    def get_users(self, file_path: Path, formatter: None | Formatter | str = None) -> int:
+        key = self.get_key(file_path, formatter)
+        with self.lock:
+            return self.users.get(key, 0)
+
+    def clear(self):
+        """
+        Forgets every config. Configs that are still in use keep working but are no longer shared
+        """
+        with self.lock:
+            self.configs.clear()
+            self.held.clear()
+            self.users.clear()
+
+
+REGISTRY = ConfigRegistry()
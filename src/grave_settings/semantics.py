@@ -323,6 +323,34 @@ class SerializeNoneVersionInfo(Semantic[bool]):
     pass
 
 
+class HoistVersionInfo(Semantic[bool]):
+    """
+    Version information is collected into one table at the root of the document instead of being written on every
+    versioned object. Objects whose version information agrees with the table omit it. This only applies when the root
+    object is serialized as a mapping, otherwise the version information is written on the objects as usual.
+    """
+    pass
+
+
+class IncludeKeyPath(Semantic[str | tuple]):
+    """
+    Only serialize the objects at these key paths (and the objects on the way to them). Paths are either strings in the
+    format of PreservedReference paths or tuples of keys and are relative to the root object. Dictionary keys and
+    attributes outside the projection are left out, list items outside of it are replaced by None so the indices of the
+    rest stay valid. Objects that would be references to an excluded region are written in full instead. A path that
+    continues through a reference stops there: the reference is written whole and points to the object as it was
+    written where it was first met
+    """
+    COLLECTION = set
+
+
+class ExcludeKeyPath(Semantic[str | tuple]):
+    """
+    Do not serialize the objects at these key paths. See IncludeKeyPath
+    """
+    COLLECTION = set
+
+
 class AutoKeySerializableDictType(Semantic[Type]):
     """
     Automatically scan dictionary objects to ensure their keys are serializable as native format keys. If not they
@@ -373,6 +401,15 @@ class ResolvePreservedReferences(Semantic[bool]):
     pass
 
 
+class LazyDeserialization(Semantic[bool]):
+    """
+    Serializable objects below the root are not built right away. A LazyProxy that holds their serialized state stands
+    in for them and deserializes it the first time an attribute or item is accessed. Classes can negate this in
+    check_in_deserialization_context to have their children built immediately
+    """
+    pass
+
+
 class NotifyFinalizedMethodName(Semantic[str]):
     """
     This can be used as a frame semantic while de-serializing to get a callback on a method designated by the argument.
@@ -0,0 +1,74 @@
+# - * -coding: utf - 8 - * -
+"""
+Pickled snapshots of deserialized object graphs that survive the process
+
+@author: ☙ Ryan McConnell ❧
+"""
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Callable, Iterable, Type
+
+import grave_settings
+from grave_settings.conversion_manager import ConversionManager
+from grave_settings.utilities import atomic_write
+
+
+class SnapshotCache:
+    """
+    Stores deserialized object graphs in a directory as pickles, keyed by the hash of the document they were
+    deserialized from, the grave_settings version and the formatter. Each snapshot also records the current version of
+    every versioned class in the document and is ignored once one of them changes.
+
+    Loading a snapshot unpickles it, so only use a directory that nothing untrusted can write to.
+    """
+    PROTOCOL = 5
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def get_key(self, content_hash: bytes, *parts: str) -> str:
+        h = hashlib.blake2b(content_hash, digest_size=32)
+        h.update(f'{grave_settings.VERSION}\0{self.PROTOCOL}'.encode('utf-8'))
+        for part in parts:
+            h.update(b'\0' + part.encode('utf-8'))
+        return h.hexdigest()
+
+    def get_path(self, key: str) -> Path:
+        return self.directory / f'{key}.pickle'
+
+    @staticmethod
+    def get_versions(class_strs: Iterable[str], load_type: Callable[[str], Type]) -> dict:
+        return {class_str: ConversionManager.get_version_info_from_class(load_type(class_str))
+                for class_str in class_strs}
+
+    def load(self, key: str, load_type: Callable[[str], Type]):
+        """
+        :return: The object stored under key, None if there is none or it is outdated
+        """
+        try:
+            with open(self.get_path(key), 'rb') as f:
+                versions = pickle.load(f)
+                if self.get_versions(versions, load_type) != versions:
+                    return None
+                return pickle.load(f)
+        except Exception:  # Missing, unreadable or written by code that no longer exists
+            return None
+
+    def store(self, key: str, obj, class_strs: Iterable[str], load_type: Callable[[str], Type]) -> bool:
+        """
+        :return: False if obj could not be pickled
+        """
+        try:
+            buffer = pickle.dumps(self.get_versions(class_strs, load_type), protocol=self.PROTOCOL) + \
+                pickle.dumps(obj, protocol=self.PROTOCOL)
+        except Exception:  # Locks, lazy proxies, ...
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write(str(self.get_path(key)), buffer)
+        return True
+
+    def clear(self):
+        for path in self.directory.glob('*.pickle'):
+            path.unlink(missing_ok=True)
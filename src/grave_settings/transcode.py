@@ -0,0 +1,188 @@
+# - * -coding: utf - 8 - * -
+"""
+Converting stored files between formatters without deserializing them
+
+@author: ☙ Ryan McConnell ❧
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from types import NoneType
+from typing import Type, Iterable, Generator, NamedTuple
+
+from grave_settings.formatter import Formatter
+from grave_settings.formatter_settings import PreservedReference
+from grave_settings.helper_objects import KeySerializableDict
+from grave_settings.migration import extend_sys_path
+from grave_settings.utilities import format_class_str
+
+
+NONE_CLASS_STRINGS = {'types.NoneType', format_class_str(NoneType)}
+PRESERVED_REFERENCE_CLASS_STRING = format_class_str(PreservedReference)
+KEY_SERIALIZABLE_DICT_CLASS_STRING = format_class_str(KeySerializableDict)
+TUPLE_CLASS_STRING = format_class_str(tuple)
+
+
+class Transcoder:
+    """
+    Rewrites a serialized object tree from the representation of one formatter into the representation of another.
+    Class strings are never resolved, so nothing is imported or instantiated.
+
+    Values the target can not hold natively (None for toml, datetime objects parsed from toml when writing json, ...)
+    are passed through the target formatter's serializer. Dictionaries with keys the target can not hold are wrapped
+    the way the default serializer wraps them (KeySerializableDict) and PreservedReferences that pointed through them
+    are rewritten.
+    """
+    def __init__(self, source: Formatter, target: Formatter):
+        self.source = source
+        self.target = target
+        self.source_spec = source.spec
+        self.target_spec = target.spec
+        self.target_primitives = target.spec.get_primitive_types()
+        self.target_attribute = target.spec.type_attribute
+        self.native_none = NoneType in self.target_primitives
+        self.key_path = []
+        self.new_key_path = []
+        self.moved_paths: dict[tuple, tuple] = {}
+        self.references: list[dict] = []
+
+    def transcode(self, ser_obj):
+        self.moved_paths = {}
+        self.references = []
+        try:
+            if type(ser_obj) is dict and self.source_spec.version_header_id in ser_obj:
+                ser_obj = ser_obj.copy()
+                header = ser_obj.pop(self.source_spec.version_header_id)
+                ret = self.transcode_node(ser_obj)
+                ret[self.target_spec.version_header_id] = header
+            else:
+                ret = self.transcode_node(ser_obj)
+            if self.moved_paths or type(self.source_spec) is not type(self.target_spec):
+                for reference in self.references:
+                    reference['ref'] = self.target_spec.path_to_str(self.move_path(
+                        self.source_spec.str_to_path(reference['ref'])))
+            return ret
+        finally:
+            self.references = []
+            self.key_path.clear()
+            self.new_key_path.clear()
+
+    def move_path(self, path: list) -> list:
+        for i in range(len(path), 0, -1):
+            if (prefix := tuple(path[:i])) in self.moved_paths:
+                return list(self.moved_paths[prefix]) + path[i:]
+        return path
+
+    def transcode_node(self, node):
+        t = type(node)
+        if t is dict:
+            return self.transcode_dict(node)
+        elif t is list:
+            return self.transcode_list(node)
+        elif t in self.target_primitives:
+            return node
+        else:
+            return self.target.serialize(node)
+
+    def transcode_child(self, key, new_key, value):
+        if type(value) in self.target_primitives:
+            return value
+        self.key_path.append(key)
+        self.new_key_path.append(new_key)
+        try:
+            return self.transcode_node(value)
+        finally:
+            self.key_path.pop()
+            self.new_key_path.pop()
+
+    def transcode_list(self, node: list) -> list:
+        return [self.transcode_child(i, i, v) for i, v in enumerate(node)]
+
+    def transcode_dict(self, node: dict):
+        source_spec = self.source_spec
+        target_spec = self.target_spec
+        if (class_str := node.get(source_spec.class_id)) is not None:
+            if class_str in NONE_CLASS_STRINGS and len(node) == 1 and self.native_none:
+                return None
+            if class_str == PRESERVED_REFERENCE_CLASS_STRING:
+                ret = {target_spec.class_id: class_str, 'ref': node['ref']}
+                self.references.append(ret)
+                return ret
+        attribute = self.target_attribute
+        if any(type(k) is not attribute for k in node):
+            return self.wrap_keys(node)
+        ret = {}
+        renamed = {source_spec.class_id: target_spec.class_id, source_spec.version_id: target_spec.version_id} \
+            if class_str is not None else {}
+        for k, v in node.items():
+            new_k = renamed.get(k, k)
+            ret[new_k] = self.transcode_child(k, new_k, v)
+        return ret
+
+    def wrap_keys(self, node: dict) -> dict:
+        moved_paths = self.moved_paths
+        kvps = []
+        for i, (k, v) in enumerate(node.items()):
+            prefix = tuple(self.new_key_path) + ('kvps', i, 'state')
+            moved_paths[tuple(self.key_path) + (k,)] = prefix + (1,)
+            self.new_key_path.extend(prefix[len(self.new_key_path):])
+            try:
+                kvps.append({
+                    self.target_spec.class_id: TUPLE_CLASS_STRING,
+                    'state': [self.transcode_child(None, 0, k), self.transcode_child(k, 1, v)]
+                })
+            finally:
+                del self.new_key_path[-3:]
+        return {
+            self.target_spec.class_id: KEY_SERIALIZABLE_DICT_CLASS_STRING,
+            'kvps': kvps
+        }
+
+    def transcode_file(self, source_path: str, target_path: str, atomic=True):
+        ser_obj = self.source.read_serialized_from_file(source_path)
+        self.target.write_serialized_to_file(self.transcode(ser_obj), target_path, atomic=atomic)
+
+
+class TranscodeResult(NamedTuple):
+    source_path: str
+    target_path: str
+    size: int = 0
+    error: str | None = None
+
+
+def transcode_file(source_path: str, target_path: str, source_t: Type[Formatter],
+                   target_t: Type[Formatter]) -> TranscodeResult:
+    size = 0
+    try:
+        size = os.path.getsize(source_path)
+        Transcoder(source_t(), target_t()).transcode_file(source_path, target_path)
+        return TranscodeResult(source_path, target_path, size)
+    except Exception as e:
+        return TranscodeResult(source_path, target_path, size, error=f'{e.__class__.__name__}: {e}')
+
+
+def transcode_files(files: Iterable[tuple[str, Type[Formatter], str]], target_t: Type[Formatter],
+                    jobs: int | None = None,
+                    python_path: Iterable[str] = ()) -> Generator[TranscodeResult, None, None]:
+    """
+    Transcodes (source path, source formatter type, target path) entries in a process pool. Results are yielded in the
+    order they were submitted
+
+    :param jobs: Number of worker processes. 1 runs in this process, None uses the number of CPUs
+    :param python_path: Entries added to sys.path in the workers. Only needed if the target formatter serializes
+        values the source formatter parsed into user classes
+    """
+    python_path = tuple(python_path)
+    extend_sys_path(python_path)
+    if jobs == 1:
+        for source_path, source_t, target_path in files:
+            yield transcode_file(source_path, target_path, source_t, target_t)
+        return
+    files = list(files)
+    if not files:
+        return
+    source_paths, source_ts, target_paths = zip(*files)
+    n = len(files)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=extend_sys_path, initargs=(python_path,)) as pool:
+        chunk_size = max(1, n // ((jobs or os.cpu_count() or 1) * 4))
+        yield from pool.map(transcode_file, source_paths, target_paths, source_ts, (target_t,) * n,
+                            chunksize=chunk_size)
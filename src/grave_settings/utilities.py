@@ -1,6 +1,10 @@
 import builtins
+import hashlib
 import inspect
+import os
+import shutil
 import sys
+import tempfile
 import types
 from inspect import signature
 from typing import Type, Callable, Any, Generator, Iterable, TypeVar
@@ -84,6 +88,46 @@ def load_type(str_type, do_import=True):
         raise PermissionError()
 
 
+def atomic_write(path: str, buffer: str | bytes):
+    """
+    Writes buffer to a temporary file next to path and moves it over path, so readers never see a partial file
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w' if isinstance(buffer, str) else 'wb') as f:
+            f.write(buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def hash_buffer(buffer: str | bytes) -> bytes:
+    """
+    blake2b digest of buffer, strings are hashed as utf-8
+    """
+    if isinstance(buffer, str):
+        buffer = buffer.encode('utf-8')
+    return hashlib.blake2b(buffer, digest_size=32).digest()
+
+
+def file_signature(path: str) -> tuple[int, int, int] | None:
+    """
+    (inode, size, modification time in ns) of path, None if it does not exist
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
 def get_type_hints(func: Callable) -> tuple[Any]:
     return tuple(a if (a := x.annotation) is not inspect._empty else Any for x in signature(func).parameters.values())
 
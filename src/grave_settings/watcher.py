@@ -0,0 +1,218 @@
+# - * -coding: utf - 8 - * -
+"""
+Polling config files for changes and merging them into the objects that are already loaded
+
+@author: ☙ Ryan McConnell ❧
+"""
+import asyncio
+import random
+from threading import Thread, Event, RLock
+from typing import TYPE_CHECKING, Callable, Iterable
+
+from grave_settings.abstract import IASettings
+from grave_settings.utilities import file_signature
+
+if TYPE_CHECKING:
+    from grave_settings.config_file import ConfigFile
+
+
+def can_merge(old, new, skip: set = frozenset()) -> bool:
+    """
+    True if merge_value can make old hold what new holds without replacing old. Plain containers are only merged in
+    place if nothing but the IASettings objects inside them changed, since changing them in place is not seen by the
+    object that holds them
+    """
+    if old is new or id(old) in skip or id(new) in skip:
+        return True
+    t = type(old)
+    if t is not type(new):
+        return False
+    if isinstance(old, IASettings):
+        return True
+    if t is list:
+        return len(old) == len(new) and all(can_merge(a, b, skip) for a, b in zip(old, new))
+    if t is dict:
+        return old.keys() == new.keys() and all(can_merge(v, new[k], skip) for k, v in old.items())
+    return old == new
+
+
+def merge_value(old, new, skip: set, seen: set) -> bool | None:
+    """
+    :return: None if old has to be replaced with new, otherwise whether anything inside old changed
+    """
+    if old is new or id(old) in skip or id(new) in skip:
+        return False
+    t = type(old)
+    if t is not type(new):
+        return None
+    if isinstance(old, IASettings):
+        return merge_into(old, new, skip=skip, seen=seen)
+    if t is list or t is dict:
+        if not can_merge(old, new, skip):
+            for k, v in (enumerate(new) if t is list else new.items()):  # old is replaced, what it holds is kept
+                if (k < len(old) if t is list else k in old) and merge_value(old[k], v, skip, seen) is not None:
+                    new[k] = old[k]
+            return None
+        changed = False
+        for k, v in (enumerate(old) if t is list else old.items()):
+            changed = bool(merge_value(v, new[k], skip, seen)) or changed
+        return changed
+    return False if old == new else None
+
+
+def merge_into(target: IASettings, source: IASettings, skip: Iterable = (), seen: set | None = None) -> bool:
+    """
+    Makes target hold what source holds. IASettings objects of the same type found at the same key are merged
+    recursively instead of replaced so they keep their identity and subscribers. Every object invalidates once, in a
+    batch with the keys that changed, and only if one did.
+
+    Keys source does not hold are deleted from target. Objects that can not delete their keys, like SlotSettings, keep
+    the value they have for them.
+
+    :param skip: Ids of objects to leave alone, on either side
+    :return: True if anything in target changed
+    """
+    if seen is None:
+        seen = set()
+    if id(target) in seen:
+        return False
+    seen.add(id(target))
+    skip = skip if type(skip) is set else set(skip)
+    changed = False
+    with target.batch():
+        for key in [k for k in target if k in target and k not in source]:
+            try:
+                del target[key]
+            except ValueError:
+                continue
+            target.key_changed(key)
+            changed = True
+        for key in source:
+            if key not in source:
+                continue  # An unset slot
+            value = source[key]
+            if key in target:
+                merged = merge_value(target[key], value, skip, seen)
+                if merged is not None:
+                    changed = merged or changed
+                    continue
+            target[key] = value
+            changed = True
+    return changed
+
+
+class ConfigWatcher:
+    """
+    Polls the files of its configs with os.stat and calls ConfigFile.reload on the ones that changed, which merges
+    the file into the live data object. A file is only read if its inode, size or modification time differ from what
+    the config last read or wrote.
+
+    Polling runs on a daemon thread (start), an asyncio task (start_task) or whenever poll is called. Reloads happen
+    on that thread, so objects read from others should be treated accordingly.
+    """
+    def __init__(self, configs: Iterable['ConfigFile'] = (), interval: float = 1.0, jitter: float = 0.1,
+                 on_reload: Callable[['ConfigFile'], None] | None = None,
+                 on_error: Callable[['ConfigFile', BaseException], None] | None = None):
+        """
+        :param interval: Seconds between polls
+        :param jitter: Up to this many seconds are added to or taken from each interval at random, so many watchers
+            do not poll in step
+        :param on_reload: Called with every config whose data object changed
+        :param on_error: Called when a reload fails. Without it the last error is kept in error
+        """
+        self.interval = interval
+        self.jitter = jitter
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self.lock = RLock()
+        self.signatures: dict['ConfigFile', tuple | None] = {}
+        self.error: BaseException | None = None
+        self.stopped = Event()
+        self.thread: Thread | None = None
+        self.task: asyncio.Task | None = None
+        for config in configs:
+            self.add(config)
+
+    def add(self, config: 'ConfigFile'):
+        with self.lock:
+            signature = config.content_signature
+            if signature is None:
+                signature = file_signature(str(config.file_path))
+            self.signatures[config] = signature
+
+    def remove(self, config: 'ConfigFile'):
+        with self.lock:
+            self.signatures.pop(config, None)
+
+    def get_delay(self) -> float:
+        return max(0.0, self.interval + random.uniform(-self.jitter, self.jitter))
+
+    def poll(self) -> list['ConfigFile']:
+        """
+        Reloads every config whose file changed since the last poll
+
+        :return: The configs whose data object changed
+        """
+        reloaded = []
+        with self.lock:
+            for config, last in list(self.signatures.items()):
+                signature = file_signature(str(config.file_path))
+                if signature is None or signature == last:
+                    continue
+                self.signatures[config] = signature  # A file that fails to load is retried once it changes again
+                if signature == config.content_signature:
+                    continue  # Written or read by the config itself
+                try:
+                    changed = config.reload()
+                except Exception as e:
+                    if self.on_error is None:
+                        self.error = e
+                    else:
+                        self.on_error(config, e)
+                    continue
+                if changed:
+                    reloaded.append(config)
+                    if self.on_reload is not None:
+                        self.on_reload(config)
+        return reloaded
+
+    def run(self):
+        while not self.stopped.wait(self.get_delay()):
+            self.poll()
+
+    def start(self) -> Thread:
+        self.stopped.clear()
+        self.thread = Thread(target=self.run, name='config_watcher', daemon=True)
+        self.thread.start()
+        return self.thread
+
+    async def run_async(self):
+        while not self.stopped.is_set():
+            await asyncio.sleep(self.get_delay())
+            if not self.stopped.is_set():
+                self.poll()
+
+    def start_task(self) -> asyncio.Task:
+        """
+        Polls from a task on the running event loop. Files are read on the loop's thread
+        """
+        self.stopped.clear()
+        self.task = asyncio.get_running_loop().create_task(self.run_async())
+        return self.task
+
+    def stop(self, timeout: float | None = None) -> bool:
+        """
+        :return: False if the thread did not stop within timeout
+        """
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        thread = self.thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        if thread.is_alive():
+            return False
+        self.thread = None
+        return True